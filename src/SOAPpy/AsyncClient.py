@@ -0,0 +1,338 @@
+"""
+asyncio based SOAP client.
+
+AsyncSOAPProxy is used like SOAPProxy, but its method stubs return
+coroutines.  Requests travel over HTTP/1.1 keep-alive connections opened
+with asyncio streams and kept in a per event loop pool, so thousands of
+calls can be in flight from a single thread:
+
+    proxy = AsyncSOAPProxy("http://localhost:8080/", namespace = "urn:x")
+    r = await proxy.echo("hello")
+    r = await proxy._ns("urn:y").echo("hello")
+    r = await proxy.invoke("echo", ("hello",), timeout = 5)
+"""
+
+from .version import __version__
+
+import asyncio
+import http.client
+import io
+import socket
+import ssl
+import time
+import weakref
+
+# SOAPpy-py3 modules
+from .Config import Config
+from .Client import SOAPProxy, SOAPAddress, HTTPTransport, SOAPTimeoutError, \
+                    PreparedMethod
+
+################################################################################
+# Async transport
+################################################################################
+
+class AsyncConnectionPool:
+    """Idle keep-alive stream connections, kept per event loop and host.
+
+    Stream connections belong to the loop that opened them, so every
+    running loop gets its own set.  No locking is needed since a loop
+    only ever touches its own connections from its own thread."""
+
+    def __init__(self):
+        self._loops = weakref.WeakKeyDictionary()
+
+    def _state(self):
+        loop = asyncio.get_running_loop()
+        try:
+            return self._loops[loop]
+        except KeyError:
+            state = self._loops[loop] = ({}, {})
+            return state
+
+    def get(self, key, idle_timeout = None):
+        conns = self._state()[0].get(key)
+        now = time.time()
+
+        while conns:
+            # the oldest connections are at the front of the list
+            if idle_timeout is not None and now - conns[0][2] > idle_timeout:
+                conns.pop(0)[1].close()
+                continue
+
+            reader, writer, stamp = conns.pop()
+            if reader.at_eof() or writer.is_closing():
+                writer.close()
+                continue
+            return reader, writer
+
+        return None
+
+    def put(self, key, reader, writer, maxsize):
+        conns = self._state()[0].setdefault(key, [])
+        if len(conns) < maxsize and not reader.at_eof():
+            conns.append((reader, writer, time.time()))
+        else:
+            writer.close()
+
+    def limit(self, key, max_connections):
+        """Return a semaphore bounding the requests in flight to key."""
+        limits = self._state()[1]
+        try:
+            return limits[key]
+        except KeyError:
+            sem = limits[key] = asyncio.Semaphore(max_connections)
+            return sem
+
+    def clear(self):
+        for idle, limits in list(self._loops.values()):
+            for conns in list(idle.values()):
+                for reader, writer, stamp in conns:
+                    writer.close()
+            idle.clear()
+
+    def __len__(self):
+        try:
+            idle = self._state()[0]
+        except RuntimeError:
+            return 0
+        return sum([len(x) for x in list(idle.values())])
+
+
+class AsyncHTTPTransport(HTTPTransport):
+    """HTTPTransport whose call() is a coroutine built on asyncio streams.
+
+    Set max_connections to bound the number of requests in flight to a
+    single host; further calls wait for a free connection."""
+
+    pool = AsyncConnectionPool()
+    max_connections = None
+
+    async def call(self, addr, data, namespace, soapaction = None,
+        encoding = None, http_proxy = None, config = Config, timeout = None):
+
+        if not isinstance(addr, SOAPAddress):
+            addr = SOAPAddress(addr, config)
+
+        if addr.proto == 'httpg':
+            raise IOError("httpg is not supported by AsyncHTTPTransport")
+
+        if isinstance(data, str):
+            data = data.encode(encoding or 'UTF-8')
+
+        if http_proxy:
+            real_addr = http_proxy
+            real_path = addr.proto + "://" + addr.host + addr.path
+        else:
+            real_addr = addr.host
+            real_path = addr.path
+
+        headers = self._requestHeaders(addr, data, soapaction, encoding)
+        if not config.http_pool_size:
+            headers.append(("Connection", "close"))
+        self._dumpRequest(real_path, headers, data, encoding, config)
+
+        head = ["POST %s HTTP/1.1\r\n" % real_path]
+        head += ["%s: %s\r\n" % h for h in headers]
+        head.append("\r\n")
+        head = "".join(head).encode('iso-8859-1')
+
+        try:
+            code, msg, headers, data = await asyncio.wait_for(
+                self.__request(addr, real_addr, head + data, config),
+                timeout)
+        except asyncio.TimeoutError:
+            raise SOAPTimeoutError
+
+        return self._handleReply(code, msg, headers, data, namespace, config)
+
+    async def __connect(self, proto, host, config):
+        if proto == 'https':
+            conn = http.client.HTTPSConnection(host)
+            context = ssl.create_default_context()
+            if config.SSL.cert_file:
+                context.load_cert_chain(config.SSL.cert_file,
+                                        config.SSL.key_file)
+        else:
+            conn = http.client.HTTPConnection(host)
+            context = None
+
+        # let http.client take care of default ports and IPv6 literals
+        return await asyncio.open_connection(conn.host, conn.port,
+                                             ssl = context)
+
+    async def __request(self, addr, real_addr, request, config):
+        key = (addr.proto, real_addr)
+        pool_size = config.http_pool_size
+
+        if self.max_connections:
+            async with self.pool.limit(key, self.max_connections):
+                return await self.__send(key, addr, real_addr, request,
+                                         pool_size, config)
+
+        return await self.__send(key, addr, real_addr, request, pool_size,
+                                 config)
+
+    async def __send(self, key, addr, real_addr, request, pool_size, config):
+        while 1:
+            conn = None
+            if pool_size:
+                conn = self.pool.get(key, config.http_pool_idle_timeout)
+            reused = conn is not None
+
+            if reused:
+                reader, writer = conn
+            else:
+                reader, writer = await self.__connect(addr.proto, real_addr,
+                                                      config)
+
+            try:
+                writer.write(request)
+                await writer.drain()
+
+                code, msg, headers, body, will_close = \
+                    await self.__readResponse(reader)
+            except (ConnectionError, asyncio.IncompleteReadError,
+                    http.client.BadStatusLine) as e:
+                writer.close()
+                if reused:
+                    continue
+                if isinstance(e, asyncio.IncompleteReadError):
+                    raise http.client.IncompleteRead(e.partial, e.expected)
+                raise
+            except BaseException:
+                # includes cancellation by a timeout; the connection is in
+                # an unknown state, so it must not go back to the pool
+                writer.close()
+                raise
+
+            if pool_size and not will_close:
+                self.pool.put(key, reader, writer, pool_size)
+            else:
+                writer.close()
+
+            return code, msg, headers, body
+
+    async def __readResponse(self, reader):
+        while 1:
+            line = await reader.readline()
+            if not line:
+                raise http.client.RemoteDisconnected(
+                    "Remote end closed connection without response")
+
+            try:
+                version, code, msg = \
+                    (line.decode('iso-8859-1').strip().split(None, 2) + [''])[:3]
+                code = int(code)
+                if not version.startswith('HTTP/'):
+                    raise ValueError
+            except ValueError:
+                raise http.client.BadStatusLine(line)
+
+            lines = []
+            while 1:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                lines.append(line)
+            headers = http.client.parse_headers(io.BytesIO(b''.join(lines)
+                                                           + b'\r\n'))
+
+            if code != 100:
+                break
+
+        connection = (headers.get("connection") or '').lower()
+        will_close = 'close' in connection or \
+            (version == 'HTTP/1.0' and 'keep-alive' not in connection)
+
+        if 'chunked' in (headers.get("transfer-encoding") or '').lower():
+            chunks = []
+            while 1:
+                line = await reader.readline()
+                size = int(line.split(b';')[0].strip() or b'0', 16)
+                if size == 0:
+                    # skip any trailers
+                    while (await reader.readline()) not in \
+                              (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b''.join(chunks)
+        else:
+            # work around OC4J bug which does '<len>, <len>'
+            length = (headers.get("content-length") or '').split(',')[0]
+            try:
+                length = int(length)
+            except ValueError:
+                length = -1
+
+            if length < 0:
+                body = await reader.read()
+                will_close = 1
+            else:
+                body = await reader.readexactly(length)
+
+        return code, msg, headers, body, will_close
+
+################################################################################
+# Async SOAP Proxy
+################################################################################
+
+class AsyncSOAPProxy(SOAPProxy):
+    """SOAPProxy whose remote method calls are coroutines."""
+
+    def __init__(self, proxy, namespace = None, soapaction = None,
+                 header = None, methodattrs = None,
+                 transport = AsyncHTTPTransport, encoding = 'UTF-8',
+                 throw_faults = 1, unwrap_results = None, http_proxy = None,
+                 config = Config, noroot = 0, simplify_objects = None,
+                 timeout = None):
+
+        SOAPProxy.__init__(self, proxy, namespace, soapaction, header,
+                           methodattrs, transport, encoding, throw_faults,
+                           unwrap_results, http_proxy, config, noroot,
+                           simplify_objects, timeout)
+
+    def invoke(self, method, args, kw = {}, timeout = None):
+        return self.__call(method, args, kw, timeout = timeout)
+
+    def prepare(self, method, signature):
+        """See SOAPProxy.prepare(); calls to the prepared method return
+        awaitables."""
+        return PreparedMethod(self, self.__call, method, signature)
+
+    async def __call(self, name, args, kw, ns = None, sa = None, hd = None,
+        ma = None, timeout = None):
+
+        m, ns, sa = self._buildRequest(name, args, kw, ns, sa, hd, ma)
+        return await self._send(m, ns, sa, timeout = timeout)
+
+    async def _send(self, m, ns, sa, rebuild = None, timeout = None):
+        if timeout is None:
+            timeout = self.timeout
+
+        call_retry = 0
+        try:
+            r, self.namespace = await self.transport.call(self.proxy, m, ns,
+                sa, encoding = self.encoding, http_proxy = self.http_proxy,
+                config = self.config, timeout = timeout)
+        except socket.timeout:
+            raise
+        except Exception as ex:
+            call_retry = self._callFailed(ex)
+
+        if call_retry:
+            r, self.namespace = await self.transport.call(self.proxy, m, ns,
+                sa, encoding = self.encoding, http_proxy = self.http_proxy,
+                config = self.config, timeout = timeout)
+
+        return self._handleResponse(r)
+
+    def _callWithBody(self, body):
+        return self.__call(None, body, {})
+
+    def __getattr__(self, name):  # hook to catch method calls
+        if name in ( '__del__', '__getinitargs__', '__getnewargs__',
+           '__getstate__', '__setstate__', '__reduce__', '__reduce_ex__'):
+            raise AttributeError(name)
+        return self._SOAPProxy__Method(self.__call, name, config = self.config)
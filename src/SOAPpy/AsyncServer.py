@@ -0,0 +1,360 @@
+"""
+asyncio based SOAP server.
+
+AsyncSOAPServer keeps the registration API of the other SOAP servers
+(registerObject, registerFunction, registerKWFunction, MethodSig) but runs
+on an asyncio event loop.  Methods may be coroutine functions, which are
+awaited on the loop so many slow calls can be served concurrently from a
+single thread; ordinary functions are run in an executor so they cannot
+stall the loop:
+
+    async def fetch(url):
+        ...
+
+    server = AsyncSOAPServer(("localhost", 8080))
+    server.registerFunction(fetch)
+    asyncio.run(server.serve_forever())
+"""
+
+from .version import __version__
+
+import asyncio
+import email.utils
+import http.client
+import http.server
+import inspect
+import io
+import sys
+
+# SOAPpy-py3 modules
+from .Config    import Config
+from .Server    import SOAPServerBase, HeaderHandler, MethodSig, \
+                       _task_context
+from .Parser    import SOAPPushParser
+from .Types     import faultType
+from .Utilities import debugHeader, debugFooter
+
+################################################################################
+# asyncio SOAP Server
+################################################################################
+
+class AsyncSOAPServer(SOAPServerBase):
+    """SOAP server for asyncio, awaiting coroutine methods on the loop.
+
+    Synchronous methods run in executor (the loop's default executor
+    when None).  ssl_context is an ssl.SSLContext to serve HTTPS with."""
+
+    def __init__(self, addr = ('localhost', 8000), log = 0,
+        encoding = 'UTF-8', config = Config, namespace = None,
+        ssl_context = None, executor = None):
+
+        # Test the encoding, raising an exception if it's not known
+        if encoding != None:
+            ''.encode(encoding)
+
+        self.namespace          = namespace
+        self.objmap             = {}
+        self.funcmap            = {}
+        self.ssl_context        = ssl_context
+        self.encoding           = encoding
+        self.config             = config
+        self.log                = log
+
+        self.server_address     = addr
+        self.executor           = executor
+        self._server            = None
+        self._connections       = {}
+        self.read_size          = 65536
+        # seconds to wait for each read of a request body (None waits
+        # forever); the idle time before a request is limited by
+        # config.http_keepalive_timeout instead
+        self.read_timeout       = 60
+
+    async def start(self):
+        """Start listening; server_address then holds the bound address."""
+        self._server = await asyncio.start_server(self._handle,
+            self.server_address[0], self.server_address[1],
+            ssl = self.ssl_context, reuse_address = True)
+        self.server_address = self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    def close(self):
+        """Stop listening and close the open connections."""
+        if self._server is not None:
+            self._server.close()
+        for writer in list(self._connections.keys()):
+            writer.close()
+
+    async def wait_closed(self):
+        if self._server is not None:
+            await self._server.wait_closed()
+        if self._connections:
+            await asyncio.wait(list(self._connections.values()))
+
+    def version_string(self):
+        return '<a href="http://pywebsvcs.sf.net">' + \
+            'SOAPpy-py3 ' + __version__ + '</a> (Python ' + \
+            sys.version.split()[0] + ')'
+
+    def log_message(self, peer, format, *args):
+        if self.log:
+            sys.stderr.write("%s - - [%s] %s\n" %
+                             (peer[0], email.utils.formatdate(localtime = 1),
+                              format % args))
+
+    async def _handle(self, reader, writer):
+        peer = writer.get_extra_info('peername') or ('-',)
+        requests = 0
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while 1:
+                try:
+                    request = await asyncio.wait_for(
+                        self._readRequest(reader),
+                        self.config.http_keepalive_timeout)
+                    if request is None:
+                        break
+                    command, path, version, headers = request
+                    data, parser, error = await self._readData(reader,
+                        writer, headers)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError,
+                        ConnectionError):
+                    break
+                except ValueError:
+                    # a malformed Content-length or chunk size; the rest
+                    # of the stream can't be framed, so answer and close
+                    self.log_message(peer, '"%s %s %s" %d -', command, path,
+                                     version, 400)
+                    self._writeResponse(writer, 400, 'text/plain', b'', 1,
+                                        version)
+                    await writer.drain()
+                    break
+                requests += 1
+
+                connection = (headers.get("Connection") or '').lower()
+                max_requests = self.config.http_keepalive_max_requests
+                close = 'close' in connection or \
+                    (version != 'HTTP/1.1' and 'keep-alive' not in connection) \
+                    or (max_requests and requests >= max_requests)
+
+                if command == 'POST':
+                    status, resp = await self._dispatch(data, path, headers,
+                                                        writer, parser, error)
+                    t = 'text/xml'
+                    if self.encoding != None:
+                        t += '; charset=%s' % self.encoding
+                else:
+                    status, resp = 405, b''
+                    t = 'text/plain'
+
+                self.log_message(peer, '"%s %s %s" %d -', command, path,
+                                 version, status)
+                self._writeResponse(writer, status, t, resp, close, version)
+                await writer.drain()
+
+                if close:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            del self._connections[writer]
+            writer.close()
+
+    async def _readRequest(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+
+        try:
+            command, path, version = line.decode('iso-8859-1').split()
+        except ValueError:
+            raise ConnectionError("Bad request line %r" % line)
+
+        lines = []
+        while 1:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            lines.append(line)
+        headers = http.client.parse_headers(io.BytesIO(b''.join(lines)
+                                                       + b'\r\n'))
+        return command, path, version, headers
+
+    async def _readData(self, reader, writer, headers):
+        if (headers.get("Expect") or '').lower() == '100-continue':
+            writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+
+        # Parse the body as it comes in rather than after reading all of it
+        parser = SOAPPushParser(header = 1, body = 1, attrs = 1,
+                                ignore_ext = True,
+                                native = self.config.simplify_objects,
+                                numeric_arrays = self.config.numeric_arrays,
+                                backend = self.config.parser_backend,
+                                datetime_objects =
+                                    self.config.datetime_objects,
+                                lazy = self.config.lazy_values,
+                                config = self.config)
+        error = None
+        # the body is kept in a single buffer, not copied again
+        data = bytearray()
+        async for chunk in self._readBody(reader, headers):
+            data += chunk
+            if error is None:
+                # on errors, keep reading so the connection stays usable
+                # and report the error when dispatching
+                try:
+                    parser.feed(chunk)
+                except Exception as e:
+                    error = e
+
+        return data, parser, error
+
+    async def _readBody(self, reader, headers):
+        def timed(aw):
+            return asyncio.wait_for(aw, self.read_timeout)
+
+        if 'chunked' in (headers.get("Transfer-Encoding") or '').lower():
+            while 1:
+                size = int((await timed(reader.readline())).split(b';')[0],
+                           16)
+                if size < 0:
+                    raise ValueError("negative chunk size %d" % size)
+                if size == 0:
+                    while (await timed(reader.readline())) not in \
+                              (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                while size > 0:
+                    chunk = await timed(reader.read(min(size,
+                                                        self.read_size)))
+                    if not chunk:
+                        raise asyncio.IncompleteReadError(b'', size)
+                    size -= len(chunk)
+                    yield chunk
+                await timed(reader.readexactly(2))
+        else:
+            length = int(headers.get("Content-length") or 0)
+            if length < 0:
+                raise ValueError("negative Content-length %d" % length)
+            while length > 0:
+                chunk = await timed(reader.read(min(length,
+                                                    self.read_size)))
+                if not chunk:
+                    raise asyncio.IncompleteReadError(b'', length)
+                length -= len(chunk)
+                yield chunk
+
+    def _writeResponse(self, writer, status, t, resp, close, version):
+        if status in http.server.BaseHTTPRequestHandler.responses:
+            reason = http.server.BaseHTTPRequestHandler.responses[status][0]
+        else:
+            reason = ''
+
+        head = ["HTTP/1.1 %d %s" % (status, reason),
+                "Server: %s" % self.version_string(),
+                "Date: %s" % email.utils.formatdate(usegmt = True),
+                "Content-type: %s" % t,
+                "Content-length: %d" % len(resp)]
+        if close:
+            head.append("Connection: close")
+        elif version != 'HTTP/1.1':
+            head.append("Connection: keep-alive")
+
+        if self.config.dumpHeadersOut:
+            s = 'Outgoing HTTP headers'
+            debugHeader(s)
+            print("\n".join(head))
+            debugFooter(s)
+
+        if self.config.dumpSOAPOut and resp:
+            s = 'Outgoing SOAP'
+            debugHeader(s)
+            print(resp, end=' ')
+            if resp[-1:] != b'\n':
+                print()
+            debugFooter(s)
+
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode('iso-8859-1')
+                     + resp)
+
+    async def _dispatch(self, data, path, headers, writer, parser = None,
+                        error = None):
+        if self.config.dumpSOAPIn:
+            s = 'Incoming SOAP'
+            debugHeader(s)
+            print(bytes(data), end=' ')
+            if data[-1:] != b'\n':
+                print()
+            debugFooter(s)
+
+        try:
+            if error is not None:
+                raise error
+            if parser is None:
+                parsed = None
+            else:
+                parsed = parser.close()
+
+            call = self._parseCall(data, path, headers, writer, True, parsed)
+
+            if call.fault is not None:
+                return 500, call.fault
+
+            try:
+                fr = await self._invokeAsync(call)
+                return 200, self._buildResponse(call, fr)
+            except Exception as e:
+                return 500, self._methodFault(call, e)
+        except faultType as e:
+            return 500, self._requestFault(e)
+        except Exception as e:
+            # internal error, report as HTTP server error
+            if self.config.dumpFaultInfo:
+                import traceback
+                s = 'Internal exception %s' % e
+                debugHeader(s)
+                traceback.print_exc()
+                debugFooter(s)
+            return 500, b''
+
+    async def _invokeAsync(self, call):
+        f = call.func
+        if isinstance(f, MethodSig):
+            f = f.func
+
+        a = call.auth
+        if isinstance(a, MethodSig):
+            a = a.func
+
+        loop = asyncio.get_running_loop()
+        if not inspect.iscoroutinefunction(f) and \
+           not inspect.iscoroutinefunction(a):
+            return await loop.run_in_executor(self.executor,
+                                              self._invokeCall, call)
+
+        if call.header:
+            HeaderHandler(call.header, call.attrs)
+
+        token = _task_context.set(call.context)
+        try:
+            # Do an authorization check; the check may be a coroutine too
+            if call.auth != None:
+                ok = call.auth(*(), **{"_SOAPContext" : call.context})
+                if inspect.isawaitable(ok):
+                    ok = await ok
+                if not ok:
+                    raise self._authFailed(call)
+
+            if not inspect.iscoroutinefunction(f):
+                # checked already, only the method runs in the executor
+                return await loop.run_in_executor(self.executor,
+                                                  self._invokeCall, call, 1)
+
+            f, args, kw = self._callArgs(call)
+            return await f(*args, **kw)
+        finally:
+            _task_context.reset(token)
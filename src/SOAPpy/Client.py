@@ -52,15 +52,19 @@ import urllib.request, urllib.parse, urllib.error
 from .Types import *
 import re
 import base64
+import select
 import socket, http.client
+import ssl
+import threading
+import time
 from http.client import HTTPConnection
 import http.cookies
 
 # SOAPpy-py3 modules
 from .Errors      import *
 from .Config      import Config
-from .Parser      import parseSOAPRPC
-from .SOAPBuilder import buildSOAP
+from .Parser      import parseSOAPRPC, SOAPIterParser
+from .SOAPBuilder import buildSOAP, iterbuildSOAP, SOAPTemplate
 from .Utilities   import *
 from .Types       import faultType, simplify
 
@@ -243,8 +247,94 @@ class HTTPWithTimeout(HTTP):
 
         self._setup(self._connection_class(host, port, strict, timeout))
 
+class HTTPConnectionPool:
+    """Thread-safe pool of idle HTTP/1.1 keep-alive connections.
+
+    Connections are kept per key (protocol and host), most recently used
+    first.  Connections that have been idle for longer than the idle
+    timeout, or whose socket has been closed by the server in the
+    meantime, are discarded instead of being handed out again."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = {}
+
+    def get(self, key, idle_timeout = None):
+        now = time.time()
+        stale = []
+        conn = None
+
+        with self._lock:
+            conns = self._idle.get(key)
+
+            while conns:
+                # the oldest connections are at the front of the list
+                if idle_timeout is not None and \
+                       now - conns[0][1] > idle_timeout:
+                    stale.append(conns.pop(0)[0])
+                    continue
+
+                c = conns.pop()[0]
+                if self._alive(c):
+                    conn = c
+                    break
+                stale.append(c)
+
+        for c in stale:
+            c.close()
+
+        return conn
+
+    def put(self, key, conn, maxsize):
+        with self._lock:
+            conns = self._idle.setdefault(key, [])
+            if len(conns) < maxsize:
+                conns.append((conn, time.time()))
+                return
+
+        conn.close()
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+
+        for conns in list(idle.values()):
+            for conn, stamp in conns:
+                conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return sum([len(x) for x in list(self._idle.values())])
+
+    def _alive(self, conn):
+        # An idle keep-alive socket should have nothing to read; if it
+        # is readable the server either closed it or sent garbage.
+        if conn.sock is None:
+            return 0
+        try:
+            r = select.select([conn.sock], [], [], 0)[0]
+        except (ValueError, OSError):
+            return 0
+        return not r
+
+
+class _Chunks:
+    # iterable of request body chunks, telling whether it was started
+    def __init__(self, data):
+        self.data = data
+        self.started = 0
+
+    def __iter__(self):
+        self.started = 1
+        for chunk in self.data:
+            yield chunk
+
+
 class HTTPTransport:
-            
+
+    # shared by all transports, so that sockets are reused across
+    # SOAPProxy instances talking to the same host
+    pool = HTTPConnectionPool()
 
     def __init__(self):
         self.cookies = http.cookies.SimpleCookie();
@@ -254,6 +344,8 @@ class HTTPTransport:
         SOAP message."""
 
         if type(original_namespace) == StringType:
+            if isinstance(data, bytes):
+                data = data.decode('utf-8', 'replace')
             pattern="xmlns:\w+=['\"](" + original_namespace + "[^'\"]*)['\"]"
             match = re.search(pattern, data)
             if match:
@@ -263,9 +355,10 @@ class HTTPTransport:
         else:
             return original_namespace
     
-    def __addcookies(self, r):
-        '''Add cookies from self.cookies to request r
+    def _cookieHeaders(self):
+        '''Return the Cookie headers for the cookies in self.cookies
         '''
+        headers = []
         for cname, morsel in list(self.cookies.items()):
             attrs = []
             value = morsel.get('version', '')
@@ -278,115 +371,177 @@ class HTTPTransport:
             value = morsel.get('domain')
             if value:
                 attrs.append('$Domain=%s' % value)
-            r.putheader('Cookie', "; ".join(attrs))
-    
-    def call(self, addr, data, namespace, soapaction = None, encoding = None,
-        http_proxy = None, config = Config, timeout=None):
+            headers.append(('Cookie', "; ".join(attrs)))
+        return headers
+
+    def __connect(self, proto, host, config, timeout):
+        if proto == 'https':
+            context = ssl.create_default_context()
+            if config.SSL.cert_file:
+                context.load_cert_chain(config.SSL.cert_file,
+                                        config.SSL.key_file)
+            return http.client.HTTPSConnection(host, timeout = timeout,
+                                               context = context)
+        return HTTPConnection(host, timeout = timeout)
+
+    def __request(self, addr, real_addr, real_path, headers, data, config,
+        timeout, stream = 0):
+        """Send the request over a pooled keep-alive connection.
+
+        Returns (code, msg, headers, data).  A connection that turns out
+        to have been closed by the server while it sat in the pool is
+        discarded and the request is retried once on a fresh one, unless
+        data is an iterable of chunks (sent with chunked encoding) that
+        has been consumed already.  With stream set, data is an iterator
+        over the body as it arrives."""
+
+        key = (addr.proto, real_addr)
+        pool_size = config.http_pool_size
+        chunked = not isinstance(data, bytes)
+        if chunked:
+            data = _Chunks(data)
+
+        while 1:
+            r = None
+            if pool_size:
+                r = self.pool.get(key, config.http_pool_idle_timeout)
+            reused = r is not None
+
+            if reused:
+                r.timeout = timeout
+                r.sock.settimeout(timeout)
+            else:
+                r = self.__connect(addr.proto, real_addr, config, timeout)
 
-        if not isinstance(addr, SOAPAddress):
-            addr = SOAPAddress(addr, config)
+            try:
+                r.putrequest("POST", real_path, skip_host = 1,
+                             skip_accept_encoding = 1)
+                for k, v in headers:
+                    r.putheader(k, v)
+                if not pool_size:
+                    r.putheader("Connection", "close")
+                r.endheaders(data, encode_chunked = chunked)
+
+                response = r.getresponse()
+                if not stream:
+                    body = response.read()
+            except (ConnectionError, http.client.BadStatusLine) as e:
+                r.close()
+                if reused and not (chunked and data.started):
+                    continue
+                if isinstance(e, http.client.BadStatusLine) and \
+                       not isinstance(e, ConnectionError):
+                    raise HTTPError(-1, e.line)
+                raise
+            except:
+                r.close()
+                raise
 
-        # Build a request
-        if http_proxy:
-            real_addr = http_proxy
-            real_path = addr.proto + "://" + addr.host + addr.path
-        else:
-            real_addr = addr.host
-            real_path = addr.path
+            if stream:
+                body = self.__readBody(key, r, response, pool_size)
+            elif pool_size and not response.will_close:
+                self.pool.put(key, r, pool_size)
+            else:
+                r.close()
 
-        if addr.proto == 'httpg':
-            from pyGlobus.io import GSIHTTP
-            r = GSIHTTP(real_addr, tcpAttr = config.tcpAttr)
-        elif addr.proto == 'https':
-            r = http.client.HTTPS(real_addr, key_file=config.SSL.key_file, cert_file=config.SSL.cert_file)
-        else:
-            r = HTTPWithTimeout(real_addr, timeout=timeout)
+            return response.status, response.reason, response.msg, body
+
+    def __readBody(self, key, r, response, pool_size):
+        # The connection goes back to the pool only once the whole body
+        # has been read; it is closed if the caller gives up before that.
+        done = 0
+        try:
+            while 1:
+                chunk = response.read1(65536)
+                if not chunk:
+                    break
+                yield chunk
+            response.close()
+            done = 1
+        finally:
+            if done and pool_size and not response.will_close:
+                self.pool.put(key, r, pool_size)
+            else:
+                r.close()
+
+    def __gsirequest(self, real_addr, real_path, headers, data, config):
+        from pyGlobus.io import GSIHTTP
+        r = GSIHTTP(real_addr, tcpAttr = config.tcpAttr)
 
         r.putrequest("POST", real_path)
+        for k, v in headers:
+            r.putheader(k, v)
+        r.endheaders()
+        r.send(data)
 
-        r.putheader("Host", addr.host)
-        r.putheader("User-agent", SOAPUserAgent())
+        code, msg, headers = r.getreply()
+        f = r.getfile()
+        if f is None:
+            raise HTTPError(code, "Empty response from server\nCode: %s\nHeaders: %s" % (msg, headers))
+        data = f.read()
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return code, msg, headers, data
+
+    def _requestHeaders(self, addr, data, soapaction, encoding):
+        """Return the list of (name, value) headers for a SOAP POST."""
+
+        headers = [("Host", addr.host), ("User-agent", SOAPUserAgent())]
         t = 'text/xml';
         if encoding != None:
             t += '; charset=%s' % encoding
-        r.putheader("Content-type", t)
-        r.putheader("Content-length", str(len(data)))
-        self.__addcookies(r);
-        
+        headers.append(("Content-type", t))
+        if isinstance(data, bytes):
+            headers.append(("Content-length", str(len(data))))
+        else:
+            headers.append(("Transfer-Encoding", "chunked"))
+
         # if user is not a user:passwd format
         #    we'll receive a failure from the server. . .I guess (??)
         if addr.user != None:
-            val = base64.encodestring(urllib.parse.unquote_plus(addr.user))
-            r.putheader('Authorization','Basic ' + val.replace('\012',''))
+            val = base64.b64encode(
+                urllib.parse.unquote_plus(addr.user).encode('utf-8'))
+            headers.append(('Authorization', 'Basic ' + val.decode('ascii')))
 
         # This fixes sending either "" or "None"
         if soapaction == None or len(soapaction) == 0:
-            r.putheader("SOAPAction", "")
+            headers.append(("SOAPAction", ""))
         else:
-            r.putheader("SOAPAction", '"%s"' % soapaction)
+            headers.append(("SOAPAction", '"%s"' % soapaction))
+
+        return headers + self._cookieHeaders()
 
+    def _dumpRequest(self, real_path, headers, data, encoding, config):
         if config.dumpHeadersOut:
             s = 'Outgoing HTTP headers'
             debugHeader(s)
-            print("POST %s %s" % (real_path, r._http_vsn_str))
-            print("Host:", addr.host)
-            print("User-agent: SOAPpy-py3 " + __version__ + " (http://pywebsvcs.sf.net)")
-            print("Content-type:", t)
-            print("Content-length:", len(data))
-            print('SOAPAction: "%s"' % soapaction)
+            print("POST %s %s" % (real_path, HTTPConnection._http_vsn_str))
+            for k, v in headers:
+                print("%s: %s" % (k, v))
             debugFooter(s)
 
-        r.endheaders()
-
         if config.dumpSOAPOut:
             s = 'Outgoing SOAP'
             debugHeader(s)
-            print(data, end=' ')
-            if data[-1] != '\n':
+            print(data.decode(encoding or 'UTF-8'), end=' ')
+            if data[-1:] != b'\n':
                 print()
             debugFooter(s)
 
-        # send the payload
-        r.send(data)
-
-        # read response line
-        code, msg, headers = r.getreply()
+    def _handleReply(self, code, msg, headers, data, namespace, config):
+        """Check the HTTP reply and return (data, namespace)."""
 
         self.cookies = http.cookies.SimpleCookie();
         if headers:
             content_type = headers.get("content-type","text/xml")
-            content_length = headers.get("Content-length")
 
-            for cookie in headers.getallmatchingheaders("Set-Cookie"):
+            for cookie in headers.get_all("Set-Cookie") or []:
                 self.cookies.load(cookie);
 
         else:
             content_type=None
-            content_length=None
-
-        # work around OC4J bug which does '<len>, <len>' for some reaason
-        if content_length:
-            comma=content_length.find(',')
-            if comma>0:
-                content_length = content_length[:comma]
 
-        # attempt to extract integer message size
-        try:
-            message_len = int(content_length)
-        except:
-            message_len = -1
-            
-        f = r.getfile()
-        if f is None:
-            raise HTTPError(code, "Empty response from server\nCode: %s\nHeaders: %s" % (msg, headers))
-
-        if message_len < 0:
-            # Content-Length missing or invalid; just read the whole socket
-            # This won't work with HTTP/1.1 chunked encoding
-            data = f.read()
-            message_len = len(data)
-        else:
-            data = f.read(message_len)
+        message_len = len(data)
 
         if(config.debug):
             print("code=",code)
@@ -398,9 +553,9 @@ class HTTPTransport:
         if config.dumpHeadersIn:
             s = 'Incoming HTTP headers'
             debugHeader(s)
-            if headers.headers:
+            if headers:
                 print("HTTP/1.? %d %s" % (code, msg))
-                print("\n".join([x.strip() for x in headers.headers]))
+                print("\n".join(["%s: %s" % x for x in headers.items()]))
             else:
                 print("HTTP/0.9 %d %s" % (code, msg))
             debugFooter(s)
@@ -415,8 +570,8 @@ class HTTPTransport:
         if config.dumpSOAPIn:
             s = 'Incoming SOAP'
             debugHeader(s)
-            print(data, end=' ')
-            if (len(data)>0) and (data[-1] != '\n'):
+            print(data.decode('utf-8', 'replace'), end=' ')
+            if (len(data)>0) and (data[-1:] != b'\n'):
                 print()
             debugFooter(s)
 
@@ -433,15 +588,138 @@ class HTTPTransport:
         # return response payload
         return data, new_ns
 
+    def _prepare(self, addr, data, soapaction, encoding, http_proxy, config):
+        """Return (addr, data, real_addr, real_path, headers) for a call."""
+
+        if not isinstance(addr, SOAPAddress):
+            addr = SOAPAddress(addr, config)
+
+        if isinstance(data, str):
+            data = data.encode(encoding or 'UTF-8')
+        elif not isinstance(data, bytes) and \
+                 (config.dumpSOAPOut or addr.proto == 'httpg'):
+            data = b''.join([isinstance(x, str) and
+                             x.encode(encoding or 'UTF-8') or x
+                             for x in data])
+
+        # Build a request
+        if http_proxy:
+            real_addr = http_proxy
+            real_path = addr.proto + "://" + addr.host + addr.path
+        else:
+            real_addr = addr.host
+            real_path = addr.path
+
+        headers = self._requestHeaders(addr, data, soapaction, encoding)
+        self._dumpRequest(real_path, headers, data, encoding, config)
+
+        return addr, data, real_addr, real_path, headers
+
+    def call(self, addr, data, namespace, soapaction = None, encoding = None,
+        http_proxy = None, config = Config, timeout=None):
+
+        addr, data, real_addr, real_path, headers = self._prepare(addr,
+            data, soapaction, encoding, http_proxy, config)
+
+        if addr.proto == 'httpg':
+            code, msg, headers, data = self.__gsirequest(real_addr,
+                real_path, headers, data, config)
+        else:
+            code, msg, headers, data = self.__request(addr, real_addr,
+                real_path, headers, data, config, timeout)
+
+        return self._handleReply(code, msg, headers, data, namespace, config)
+
+    def stream(self, addr, data, namespace, soapaction = None,
+        encoding = None, http_proxy = None, config = Config, timeout=None):
+        """Like call(), but return an iterator over the chunks of a
+        successful response body as they are received.
+
+        The namespace is returned unchanged, as the body has not been
+        seen yet.  Error replies, and all replies when the incoming SOAP
+        is to be dumped, are read in full and returned as call() would."""
+
+        if config.debug or config.dumpSOAPIn:
+            return self.call(addr, data, namespace, soapaction, encoding,
+                             http_proxy, config, timeout)
+
+        addr, data, real_addr, real_path, headers = self._prepare(addr,
+            data, soapaction, encoding, http_proxy, config)
+
+        if addr.proto == 'httpg':
+            code, msg, headers, data = self.__gsirequest(real_addr,
+                real_path, headers, data, config)
+            return self._handleReply(code, msg, headers, data, namespace,
+                                     config)
+
+        code, msg, headers, body = self.__request(addr, real_addr,
+            real_path, headers, data, config, timeout, stream = 1)
+
+        if code != 200:
+            return self._handleReply(code, msg, headers, b''.join(body),
+                                     namespace, config)
+
+        self._handleReply(code, msg, headers, b'', None, config)
+        return body, namespace
+
+    def forward(self, addr, data, headers, config = Config, timeout = None):
+        """Post data as it is, with the given (name, value) headers, over
+        a pooled connection and return (code, msg, headers, data) of the
+        reply whatever its status.  Host and Content-length are set here."""
+
+        if not isinstance(addr, SOAPAddress):
+            addr = SOAPAddress(addr, config)
+
+        headers = [("Host", addr.host),
+                   ("Content-length", str(len(data)))] + list(headers)
+        return self.__request(addr, addr.host, addr.path, headers, data,
+                              config, timeout)
+
 ################################################################################
 # SOAP Proxy
 ################################################################################
+class PreparedMethod:
+    """Method call prepared by SOAPProxy.prepare()."""
+
+    def __init__(self, proxy, call, name, signature):
+        self.proxy = proxy
+        self.call = call
+        self.name = name
+
+        self.ns, self.sa, hd, ma = proxy._directives(name)
+        self.template = SOAPTemplate(signature, method = name,
+            namespace = self.ns, header = hd, methodattrs = ma,
+            encoding = proxy.encoding, config = proxy.config,
+            noroot = proxy.noroot)
+        self.names = self.template.names
+
+    def __call__(self, *args, **kw):
+        names = self.names
+        if len(args) + len(kw) != len(names) or len(args) > len(names):
+            return self.call(self.name, args, kw)
+
+        values = list(args)
+        for name in names[len(args):]:
+            if name not in kw:
+                return self.call(self.name, args, kw)
+            values.append(kw[name])
+
+        m = self.template.build(values)
+        if m is None:
+            # the types don't match the template
+            return self.call(self.name, (), dict(zip(names, values)))
+        return self.proxy._send(m, self.ns, self.sa)
+
+    def __repr__(self):
+        return "<%s %s at %d>" % (self.__class__, self.name, id(self))
+
+
 class SOAPProxy:
     def __init__(self, proxy, namespace = None, soapaction = None,
                  header = None, methodattrs = None, transport = HTTPTransport,
                  encoding = 'UTF-8', throw_faults = 1, unwrap_results = None,
                  http_proxy=None, config = Config, noroot = 0,
-                 simplify_objects=None, timeout=None):
+                 simplify_objects=None, timeout=None, iterate_results=0):
 
         # Test the encoding, raising an exception if it's not known
         if encoding != None:
@@ -471,6 +749,7 @@ class SOAPProxy:
         self.config         = config
         self.noroot         = noroot
         self.timeout        = timeout
+        self.iterate_results = iterate_results
 
         # GSI Additions
         if hasattr(config, "channel_mode") and \
@@ -481,10 +760,80 @@ class SOAPProxy:
         
     def invoke(self, method, args):
         return self.__call(method, args, {})
+
+    def prepare(self, method, signature):
+        """Return a callable for method whose request message is compiled
+        once, for arguments of the types in signature.
+
+        signature is a sequence of (name, type) pairs, type being int,
+        float, str or bool; arguments are sent by name in that order.
+        The proxy's namespace, soapaction, header and method attributes
+        are those at the time of the call to prepare().  Calls whose
+        arguments are of other types go through the usual path."""
+        return PreparedMethod(self, self.__call, method, signature)
         
     def __call(self, name, args, kw, ns = None, sa = None, hd = None,
         ma = None):
 
+        chunked = self.config.http_chunked_requests
+        m, ns, sa = self._buildRequest(name, args, kw, ns, sa, hd, ma,
+                                       chunked)
+
+        rebuild = None
+        if chunked:
+            # the request is consumed by a failed attempt
+            rebuild = lambda: self._buildRequest(name, args, kw, ns, sa, hd,
+                                                 ma, chunked)[0]
+
+        return self._send(m, ns, sa, rebuild)
+
+    def _send(self, m, ns, sa, rebuild = None):
+        """Send a serialized request and handle the response.  rebuild
+        returns the request again if it is to be retried."""
+
+        # With iterate_results, hand out the items of an array result
+        # while the response is still coming in
+        iterate = self.iterate_results and hasattr(self.transport, 'stream')
+        if iterate:
+            send = self.transport.stream
+        else:
+            send = self.transport.call
+
+        call_retry = 0
+        try:
+            r, self.namespace = send(self.proxy, m, ns, sa,
+                                     encoding = self.encoding,
+                                     http_proxy = self.http_proxy,
+                                     config = self.config,
+                                     timeout = self.timeout)
+
+        except socket.timeout:
+            raise SOAPTimeoutError
+
+        except Exception as ex:
+            call_retry = self._callFailed(ex)
+
+        if call_retry:
+            if rebuild is not None:
+                m = rebuild()
+            try:
+                r, self.namespace = send(self.proxy, m, ns, sa,
+                                         encoding = self.encoding,
+                                         http_proxy = self.http_proxy,
+                                         config = self.config,
+                                         timeout = self.timeout)
+            except socket.timeout:
+                raise SOAPTimeoutError
+
+        if iterate:
+            return self._iterResponse(r)
+        return self._handleResponse(r)
+
+    def _directives(self, name, ns = None, sa = None, hd = None, ma = None):
+        """Resolve the per-call directives against the proxy's defaults.
+
+        Returns a tuple of (namespace, soapaction, header, methodattrs)."""
+
         ns = ns or self.namespace
         ma = ma or self.methodattrs
 
@@ -511,58 +860,88 @@ class SOAPProxy:
             ma = self.methodattrs
         ma = ma or self.methodattrs
 
-        m = buildSOAP(args = args, kw = kw, method = name, namespace = ns,
-            header = hd, methodattrs = ma, encoding = self.encoding,
-            config = self.config, noroot = self.noroot)
+        return ns, sa, hd, ma
 
+    def _buildRequest(self, name, args, kw, ns = None, sa = None, hd = None,
+        ma = None, chunked = 0):
+        """Resolve the per-call directives and serialize the request.
 
-        call_retry = 0
-        try:
-            r, self.namespace = self.transport.call(self.proxy, m, ns, sa,
-                                                    encoding = self.encoding,
-                                                    http_proxy = self.http_proxy,
-                                                    config = self.config,
-                                                    timeout = self.timeout)
+        Returns a tuple of (message, namespace, soapaction).  With chunked
+        set, the message is an iterator serializing it as it is sent."""
 
+        ns, sa, hd, ma = self._directives(name, ns, sa, hd, ma)
+
+        if chunked and self.config.http_chunk_size:
+            m = iterbuildSOAP(args = args, kw = kw, method = name,
+                namespace = ns, header = hd, methodattrs = ma,
+                encoding = self.encoding, config = self.config,
+                noroot = self.noroot,
+                chunk_size = self.config.http_chunk_size)
+        else:
+            m = buildSOAP(args = args, kw = kw, method = name,
+                namespace = ns, header = hd, methodattrs = ma,
+                encoding = self.encoding, config = self.config,
+                noroot = self.noroot)
+
+        return m, ns, sa
+
+    def _callFailed(self, ex):
+        #
+        # Call failed.
+        #
+        # See if we have a fault handling vector installed in our
+        # config. If we do, invoke it. If it returns a true value,
+        # retry the call. 
+        #
+        # In any circumstance other than the fault handler returning
+        # true, reraise the exception. This keeps the semantics of this
+        # code the same as without the faultHandler code.
+        #
+
+        if hasattr(self.config, "faultHandler"):
+            if callable(self.config.faultHandler):
+                call_retry = self.config.faultHandler(self.proxy, ex)
+                if not call_retry:
+                    raise ex
+                return call_retry
+        raise ex
+
+    def _handleResponse(self, r):
+        """Parse the response payload, raising faults and unwrapping or
+        simplifying the result as configured."""
+
+        p, attrs = parseSOAPRPC(r, attrs = 1, native = self.simplify_objects,
+                                numeric_arrays = self.config.numeric_arrays,
+                                backend = self.config.parser_backend,
+                                datetime_objects =
+                                    self.config.datetime_objects,
+                                lazy = self.config.lazy_values,
+                                config = self.config)
+        return self._handleResult(p, attrs)
+
+    def _iterResponse(self, r):
+        """Yield the items of the array returned in the response payload
+        as they are parsed.  A result that is not an array is yielded
+        once, handled as by _handleResponse()."""
+
+        parser = SOAPIterParser(native = self.simplify_objects,
+                                numeric_arrays = self.config.numeric_arrays,
+                                datetime_objects =
+                                    self.config.datetime_objects,
+                                config = self.config)
+        try:
+            for p in parser.iterparse(r,
+                                      backend = self.config.parser_backend):
+                if not parser.streamed:
+                    p = self._handleResult(p, parser.attrs)
+                yield p
         except socket.timeout:
             raise SOAPTimeoutError
+        finally:
+            if hasattr(r, 'close'):
+                r.close()
 
-        except Exception as ex:
-            #
-            # Call failed.
-            #
-            # See if we have a fault handling vector installed in our
-            # config. If we do, invoke it. If it returns a true value,
-            # retry the call. 
-            #
-            # In any circumstance other than the fault handler returning
-            # true, reraise the exception. This keeps the semantics of this
-            # code the same as without the faultHandler code.
-            #
-
-            if hasattr(self.config, "faultHandler"):
-                if isinstance(self.config.faultHandler, collections.Callable):
-                    call_retry = self.config.faultHandler(self.proxy, ex)
-                    if not call_retry:
-                        raise
-                else:
-                    raise
-            else:
-                raise
-
-        if call_retry:
-            try:
-                r, self.namespace = self.transport.call(self.proxy, m, ns, sa,
-                                                        encoding = self.encoding,
-                                                        http_proxy = self.http_proxy,
-                                                        config = self.config,
-                                                        timeout = self.timeout)
-            except socket.timeout:
-                raise SOAPTimeoutError
-            
-
-        p, attrs = parseSOAPRPC(r, attrs = 1)
-
+    def _handleResult(self, p, attrs):
         try:
             throw_struct = self.throw_faults and \
                 isinstance (p, faultType)
@@ -582,7 +961,11 @@ class SOAPProxy:
         if self.unwrap_results:
             try:
                 count = 0
-                for i in list(p.__dict__.keys()):
+                names = list(p.__dict__.keys())
+                if isinstance(p, lazyStructType):
+                    # the values not read yet aren't in its __dict__
+                    names += list(p._lazy or ())
+                for i in names:
                     if i[0] != "_":  # don't count the private stuff
                         count += 1
                         t = getattr(p, i)
@@ -593,9 +976,10 @@ class SOAPProxy:
 
         # Automatically simplfy SOAP complex types into the
         # corresponding python types. (structType --> dict,
-        # arrayType --> array, etc.)
+        # arrayType --> array, etc.) The contents were parsed that way
+        # already.
         if self.simplify_objects:
-            p = simplify(p)
+            p = simplify(p, deep = 0)
 
         if self.config.returnAllAttrs:
             return p, attrs
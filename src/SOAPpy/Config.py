@@ -106,8 +106,30 @@ class SOAPConfig:
             # - arrayType    --> array
             # - compoundType --> dictionary
             #
+            # SOAPProxy and the SOAP servers parse messages straight into
+            # these types when this is set.
             self.simplify_objects = 0
 
+            # Parse one-dimensional arrays of numbers and booleans into
+            # array.array objects, converting all of their items at once.
+            # If set to 'numpy' and NumPy is available, into NumPy arrays.
+            self.numeric_arrays = 0
+
+            # Parse dateTime, date and time values into datetime objects,
+            # normalized to UTC if they have a timezone, rather than into
+            # tuples.  Values datetime can't hold are still tuples.
+            self.datetime_objects = 0
+
+            # Keep the simple values of parsed structs and arrays as text
+            # until they are first read, for services that only look at
+            # a few of them.  Conversion errors are raised by the read.
+            self.lazy_values = 0
+
+            # How messages are parsed: 'sax' through xml.sax, or 'expat'
+            # by feeding pyexpat callbacks straight to the parser, which
+            # is faster.  Both reject the same DTDs and entities.
+            self.parser_backend = 'sax'
+
             # Per-class authorization method.  If this is set, before
             # calling a any class method, the specified authorization
             # method will be called.  If it returns 1, the method call
@@ -122,6 +144,30 @@ class SOAPConfig:
             # (including self; possibility to call any SOAPBuilder dump method)
             self.dumpmap = tuple()
 
+            # HTTP/1.1 keep-alive connection pool used by HTTPTransport.
+            # http_pool_size is the number of idle connections kept per
+            # host (0 disables reuse and closes the socket after every
+            # call); idle connections older than http_pool_idle_timeout
+            # seconds are discarded instead of being reused.
+            self.http_pool_size = 8
+            self.http_pool_idle_timeout = 60
+
+            # HTTP/1.1 persistent connections accepted by the SOAP servers.
+            # A connection is closed once it has been idle for
+            # http_keepalive_timeout seconds (None waits forever) or has
+            # carried http_keepalive_max_requests requests (0 means no
+            # limit, 1 turns keep-alive off).
+            self.http_keepalive_timeout = 15
+            self.http_keepalive_max_requests = 100
+
+            # Chunked transfer-encoding. The SOAP servers send responses
+            # larger than http_chunk_size bytes in chunks while they are
+            # serialized (0 turns this off). SOAPProxy does the same for
+            # requests only with http_chunked_requests set, as not every
+            # server accepts chunked requests.
+            self.http_chunk_size = 65536
+            self.http_chunked_requests = 0
+
             # Globus Support if pyGlobus.io available
             try:
                 from pyGlobus import io;
@@ -7,16 +7,26 @@ from .Utilities import *
 import six
 
 import string
+import threading
 import xml.sax
+from xml.parsers import expat
 from wstools.XMLname import fromXMLname
 import collections
+import array
+import io
+import datetime
+import binascii
 from six import BytesIO
 
 try: from M2Crypto import SSL
 except: pass
 
+try: import numpy
+except ImportError: numpy = None
+
 from defusedxml import expatreader
-from defusedxml.common import DefusedXmlException
+from defusedxml.common import DefusedXmlException, DTDForbidden, \
+     EntitiesForbidden, ExternalReferenceForbidden
 
 
 ident = '$Id: Parser.py 1497 2010-03-08 06:06:52Z pooryorick $'
@@ -44,8 +54,71 @@ class RefHolder:
     def __str__(self):
         return "<%s %s at %d>" % (self.__class__, self.name, id(self))
 
+class PlainParent:
+    """The dict or list holding a RefHolder, when parsing to plain Python
+    objects; places the referenced value once it is known."""
+    def __init__(self, data):
+        self.data = data
+
+    def _placeItem(self, name, value, pos, subpos = 0, attrs = None):
+        if type(self.data) == list:
+            self.data[pos] = value
+        elif subpos == 0 and type(self.data[name]) != list:
+            self.data[name] = value
+        else:
+            self.data[name][subpos] = value
+
+# the containers that keep LazyValues as they are
+_lazytypes = (lazyStructType, lazyArrayType, lazyTypedArrayType)
+
+def _values(contents):
+    """contents with its LazyValues converted, for the containers that
+    can't hold them."""
+    return [v.value() if v.__class__ is LazyValue else v for v in contents]
+
+def _selectTree(paths):
+    """The element paths of parseSOAPRPC(select=...), like 'm/Result/a',
+    as a tree of dicts mapping the name of each element to keep to what
+    to keep of its children, None for all of them."""
+    tree = {}
+    for path in paths:
+        steps = [step for step in path.split('/') if step]
+        node = tree
+        for step in steps[:-1]:
+            if step in node and node[step] is None:
+                break
+            node = node.setdefault(step, {})
+        else:
+            if steps:
+                node[steps[-1]] = None
+    return tree
+
+def _mergeSelect(a, b):
+    # what a and b, trees from _selectTree(), keep together
+    if a is None or b is None:
+        return None
+    merged = dict(a)
+    for name, node in b.items():
+        if name in merged:
+            node = _mergeSelect(merged[name], node)
+        merged[name] = node
+    return merged
+
+class _Reparse(Exception):
+    """Raised when a message parsed with select has an href to an element
+    that was skipped, or built without what the href needs of it."""
+
 class SOAPParser(xml.sax.handler.ContentHandler):
     class Frame:
+        # For an array whose items are collected as text and converted all
+        # at once, the type of the items
+        bulk = None
+
+        # With select, what to keep of the children, None for all of them
+        # (see _selectTree()), and whether any of them were skipped
+        select = None
+        pruned = 0
+
         def __init__(self, name, kind = None, attrs = {}, rules = {}):
             self.name = name
             self.kind = kind
@@ -79,8 +152,23 @@ class SOAPParser(xml.sax.handler.ContentHandler):
         def __repr__(self):
             return "<%s %s at %d>" % (self.__class__, self.name, id(self))
 
-    def __init__(self, rules = None):
+    # the parser lazy values are converted with, see reset()
+    _converter = None
+
+    def __init__(self, rules = None, native = 0, numeric_arrays = 0,
+                 datetime_objects = 0, lazy = 0, select = None,
+                 config = Config):
         xml.sax.handler.ContentHandler.__init__(self)
+        self.reset(rules, native, numeric_arrays, datetime_objects, lazy,
+                   select, config)
+
+    def reset(self, rules = None, native = 0, numeric_arrays = 0,
+              datetime_objects = 0, lazy = 0, select = None,
+              config = Config):
+        """Get ready for another message, dropping all that is left of
+        the last one, even if parsing it failed halfway.  The results
+        of the last message (body, header, attrs) are replaced rather
+        than cleared, so what has been handed out stays intact."""
         self.body       = None
         self.header     = None
         self.attrs      = {}
@@ -96,7 +184,72 @@ class SOAPParser(xml.sax.handler.ContentHandler):
         self._refs      = {}
         self._rules    = rules
 
+        # the SOAPConfig whose strict_range values are converted with
+        self._config    = config
+
+        # With native set, everything inside the body entries but faults
+        # is built as plain dicts, lists and scalars, just as simplify()
+        # would convert it, instead of as structType and arrayType
+        self._native    = native
+        self._plain     = 0
+
+        # With numeric_arrays set, one-dimensional arrays of the numeric
+        # and boolean types in bulktypes become array.array objects, or
+        # NumPy arrays if it is 'numpy' and NumPy is available
+        self._numeric   = numeric_arrays
+
+        # With datetime_objects set, dateTime, date and time values are
+        # returned as datetime objects rather than tuples where they can
+        # be; see convertDateTime()
+        self._datetimes = datetime_objects
+
+        # With lazy set, the simple values inside the body entries are
+        # kept as text by lazyStructType and lazyArrayType containers and
+        # converted when first read, by a parser that isn't reset for the
+        # next message like this one is
+        self._lazy      = lazy
+        if lazy and (self._converter is None or
+                     self._converter._datetimes != datetime_objects or
+                     self._converter._config is not config):
+            self._converter = self.__class__(
+                datetime_objects = datetime_objects, config = config)
+
+        # With select, a list of element paths from the body entries
+        # down, only the elements on them, the elements inside those and
+        # the multirefs these refer to are built; see selectElement()
+        self._select    = None
+        self._skip      = 0     # the depth inside a skipped element
+        if select is not None:
+            self._select  = _selectTree(select)
+            self._wanted  = {}  # what hrefs keep of the ids not seen yet
+            self._built   = {}  # what was kept of the ids seen
+            self._skipped = set()
+
     def startElementNS(self, name, qname, attrs):
+        self._startElement(name, attrs._attrs)
+
+    def endElementNS(self, name, qname):
+        self._endElement(name)
+
+    # The element handlers proper, with attrs a dict from (URI, name)
+    # pairs to values; ExpatReader calls them directly
+
+    def _startElement(self, name, attrs):
+        if self._skip:
+            self._skip += 1
+            idval = attrs.get((None, 'id'))
+            if idval is not None:
+                if idval in self._wanted:
+                    raise _Reparse(idval)
+                self._skipped.add(idval)
+            return
+
+        if self._stack[-1].bulk is not None and \
+           (NS.ENC, 'arrayType') not in attrs:
+            # an item of a numeric array; see _endElement()
+            self.pushFrame(self.Frame(name[1], None, attrs, None))
+            self._data = []
+            return
 
         def toStr( name ):
             prefix = name[0]
@@ -140,6 +293,18 @@ class SOAPParser(xml.sax.handler.ContentHandler):
             raise Error("expected nothing, " \
                   "got `%s'" % toStr( name ))
 
+        select = None
+        if self._stack[-1].select is not None:
+            keep, select = self.selectElement(name, attrs,
+                                              self._stack[-1].select)
+            if not keep:
+                self._skip = 1
+                self._stack[-1].pruned = 1
+                self._data = None
+                return
+        elif self._select is not None and len(self._stack) == 2 and \
+             name == (NS.ENV, 'Body'):
+            select = self._select
 
         if len(self._stack) == 2:
             rules = self._rules
@@ -155,7 +320,7 @@ class SOAPParser(xml.sax.handler.ContentHandler):
             kind = attrs.get((NS.ENC, 'arrayType'))
 
             if kind != None:
-                del attrs._attrs[(NS.ENC, 'arrayType')]
+                del attrs[(NS.ENC, 'arrayType')]
 
                 i = kind.find(':')
                 if i >= 0:
@@ -166,17 +331,78 @@ class SOAPParser(xml.sax.handler.ContentHandler):
                 else:
                     kind = None
 
-        self.pushFrame(self.Frame(name[1], kind, attrs._attrs, rules))
+        if len(self._stack) == 3:
+            self._plain = self._native and self._stack[2].name == 'Body' \
+                and name != (NS.ENV, 'Fault')
+
+        frame = self.Frame(name[1], kind, attrs, rules)
+        if select is not None:
+            frame.select = select
+        elif self._numeric and kind is not None and rules is None:
+            frame.bulk = self.bulkType(kind, attrs)
+
+        self.pushFrame(frame)
 
         self._data = [] # Start accumulating
 
+    def selectElement(self, name, attrs, parent):
+        """Return whether to build the element starting, whose parent
+        keeps the children parent (a tree from _selectTree()), and what
+        to keep of its own children.  An element with an id is built if
+        an href kept already refers to it, keeping what that needs.  One
+        directly in the Body is built in full otherwise, as an href
+        further on may still refer to it; SOAPpy and others put every
+        shared value there."""
+        keep = name[1] in parent
+        select = parent.get(name[1])
+
+        idval = attrs.get((None, 'id'))
+        if idval is not None:
+            if idval in self._wanted:
+                wanted = self._wanted.pop(idval)
+                if keep:
+                    select = _mergeSelect(select, wanted)
+                else:
+                    keep, select = 1, wanted
+            elif not keep and len(self._stack) == 3:
+                keep, select = 1, None
+            if keep:
+                self._built[idval] = select
+            else:
+                self._skipped.add(idval)
+
+        if not keep and len(self._stack) == 3 and name == (NS.ENV, 'Fault'):
+            return 1, None
+        return keep, select
+
+    def selectRef(self, href, select):
+        """Note that an href kept refers to the element with id href,
+        keeping select of it; raise _Reparse if that element was skipped
+        or built with less already."""
+        if href in self._skipped:
+            raise _Reparse(href)
+        if href in self._built:
+            if self._built[href] is not None and self._built[href] != select:
+                raise _Reparse(href)
+        elif href in self._wanted:
+            self._wanted[href] = _mergeSelect(self._wanted[href], select)
+        elif href not in self._ids:
+            self._wanted[href] = select
+
     def pushFrame(self, frame):
         self._stack.append(frame)
 
     def popFrame(self):
         return self._stack.pop()
 
-    def endElementNS(self, name, qname):
+    def _endElement(self, name):
+        if self._skip:
+            self._skip -= 1
+            return
+
+        if self._stack[-2].bulk is not None and self.bulkItem(name):
+            return
+
         # Workaround two sax bugs
         if name[0] == None and name[1][0] == ' ':
             ns, name = None, name[1][1:]
@@ -221,17 +447,23 @@ class SOAPParser(xml.sax.handler.ContentHandler):
 
                 del attrs[(NS.ENC, 'root')]
 
+        # the first body entry, the RPC result, stays an object
+        plain = self._plain and \
+            (len(self._stack) > 3 or not root or len(self._stack[-1]))
+
         while 1:
             href = attrs.get((None, 'href'))
             if href:
                 if href[0] != '#':
                     raise Error("Non-local hrefs are not yet suppported.")
-                if self._data != None and \
-                   string.join(self._data, "").strip() != '':
+                if not self._blank():
                     raise Error("hrefs can't have data")
 
                 href = href[1:]
 
+                if self._select is not None:
+                    self.selectRef(href, cur.select)
+
                 if href in self._ids:
                     data = self._ids[href]
                 else:
@@ -289,14 +521,11 @@ class SOAPParser(xml.sax.handler.ContentHandler):
                 # check for nil=1, but watch out for string values
                 try:
                     null = int(null)
-                except ValueError as e:
-                    if not e[0].startswith("invalid literal for int()"):
-                        raise e
+                except ValueError:
                     null = 0
 
                 if null:
-                    if len(cur) or \
-                        (self._data != None and ''.join(self._data).strip() != ''):
+                    if len(cur) or not self._blank():
                         raise Error("nils can't have data")
 
                     data = None
@@ -340,15 +569,21 @@ class SOAPParser(xml.sax.handler.ContentHandler):
 
 # XXX What if rule != kind?
                 if isinstance(rule, collections.Callable):
-                    data = rule(string.join(self._data, ""))
+                    data = rule(self._text())
                 elif type(rule) == DictType:
-                    data = structType(name = (ns, name), attrs = attrs)
+                    if plain:
+                        data = self.plainStruct(cur)
+                    elif self._lazy:
+                        data = lazyStructType(name = (ns, name),
+                                              attrs = attrs)
+                    else:
+                        data = structType(name = (ns, name), attrs = attrs)
                 elif rule[1][:9] == 'arrayType':
-                    data = self.convertType(cur.contents,
-                                            rule, attrs)
+                    data = self.convertType(_values(cur.contents),
+                                            rule, attrs, self._config)
                 else:
-                    data = self.convertType(string.join(self._data, ""),
-                                            rule, attrs)
+                    data = self.convertType(self._text(), rule, attrs,
+                                            self._config)
 
                 break
 
@@ -363,22 +598,34 @@ class SOAPParser(xml.sax.handler.ContentHandler):
                 else:
                     kind = kind[1]
 
+                if cur.bulk is not None:
+                    data = self.bulkArray(cur)
+                    if data is not None:
+                        break
+
                 if len(cur.namecounts) == 1:
                     elemsname = cur.names[0]
                 else:
                     elemsname = None
 
-                data = self.startArray((ns, name), kind, attrs, elemsname)
+                if plain:
+                    data = self.plainArray(cur, (ns, name), kind, attrs,
+                                           elemsname)
+                else:
+                    data = self.startArray((ns, name), kind, attrs,
+                                           elemsname)
 
                 break
 
             if len(self._stack) == 3 and kind == None and \
-                len(cur) == 0 and \
-                (self._data is None or "".join(self._data).strip() == ''):
-                data = structType(name=(ns, name), attrs=attrs)
+                len(cur) == 0 and self._blank():
+                if plain:
+                    data = {}
+                else:
+                    data = structType(name=(ns, name), attrs=attrs)
                 break
 
-            if len(cur) == 0 and ns != NS.URN:
+            if len(cur) == 0 and ns != NS.URN and not cur.pruned:
                 # Nothing's been added to the current frame so it must be a
                 # simple type.
 
@@ -403,19 +650,26 @@ class SOAPParser(xml.sax.handler.ContentHandler):
                         kind = (ns, name)
 
                 if kind is not None:
+                    # a value of a struct or array, kept as text when
+                    # parsing lazily; those referred to are converted
+                    if self._lazy and idval is None and not self._plain \
+                       and len(self._stack) > 3:
+                        convert = self.converters.get(kind)
+                        if convert is not None:
+                            data = LazyValue(convert, self._converter,
+                                             self._text(), attrs)
+                            break
+
                     try:
-                        data = self.convertType("".join(self._data),
-                                                kind, attrs)
+                        data = self.convertType(self._text(), kind, attrs,
+                                                self._config)
                     except UnknownTypeError:
                         data = None
                 else:
                     data = None
 
                 if data is None:
-                    if self._data is None:
-                        data = ''
-                    else:
-                        data = "".join(self._data)
+                    data = self._text()
 
                     if len(attrs) == 0:
                         try:
@@ -425,13 +679,22 @@ class SOAPParser(xml.sax.handler.ContentHandler):
 
                 break
 
-            data = structType(name=(ns, name), attrs=attrs)
+            if plain:
+                data = self.plainStruct(cur)
+            elif self._lazy:
+                data = lazyStructType(name=(ns, name), attrs=attrs)
+            else:
+                data = structType(name=(ns, name), attrs=attrs)
 
             break
 
         if isinstance(data, compoundType):
+            contents = cur.contents
+            if self._lazy and not isinstance(data, _lazytypes):
+                contents = _values(contents)
+
             for i in range(len(cur)):
-                v = cur.contents[i]
+                v = contents[i]
                 data._addItem(cur.names[i], v, cur.subattrs[i])
 
                 if isinstance(v, RefHolder):
@@ -449,7 +712,9 @@ class SOAPParser(xml.sax.handler.ContentHandler):
 
                 del self._refs[idval]
 
-        self.attrs[id(data)] = attrs
+        # LazyValues are replaced once read, so their ids would go stale
+        if data.__class__ is not LazyValue:
+            self.attrs[id(data)] = attrs
 
         if isinstance(data, anyType):
             data._setAttrs(attrs)
@@ -473,9 +738,219 @@ class SOAPParser(xml.sax.handler.ContentHandler):
         except:
             pass
 
+    # The character data of an element is collected as a list of the
+    # pieces it comes in.  Once there are more than max_pieces of them,
+    # they are moved into a single growing _TextBuffer in its first place,
+    # so large text (multi-MB base64) isn't held as many small strings.
+    max_pieces = 64
+
     def characters(self, c):
-        if self._data is not None:
-            self._data.append(c)
+        data = self._data
+        if data is not None:
+            data.append(c)
+            if len(data) > self.max_pieces:
+                if data[0].__class__ is _TextBuffer:
+                    buf = data[0]
+                    del data[0]
+                else:
+                    buf = _TextBuffer()
+                buf.add(data)
+                data[:] = [buf]
+
+    def _text(self):
+        # the character data of the element, joined once and kept
+        data = self._data
+        if not data:
+            return ''
+        if len(data) == 1 and data[0].__class__ is str:
+            return data[0]
+        if data[0].__class__ is _TextBuffer:
+            buf = data[0]
+            buf.add(data[1:])
+            text = buf.getvalue()
+        else:
+            text = ''.join(data)
+        data[:] = [text]
+        return text
+
+    def _blank(self):
+        # whether the character data of the element is only whitespace,
+        # without joining it
+        data = self._data
+        if not data:
+            return 1
+        if data[0].__class__ is _TextBuffer:
+            if not data[0].blank:
+                return 0
+            data = data[1:]
+        for s in data:
+            if s and not s.isspace():
+                return 0
+        return 1
+
+    def plainStruct(self, cur):
+        """Return the items of frame cur as a dict, as simplify() would
+        convert the structType built from them."""
+        if len(cur.namecounts) == len(cur.names):
+            data = dict(zip(cur.names, cur.contents))
+        else:
+            data = {}
+            for name, v in zip(cur.names, cur.contents):
+                if name in data:
+                    if type(data[name]) != list:
+                        data[name] = [data[name]]
+                    data[name].append(v)
+                else:
+                    data[name] = v
+
+        self.adoptRefs(cur, PlainParent(data))
+        return data
+
+    def plainArray(self, cur, name, kind, attrs, elemsname):
+        """Return the items of frame cur as a list, as simplify() would
+        convert the arrayType built from them."""
+        if isinstance(self.arrayre, str):
+            self.arrayre = re.compile(self.arrayre)
+
+        m = self.arrayre.search(kind)
+
+        # sparse, offset, multi-dimensional and invalid arrays are left
+        # to arrayType
+        if m is None or (NS.ENC, "offset") in attrs or \
+           ',' in (m.group('asize') or '') or \
+           (m.group('ns') is not None and m.group('ns') not in self._prem) or \
+           [a for a in cur.subattrs if a and (NS.ENC, 'position') in a]:
+            a = self.startArray(name, kind, attrs, elemsname)
+            for i in range(len(cur)):
+                a._addItem(cur.names[i], cur.contents[i], cur.subattrs[i])
+            self.adoptRefs(cur, a)
+            return a._aslist()
+
+        data = list(cur.contents)
+        size = int(m.group('asize') or 0)
+        if size > len(data):
+            data.extend([None] * (size - len(data)))
+
+        self.adoptRefs(cur, PlainParent(data))
+        return data
+
+    def adoptRefs(self, cur, parent):
+        # unresolved references among the items of cur now live in parent
+        if self._refs:
+            for v in cur.contents:
+                if isinstance(v, RefHolder):
+                    v.parent = parent
+
+    # Bulk conversion of numeric arrays: the array.array type code for each
+    # type, and the item types accepted in an array of each type
+    bulktypes = {
+        'byte': 'b', 'short': 'h', 'int': 'i', 'long': 'q',
+        'unsignedByte': 'B', 'unsignedShort': 'H', 'unsignedInt': 'I',
+        'unsignedLong': 'Q', 'float': 'd', 'double': 'd', 'boolean': 'B',
+        'bool': 'B',
+    }
+    bulkgroups = dict([(t, 'integer') for t in bulktypes] +
+                      [('integer', 'integer'), ('float', 'float'),
+                       ('double', 'float'), ('boolean', 'boolean'),
+                       ('bool', 'boolean')])
+    booleans = {'0': False, 'false': False, '1': True, 'true': True}
+
+    def bulkType(self, kind, attrs):
+        """Return the item type of an array to convert in bulk, or None."""
+        if kind[0] not in NS.EXSD_L or (NS.ENC, 'offset') in attrs:
+            return None
+        t, _, dims = kind[1].partition('[')
+        if t not in self.bulktypes or ',' in dims or '[' in dims:
+            return None
+        for i in NS.XSI_L:
+            v = attrs.get((i, 'type'))
+            if v is not None:
+                prefix, _, v = v.rpartition(':')
+                if v != 'Array' or self._prem.get(prefix) != NS.ENC:
+                    return None
+        return t
+
+    def bulkItem(self, name):
+        """Add the item just ended to its numeric array as text, if it is
+        a plain one; otherwise have the array converted item by item."""
+        cur = self._stack[-1]
+        frame = self._stack[-2]
+        attrs = cur.attrs
+
+        if attrs:
+            ok = 0
+            if len(attrs) == 1:
+                (ns, a), v = list(attrs.items())[0]
+                if a == 'type' and ns in NS.XSI_L:
+                    prefix, _, v = v.rpartition(':')
+                    ok = self._prem.get(prefix) in NS.EXSD_L and \
+                        self.bulkgroups.get(v) == self.bulkgroups[frame.bulk]
+            if not ok:
+                self.unbulk(frame)
+                return 0
+        if len(cur):
+            self.unbulk(frame)
+            return 0
+
+        self.popFrame()
+        frame.names.append(fromXMLname(name[1]))
+        frame.contents.append(self._text())
+        self._data = None
+        return 1
+
+    def unbulk(self, frame):
+        """Convert the items collected as text so far one by one, and
+        handle the rest of the array the usual way."""
+        t = (frame.kind[0], frame.bulk)
+        frame.contents = [self.convertType(d, t, {}, self._config)
+                          for d in frame.contents]
+        frame.subattrs = [{} for d in frame.contents]
+        for name in frame.names:
+            frame.namecounts[name] = frame.namecounts.get(name, 0) + 1
+        frame.bulk = None
+
+    def bulkArray(self, cur):
+        """Return the items of a numeric array as an array.array (or NumPy
+        array), range checked as convertType() would, or None if it has to
+        be built as a typedArrayType after all."""
+        t = cur.bulk
+        texts = cur.contents
+
+        size = cur.kind[1].partition('[')[2].rstrip(']')
+        if size and int(size) != len(texts):
+            self.unbulk(cur)
+            return None
+
+        group = self.bulkgroups[t]
+        if group == 'integer':
+            values = list(map(int, texts))
+            if values:
+                l = self.intlimits[t]
+                d = min(values)
+                if d < l[1]:
+                    raise UnderflowError("%s too small" % d)
+                d = max(values)
+                if d > l[2]:
+                    raise OverflowError("%s too large" % d)
+        elif group == 'boolean':
+            try:
+                values = list(map(self.booleans.__getitem__,
+                                  map(str.lower, map(str.strip, texts))))
+            except KeyError:
+                raise AttributeError("invalid boolean value")
+        elif self._config.strict_range:
+            values = [self.convertType(d, (cur.kind[0], t), {}, self._config)
+                      for d in texts]
+        else:
+            values = list(map(float, texts))
+
+        data = array.array(self.bulktypes[t], values)
+
+        if self._numeric == 'numpy' and numpy is not None:
+            if group == 'boolean':
+                return numpy.asarray(data, dtype = bool)
+            return numpy.asarray(data)
+        return data
 
     arrayre = '^(?:(?P<ns>[^:]*):)?' \
         '(?P<type>[^[]+)' \
@@ -511,15 +986,20 @@ class SOAPParser(xml.sax.handler.ContentHandler):
 
             t = m.group('type')
 
+            if self._lazy:
+                untyped, typed = lazyArrayType, lazyTypedArrayType
+            else:
+                untyped, typed = arrayType, typedArrayType
+
             if t == 'ur-type':
-                return arrayType(None, name, attrs, offset, m.group('rank'),
+                return untyped(None, name, attrs, offset, m.group('rank'),
                     m.group('asize'), elemsname)
             elif m.group('ns') != None:
-                return typedArrayType(None, name,
+                return typed(None, name,
                     (self._prem[m.group('ns')], t), attrs, offset,
                     m.group('rank'), m.group('asize'), elemsname)
             else:
-                return typedArrayType(None, name, (None, t), attrs, offset,
+                return typed(None, name, (None, t), attrs, offset,
                     m.group('rank'), m.group('asize'), elemsname)
         except:
             raise AttributeError("invalid Array type `%s'" % kind)
@@ -589,7 +1069,28 @@ class SOAPParser(xml.sax.handler.ContentHandler):
 
         months = (31, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
 
-    def convertDateTime(self, value, kind):
+    ISOZONEre = r'(Z|[-+][0-9]{2}:[0-9]{2})?\s*$'
+    ISODATEre = r'\s*([0-9]{4})-([0-9]{2})-([0-9]{2})'
+    ISOTIMEre = r'([0-9]{2}):([0-9]{2}):([0-9]{2}(?:\.[0-9]*)?)'
+
+    def convertDateTime(self, value, kind, objects = 0):
+        """Convert value, of the dateTime-like type kind, to a tuple of
+        its fields, normalized to UTC.  With objects set, dateTime, date
+        and time values become datetime objects instead, timezone aware
+        if value had a timezone; those datetime can't hold, such as leap
+        seconds or years before 1, are still returned as tuples."""
+
+        # Canonical forms, with four digit years and no sign, are read
+        # by a single pattern; everything else goes through DATETIMECONSTS
+        fast = self.isodates.get(kind)
+        if fast is not None:
+            m = fast[0].match(value)
+            if m is not None:
+                try:
+                    return fast[1](m.groups(), objects)
+                except (ValueError, OverflowError):
+                    pass        # reported below
+
         def getZoneOffset(d):
             zoffs = 0
 
@@ -611,19 +1112,19 @@ class SOAPParser(xml.sax.handler.ContentHandler):
             if minfield > 4: date[4] = 0
 
             if date[5] < 0:
-                date[4] += int(date[5]) / 60
+                date[4] += int(date[5]) // 60
                 date[5] %= 60
 
             date[4] += zoffs
 
             if minfield > 3 or 0 <= date[4] < 60: return date
 
-            date[3] += date[4] / 60
+            date[3] += date[4] // 60
             date[4] %= 60
 
             if minfield > 2 or 0 <= date[3] < 24: return date
 
-            date[2] += date[3] / 24
+            date[2] += date[3] // 24
             date[3] %= 24
 
             if minfield > 1:
@@ -830,25 +1331,37 @@ class SOAPParser(xml.sax.handler.ContentHandler):
     zerofloatre = '[1-9]'
 
 
+    # element types of 'arrayType=type[n]' types, by type
+    _arraytypes = {}
+
     def convertType(self, d, t, attrs, config=Config):
+        try:
+            convert = self.converters.get(t)
+        except TypeError:
+            convert = None
+        if convert is not None:
+            return convert(self, d, attrs, config)
+
         if t[0] is None and t[1] is not None:
-            type = t[1].strip()
-            if type[:9] == 'arrayType':
-                index_eq = type.find('=')
-                index_obr = type.find('[')
-                index_cbr = type.find(']')
-                elemtype = type[index_eq+1:index_obr]
-                elemnum  = type[index_obr+1:index_cbr]
-                if elemtype=="ur-type":
-                    return(d)
+            try:
+                elemtype = self._arraytypes[t[1]]
+            except KeyError:
+                type = t[1].strip()
+                if type[:9] == 'arrayType':
+                    elemtype = type[type.find('=') + 1:type.find('[')]
                 else:
-                    newarr = [self.convertToBasicTypes(d=di,
-                                                       t = ( NS.XSD, elemtype),
-                                                       attrs=attrs,
-                                                       config=config) for di in d]
-                    return newarr
-            else:
+                    elemtype = None
+                if len(self._arraytypes) < 1000:
+                    self._arraytypes[t[1]] = elemtype
+
+            if elemtype is None:
                 t = (NS.XSD, t[1])
+            elif elemtype == "ur-type":
+                return(d)
+            else:
+                t = (NS.XSD, elemtype)
+                return [self.convertToBasicTypes(d=di, t = t, attrs=attrs,
+                                                 config=config) for di in d]
 
         return self.convertToBasicTypes(d, t, attrs, config)
 
@@ -858,184 +1371,248 @@ class SOAPParser(xml.sax.handler.ContentHandler):
 
 
     def convertToBasicTypes(self, d, t, attrs, config=Config):
-        dnn = d or ''
-
-        #if Config.debug:
-            #print "convertToBasicTypes:"
-            #print "   requested_type=", t
-            #print "   data=", d
-
-
-#         print "convertToBasicTypes:"
-#         print "   requested_type=", t
-#         print "   data=", d
-#         print "   attrs=", attrs
-#         print "   t[0]=", t[0]
-#         print "   t[1]=", t[1]
+        # see converters, built by _buildConverters() below
+        try:
+            convert = self.converters[t]
+        except (KeyError, TypeError):
+            convert = self.converters.get(tuple(t))
+            if convert is None:
+                raise UnknownTypeError("unknown type `%s'" %
+                                       (str(t[0]) + ':' + t[1]))
 
-#         print "   in?", t[0] in NS.EXSD_L
+        return convert(self, d, attrs, config)
 
-        if t[0] in NS.EXSD_L:
-            if t[1]=="integer": # unbounded integer type
-                try:
-                    d = int(d)
-                    if len(attrs):
-                        d = int(d)
-                except:
-                    d = int(d)
-                return d
-            if t[1] in self.intlimits: # range-bounded integer types
-                l = self.intlimits[t[1]]
-                try: d = int(d)
-                except: d = int(d)
-
-                if l[1] != None and d < l[1]:
-                    raise UnderflowError("%s too small" % d)
-                if l[2] != None and d > l[2]:
-                    raise OverflowError("%s too large" % d)
 
-                if l[0] or len(attrs):
-                    return int(d)
-                return d
-            if t[1] == "string":
-                if len(attrs):
-                    return str(dnn)
-                try:
-                    return str(dnn)
-                except:
-                    return dnn
-            if t[1] in ("bool", "boolean"):
-                d = d.strip().lower()
-                if d in ('0', 'false'):
-                    return False
-                if d in ('1', 'true'):
-                    return True
-                raise AttributeError("invalid boolean value")
-            if t[1] in ('double','float'):
-                l = self.floatlimits[t[1]]
-                s = d.strip().lower()
-
-                # Explicitly check for NaN and Infinities
-                if s == "nan":
-                    d = NaN
-                elif s[0:2]=="inf" or s[0:3]=="+inf":
-                    d = PosInf
-                elif s[0:3] == "-inf":
-                    d = NegInf
-                else :
-                    d = float(s)
-
-                if config.strict_range:
-                    if NaN == d:
-                        if s[0:2] != 'nan':
-                            raise ValueError("invalid %s: %s" % (t[1], s))
-                    elif NegInf == d:
-                        if s[0:3] != '-inf':
-                            raise UnderflowError("%s too small: %s" % (t[1], s))
-                    elif PosInf == d:
-                        if s[0:2] != 'inf' and s[0:3] != '+inf':
-                            raise OverflowError("%s too large: %s" % (t[1], s))
-                    elif d < 0 and d < l[1]:
-                            raise UnderflowError("%s too small: %s" % (t[1], s))
-                    elif d > 0 and ( d < l[0] or d > l[2] ):
-                            raise OverflowError("%s too large: %s" % (t[1], s))
-                    elif d == 0:
-                        if type(self.zerofloatre) == StringType:
-                            self.zerofloatre = re.compile(str(self.zerofloatre))
-
-                        if self.zerofloatre.search(s):
-                            raise UnderflowError("invalid %s: %s" % (t[1], s))
-                return d
-
-            if t[1] in ("dateTime", "date", "timeInstant", "time"):
-                return self.convertDateTime(d, t[1])
-            if t[1] == "decimal":
-                return float(d)
-            if t[1] in ("language", "QName", "NOTATION", "NMTOKEN", "Name",
-                "NCName", "ID", "IDREF", "ENTITY"):
-                return collapseWhiteSpace(d)
-            if t[1] in ("IDREFS", "ENTITIES", "NMTOKENS"):
-                d = collapseWhiteSpace(d)
-                return d.split()
-        if t[0] in NS.XSD_L:
-            if t[1] in ("base64", "base64Binary"):
-                if d:
-                    return base64.decodestring(d)
-                else:
-                    return ''
-            if t[1] == "hexBinary":
-                if d:
-                    return decodeHexString(d)
-                else:
-                    return
-            if t[1] == "anyURI":
-                return urllib.parse.unquote(collapseWhiteSpace(d))
-            if t[1] in ("normalizedString", "token"):
-                return collapseWhiteSpace(d)
-        if t[0] == NS.ENC:
-            if t[1] == "base64":
-                if d:
-                    return base64.decodestring(d)
-                else:
-                    return ''
-        if t[0] == NS.XSD:
-            if t[1] == "binary":
-                try:
-                    e = attrs[(None, 'encoding')]
+################################################################################
+# Conversion of the text of simple values
+################################################################################
+# Converters are called as convert(parser, data, attrs, config)
+
+def _convertInteger(p, d, attrs, config):
+    return int(d)
+
+def _intConverter(lo, hi):
+    # integer types with limits
+    def convert(p, d, attrs, config):
+        d = int(d)
+        if lo is not None and d < lo:
+            raise UnderflowError("%s too small" % d)
+        if hi is not None and d > hi:
+            raise OverflowError("%s too large" % d)
+        return d
+    return convert
+
+def _convertString(p, d, attrs, config):
+    return str(d or '')
+
+def _convertBoolean(p, d, attrs, config):
+    d = d.strip().lower()
+    if d in ('0', 'false'):
+        return False
+    if d in ('1', 'true'):
+        return True
+    raise AttributeError("invalid boolean value")
+
+def _floatConverter(name, l):
+    def convert(p, d, attrs, config):
+        s = d.strip().lower()
+
+        # Explicitly check for NaN and Infinities
+        if s == "nan":
+            d = NaN
+        elif s[0:2]=="inf" or s[0:3]=="+inf":
+            d = PosInf
+        elif s[0:3] == "-inf":
+            d = NegInf
+        else :
+            d = float(s)
+
+        if config.strict_range:
+            if NaN == d:
+                if s[0:2] != 'nan':
+                    raise ValueError("invalid %s: %s" % (name, s))
+            elif NegInf == d:
+                if s[0:3] != '-inf':
+                    raise UnderflowError("%s too small: %s" % (name, s))
+            elif PosInf == d:
+                if s[0:2] != 'inf' and s[0:3] != '+inf':
+                    raise OverflowError("%s too large: %s" % (name, s))
+            elif d < 0 and d < l[1]:
+                    raise UnderflowError("%s too small: %s" % (name, s))
+            elif d > 0 and ( d < l[0] or d > l[2] ):
+                    raise OverflowError("%s too large: %s" % (name, s))
+            elif d == 0:
+                if type(p.zerofloatre) == StringType:
+                    p.zerofloatre = re.compile(str(p.zerofloatre))
+
+                if p.zerofloatre.search(s):
+                    raise UnderflowError("invalid %s: %s" % (name, s))
+        return d
+    return convert
+
+def _dateTimeConverter(name):
+    def convert(p, d, attrs, config):
+        return p.convertDateTime(d, name, p._datetimes)
+    return convert
+
+def _zoneOffset(zone):
+    # what is added to UTC to get the time in zone
+    offset = datetime.timedelta(hours = int(zone[1:3]),
+                                minutes = int(zone[4:6]))
+    if zone[0] == '-':
+        return -offset
+    return offset
+
+def _microseconds(second):
+    return int(second[3:9].ljust(6, '0'))
+
+def _isoDateTime(g, objects):
+    second = float(g[5])
+    if second >= 61:
+        raise ValueError("seconds out of range")
+
+    t = datetime.datetime(int(g[0]), int(g[1]), int(g[2]), int(g[3]),
+                          int(g[4]))
+    zone = g[6]
+    if zone is not None and zone != 'Z':
+        t -= _zoneOffset(zone)
+
+    if objects and second < 60:
+        return t.replace(second = int(second),
+                         microsecond = _microseconds(g[5]),
+                         tzinfo = zone and datetime.timezone.utc)
+    return (t.year, t.month, t.day, t.hour, t.minute, second)
+
+def _isoDate(g, objects):
+    d = datetime.date(int(g[0]), int(g[1]), int(g[2]))
+    zone = g[3]
+    if zone is not None and zone != 'Z':
+        d = (datetime.datetime(d.year, d.month, d.day) -
+             _zoneOffset(zone)).date()
+
+    if objects:
+        return d
+    return (d.year, d.month, d.day)
+
+def _isoTime(g, objects):
+    second = float(g[2])
+    if second >= 61:
+        raise ValueError("seconds out of range")
+
+    t = datetime.time(int(g[0]), int(g[1]))
+    hour, minute = t.hour, t.minute
+    zone = g[3]
+    if zone is not None and zone != 'Z':
+        # without a date the hour is left outside 0-23, like
+        # convertDateTime() does
+        minute -= _zoneOffset(zone) // datetime.timedelta(minutes = 1)
+        hour += minute // 60
+        minute %= 60
+
+    if objects and second < 60:
+        return datetime.time(hour % 24, minute, int(second),
+                             _microseconds(g[2]),
+                             zone and datetime.timezone.utc)
+    return (hour, minute, second)
+
+def _buildISODates():
+    c = SOAPParser
+    dateTime = (re.compile(c.ISODATEre + 'T' + c.ISOTIMEre + c.ISOZONEre),
+                _isoDateTime)
+    return {'dateTime': dateTime, 'timeInstant': dateTime,
+            'timePeriod': dateTime,
+            'date': (re.compile(c.ISODATEre + c.ISOZONEre), _isoDate),
+            'time': (re.compile(r'\s*' + c.ISOTIMEre + c.ISOZONEre),
+                     _isoTime)}
+
+def _convertDecimal(p, d, attrs, config):
+    return float(d)
+
+def _convertCollapsed(p, d, attrs, config):
+    return collapseWhiteSpace(d)
+
+def _convertList(p, d, attrs, config):
+    return collapseWhiteSpace(d).split()
+
+def _convertBase64(p, d, attrs, config):
+    return binascii.a2b_base64(d)
+
+def _convertHex(p, d, attrs, config):
+    if d:
+        return decodeHexString(d)
+
+def _convertURI(p, d, attrs, config):
+    return urllib.parse.unquote(collapseWhiteSpace(d))
+
+def _convertBinary(p, d, attrs, config):
+    try:
+        e = attrs[(None, 'encoding')]
 
-                    if d:
-                        if e == 'hex':
-                            return decodeHexString(d)
-                        elif e == 'base64':
-                            return base64.decodestring(d)
-                    else:
-                        return ''
-                except:
-                    pass
-
-                raise Error("unknown or missing binary encoding")
-            if t[1] == "uri":
-                return urllib.parse.unquote(collapseWhiteSpace(d))
-            if t[1] == "recurringInstant":
-                return self.convertDateTime(d, t[1])
-        if t[0] in (NS.XSD2, NS.ENC):
-            if t[1] == "uriReference":
-                return urllib.parse.unquote(collapseWhiteSpace(d))
-            if t[1] == "timePeriod":
-                return self.convertDateTime(d, t[1])
-            if t[1] in ("century", "year"):
-                return self.convertDateTime(d, t[1])
-        if t[0] in (NS.XSD, NS.XSD2, NS.ENC):
-            if t[1] == "timeDuration":
-                return self.convertDateTime(d, t[1])
-        if t[0] == NS.XSD3:
-            if t[1] == "anyURI":
-                return urllib.parse.unquote(collapseWhiteSpace(d))
-            if t[1] in ("gYearMonth", "gMonthDay"):
-                return self.convertDateTime(d, t[1])
-            if t[1] == "gYear":
-                return self.convertDateTime(d, t[1])
-            if t[1] == "gMonth":
-                return self.convertDateTime(d, t[1])
-            if t[1] == "gDay":
-                return self.convertDateTime(d, t[1])
-            if t[1] == "duration":
-                return self.convertDateTime(d, t[1])
-        if t[0] in (NS.XSD2, NS.XSD3):
-            if t[1] == "token":
-                return collapseWhiteSpace(d)
-            if t[1] == "recurringDate":
-                return self.convertDateTime(d, t[1])
-            if t[1] == "month":
-                return self.convertDateTime(d, t[1])
-            if t[1] == "recurringDay":
-                return self.convertDateTime(d, t[1])
-        if t[0] == NS.XSD2:
-            if t[1] == "CDATA":
-                return collapseWhiteSpace(d)
-
-        raise UnknownTypeError("unknown type `%s'" % (str(t[0]) + ':' + t[1]))
+        if d:
+            if e == 'hex':
+                return decodeHexString(d)
+            elif e == 'base64':
+                return binascii.a2b_base64(d)
+        else:
+            return ''
+    except:
+        pass
 
+    raise Error("unknown or missing binary encoding")
+
+def _buildConverters():
+    """Return the converters of SOAPParser by (namespace URI, type)."""
+    table = {}
+
+    def add(nss, names, convert):
+        for ns in nss:
+            for name in names:
+                # the first one wins
+                table.setdefault((ns, name), convert(name))
+
+    const = lambda f: lambda name: f
+    dateTime = _dateTimeConverter
+
+    add(NS.EXSD_L, ("integer",), const(_convertInteger))
+    for name, l in SOAPParser.intlimits.items():
+        add(NS.EXSD_L, (name,), const(_intConverter(l[1], l[2])))
+    add(NS.EXSD_L, ("string",), const(_convertString))
+    add(NS.EXSD_L, ("bool", "boolean"), const(_convertBoolean))
+    add(NS.EXSD_L, ("double", "float"),
+        lambda name: _floatConverter(name, SOAPParser.floatlimits[name]))
+    add(NS.EXSD_L, ("dateTime", "date", "timeInstant", "time"), dateTime)
+    add(NS.EXSD_L, ("decimal",), const(_convertDecimal))
+    add(NS.EXSD_L, ("language", "QName", "NOTATION", "NMTOKEN", "Name",
+                    "NCName", "ID", "IDREF", "ENTITY"),
+        const(_convertCollapsed))
+    add(NS.EXSD_L, ("IDREFS", "ENTITIES", "NMTOKENS"), const(_convertList))
+
+    add(NS.XSD_L, ("base64", "base64Binary"), const(_convertBase64))
+    add(NS.XSD_L, ("hexBinary",), const(_convertHex))
+    add(NS.XSD_L, ("anyURI",), const(_convertURI))
+    add(NS.XSD_L, ("normalizedString", "token"), const(_convertCollapsed))
+    add((NS.ENC,), ("base64",), const(_convertBase64))
+    add((NS.XSD,), ("binary",), const(_convertBinary))
+    add((NS.XSD,), ("uri",), const(_convertURI))
+    add((NS.XSD,), ("recurringInstant",), dateTime)
+    add((NS.XSD2, NS.ENC), ("uriReference",), const(_convertURI))
+    add((NS.XSD2, NS.ENC), ("timePeriod", "century", "year"), dateTime)
+    add((NS.XSD, NS.XSD2, NS.ENC), ("timeDuration",), dateTime)
+    add((NS.XSD3,), ("gYearMonth", "gMonthDay", "gYear", "gMonth", "gDay",
+                     "duration"), dateTime)
+    add((NS.XSD2, NS.XSD3), ("recurringDate", "month", "recurringDay"),
+        dateTime)
+    add((NS.XSD2,), ("CDATA",), const(_convertCollapsed))
+
+    return table
+
+# The converter of every simple type, replacing the chain of tests on the
+# namespace and name of the type convertToBasicTypes() used to go through
+SOAPParser.converters = _buildConverters()
+
+# The pattern and reader of the canonical form of each kind that
+# convertDateTime() reads without the general DATETIMECONSTS patterns
+SOAPParser.isodates = _buildISODates()
 
 ################################################################################
 # call to SOAPParser that keeps all of the info
@@ -1045,24 +1622,149 @@ class EmptyEntityResolver(xml.sax.handler.EntityResolver):
         return BytesIO("<?xml version='1.0' encoding='UTF-8'?>")
 
 
-def _parseSOAP(xml_str, rules = None, ignore_ext=None,
-               forbid_entities=False, forbid_external=True, forbid_dtd=False):
-    inpsrc = xml.sax.xmlreader.InputSource()
-    inpsrc.setByteStream(BytesIO(xml_str))
+class ExpatReader(xml.sax.xmlreader.Locator):
+    """Feeds a SOAPParser from pyexpat callbacks, doing what the xml.sax
+    reader of defusedxml with namespaces on does without its Python
+    layer: element and attribute names are split into (URI, name) pairs
+    once per document, and attributes are handed over as a plain dict.
+
+    It has the feed(), close() and parse() methods of xml.sax readers,
+    and raises the same DefusedXmlException and SAXParseException
+    errors.  External entities are never loaded.  Once closed, it can
+    parse another message."""
+
+    # names remembered across messages, at most
+    max_names = 4096
+
+    def __init__(self, handler, forbid_dtd = False, forbid_entities = False,
+                 forbid_external = True):
+        self.handler = handler
+        self.forbid_dtd = forbid_dtd
+        self.forbid_entities = forbid_entities
+        self.forbid_external = forbid_external
+        self._names = {}
+        self.reset()
+
+    def reset(self):
+        # a new pyexpat parser, as one can't be restarted
+        handler = self.handler
+        if len(self._names) > self.max_names:
+            self._names = {}
+
+        p = self._parser = expat.ParserCreate(None, ' ')
+        p.buffer_text = 1
+        p.StartElementHandler = self.startElement
+        p.EndElementHandler = self.endElement
+        p.CharacterDataHandler = handler.characters
+        p.StartNamespaceDeclHandler = handler.startPrefixMapping
+        p.EndNamespaceDeclHandler = handler.endPrefixMapping
+
+        if self.forbid_dtd:
+            p.StartDoctypeDeclHandler = self.forbidDTD
+        if self.forbid_entities:
+            p.EntityDeclHandler = self.forbidEntity
+            p.UnparsedEntityDeclHandler = self.forbidUnparsedEntity
+        if self.forbid_external:
+            p.ExternalEntityRefHandler = self.forbidExternal
+
+        handler.startDocument()
+
+    def startElement(self, name, attrs):
+        names = self._names
+        try:
+            n = names[name]
+        except KeyError:
+            n = names[name] = self._split(name)
+
+        a = {}
+        for k, v in attrs.items():
+            try:
+                a[names[k]] = v
+            except KeyError:
+                names[k] = self._split(k)
+                a[names[k]] = v
+
+        self.handler._startElement(n, a)
+
+    def endElement(self, name):
+        self.handler._endElement(self._names[name])
+
+    def _split(self, name):
+        uri, sep, name = name.rpartition(' ')
+        if sep:
+            return (uri, name)
+        return (None, name)
+
+    def forbidDTD(self, name, sysid, pubid, has_internal_subset):
+        raise DTDForbidden(name, sysid, pubid)
+
+    def forbidEntity(self, name, is_parameter_entity, value, base, sysid,
+                     pubid, notation_name):
+        raise EntitiesForbidden(name, value, base, sysid, pubid,
+                                notation_name)
+
+    def forbidUnparsedEntity(self, name, base, sysid, pubid, notation_name):
+        raise EntitiesForbidden(name, None, base, sysid, pubid,
+                                notation_name)
+
+    def forbidExternal(self, context, base, sysid, pubid):
+        raise ExternalReferenceForbidden(context, base, sysid, pubid)
+
+    def feed(self, data, isFinal = 0):
+        if self._parser is None:
+            self.reset()
+        try:
+            self._parser.Parse(data, isFinal)
+        except expat.error as e:
+            raise xml.sax.SAXParseException(expat.ErrorString(e.code), e,
+                                            self)
+
+    def close(self):
+        self.feed(b'', 1)
+        self.handler.endDocument()
+        # break the cycle through the handlers
+        self._parser = None
+
+    def parse(self, source):
+        self.feed(source.getByteStream().read())
+        self.close()
+
+    # Locator methods
+
+    def getColumnNumber(self):
+        if self._parser is None:
+            return None
+        return self._parser.ErrorColumnNumber
+
+    def getLineNumber(self):
+        if self._parser is None:
+            return 1
+        return self._parser.ErrorLineNumber
+
+def _makeParser(handler, ignore_ext=None, forbid_entities=False,
+                forbid_external=True, forbid_dtd=False, backend='sax'):
+    """Return a reader feeding handler; backend is 'sax' for the
+    xml.sax reader of defusedxml, or 'expat' for an ExpatReader."""
     if ignore_ext is None:
         ignore_ext = False
 
-    parser = make_parser()
-    t = SOAPParser(rules=rules)
-    parser.setContentHandler(t)
-    errorHandler = xml.sax.handler.ErrorHandler()
-    parser.setErrorHandler(errorHandler)
-
     if ignore_ext:
         # disable by default  entity loading on posted content
         forbid_dtd = True
         forbid_entities = True
         forbid_external = True
+
+    if backend == 'expat':
+        return ExpatReader(handler, forbid_dtd, forbid_entities,
+                           forbid_external)
+    elif backend != 'sax':
+        raise ValueError("unknown parser backend %r" % (backend,))
+
+    parser = make_parser()
+    parser.setContentHandler(handler)
+    errorHandler = xml.sax.handler.ErrorHandler()
+    parser.setErrorHandler(errorHandler)
+
     parser.forbid_dtd = forbid_dtd
     parser.forbid_entities = forbid_entities
     parser.forbid_external = forbid_external
@@ -1071,6 +1773,65 @@ def _parseSOAP(xml_str, rules = None, ignore_ext=None,
     # turn on namespace mangeling
     parser.setFeature(xml.sax.handler.feature_namespaces, 1)
 
+    return parser
+
+class _TextBuffer(io.StringIO):
+    """Character data of an element that came in many pieces; see
+    SOAPParser.characters()."""
+
+    blank = 1
+
+    def add(self, pieces):
+        text = ''.join(pieces)
+        if self.blank and text and not text.isspace():
+            self.blank = 0
+        self.write(text)
+
+class _ReaderPool(threading.local):
+    """SOAPParser and reader pairs kept by each thread for reuse, one
+    for every combination of _makeParser() arguments.
+
+    A pair is taken out of the pool while it parses a message and put
+    back once its results have been read, so nested or interleaved
+    parses in a thread each get their own.  Pairs that failed to parse
+    are dropped."""
+
+    def __init__(self, handler = SOAPParser):
+        self.handler = handler
+        self.free = {}
+
+    def acquire(self, key, *options):
+        """Return the pair for the _makeParser() arguments key, with the
+        SOAPParser reset with options (see SOAPParser.reset())."""
+        pair = self.free.pop(key, None)
+        if pair is None:
+            t = self.handler(*options)
+            return t, _makeParser(t, *key)
+        pair[0].reset(*options)
+        return pair
+
+    def release(self, key, t, parser):
+        t.reset()
+        self.free[key] = (t, parser)
+
+_readers = _ReaderPool()
+
+def _parseSOAP(xml_str, rules = None, ignore_ext=None,
+               forbid_entities=False, forbid_external=True, forbid_dtd=False,
+               native = 0, numeric_arrays = 0, backend = 'sax',
+               result = None, datetime_objects = 0, lazy = 0, select = None,
+               config = Config):
+    """Parse xml_str and return result(t), t being the SOAPParser used,
+    which is then reused by the next parse in this thread.  Without
+    result, t itself is returned and not reused."""
+    inpsrc = xml.sax.xmlreader.InputSource()
+    inpsrc.setByteStream(BytesIO(xml_str))
+
+    key = (bool(ignore_ext), forbid_entities, forbid_external, forbid_dtd,
+           backend)
+    t, parser = _readers.acquire(key, rules, native, numeric_arrays,
+                                 datetime_objects, lazy, select, config)
+
     try:
         parser.parse(inpsrc)
     except DefusedXmlException as e:
@@ -1082,22 +1843,324 @@ def _parseSOAP(xml_str, rules = None, ignore_ext=None,
         print(traceback.format_exc())
         raise e
 
-    return t
+    if result is None:
+        return t
+    try:
+        return result(t)
+    finally:
+        _readers.release(key, t, parser)
+
+class SOAPPushParser:
+    """Parse a SOAP message handed over in pieces as they arrive.
+
+        p = SOAPPushParser()
+        while more data:
+            p.feed(chunk)
+        result = p.close()
+
+    close() returns what parseSOAPRPC() would have returned for the whole
+    message with the same header, body and attrs arguments (or what
+    parseSOAP() would have, if rpc is false).  The SOAPParser, handler,
+    is reused by later parses in the thread once close() has returned."""
+
+    def __init__(self, header = 0, body = 0, attrs = 0, rules = None,
+                 ignore_ext = None, rpc = 1, native = 0, numeric_arrays = 0,
+                 backend = 'sax', datetime_objects = 0, lazy = 0,
+                 config = Config):
+        self._key = (bool(ignore_ext), False, True, False, backend)
+        self.handler, self._parser = _readers.acquire(
+            self._key, rules, native, numeric_arrays, datetime_objects, lazy,
+            None, config)
+        self._flags = (header, body, attrs)
+        self._rpc = rpc
+
+    def feed(self, data):
+        try:
+            self._parser.feed(data)
+        except (DefusedXmlException, xml.sax.SAXParseException):
+            self._parser._parser = None
+            raise
+
+    def close(self):
+        try:
+            self._parser.close()
+        except (DefusedXmlException, xml.sax.SAXParseException):
+            self._parser._parser = None
+            raise
+
+        try:
+            if self._rpc:
+                return _rpcResult(self.handler, *self._flags)
+            if self._flags[2]:
+                return self.handler.body, self.handler.attrs
+            return self.handler.body
+        finally:
+            _readers.release(self._key, self.handler, self._parser)
+
+class SOAPIterParser(SOAPParser):
+    """SOAPParser that hands out the items of an array as they are parsed.
+
+    The first array found inside the SOAP body is not built up; each of
+    its items is queued once its element closes and iterparse() yields it
+    from there, so memory use is bounded by a single item rather than the
+    whole array.  Items referring to a multiref that comes later in the
+    message are held back, along with the items after them, until the
+    reference is resolved; multirefs themselves are kept until the end."""
+
+    class StreamFrame(SOAPParser.Frame):
+        def __init__(self, frame):
+            self.__dict__.update(frame.__dict__)
+            self.count = 0
+            self.base = 0
+            self.pending = collections.deque()
+            self.bulk = None
+
+        def append(self, name, data, attrs):
+            self.pending.append([data])
+            self.count += 1
+
+        def _placeItem(self, name, value, pos, subpos = 0, attrs = None):
+            self.pending[pos - self.base][0] = value
+
+        def __len__(self):
+            return self.count
+
+    def reset(self, rules = None, native = 0, numeric_arrays = 0,
+              datetime_objects = 0, lazy = 0, select = None,
+              config = Config):
+        # items are handed out as they are parsed, so never lazily, and
+        # all of them
+        SOAPParser.reset(self, rules, native, numeric_arrays,
+                         datetime_objects, config = config)
+        self.streamed = 0
+        self._stream = None
+        self._attrs_mark = 0
+
+    def pushFrame(self, frame):
+        # only the result itself, or a multiref directly in the body
+        if self._stream is None and len(self._stack) in (3, 4) and \
+           self._stack[2].name == 'Body' and self._isArray(frame):
+            frame = self._stream = self.StreamFrame(frame)
+            self.streamed = 1
+            self._attrs_mark = len(self.attrs)
+        SOAPParser.pushFrame(self, frame)
+
+    def popFrame(self):
+        frame = SOAPParser.popFrame(self)
+        if frame is self._stream:
+            # what is left is an empty array in place of the streamed one
+            return SOAPParser.Frame(frame.name, frame.kind, frame.attrs,
+                                    frame.rules)
+        return frame
+
+    def _isArray(self, frame):
+        if frame.kind is not None and type(frame.rules) in (type(None), dict):
+            return 1
+        for i in NS.XSI_L:
+            kind = frame.attrs.get((i, 'type'))
+            if kind is not None:
+                prefix, _, name = kind.rpartition(':')
+                return name == 'Array' and self._prem.get(prefix) == NS.ENC
+        return 0
+
+    def ready(self):
+        """Return the list of items that can be handed out so far."""
+        items = []
+        stream = self._stream
+        if stream is not None:
+            pending = stream.pending
+            while pending and not isinstance(pending[0][0], RefHolder):
+                items.append(pending.popleft()[0])
+                stream.base += 1
+
+            # forget the attributes of the items handed out
+            if not pending:
+                while len(self.attrs) > self._attrs_mark:
+                    self.attrs.popitem()
+        return items
+
+    def iterparse(self, source, ignore_ext = None, chunk_size = 65536,
+                  backend = 'sax'):
+        """Parse source and yield the items of the first array in the body.
+
+        source is a bytes object, a file-like object or an iterable of
+        bytes chunks.  A message without an array yields its RPC result
+        once, just as parseSOAPRPC() would return it."""
+        parser = _makeParser(self, ignore_ext, backend = backend)
+
+        if isinstance(source, bytes):
+            source = [source]
+        elif hasattr(source, 'read'):
+            read = source.read
+            source = iter(lambda: read(chunk_size), b'')
+
+        try:
+            for chunk in source:
+                parser.feed(chunk)
+                for item in self.ready():
+                    yield item
+            parser.close()
+        except (DefusedXmlException, xml.sax.SAXParseException):
+            parser._parser = None
+            raise
+
+        for item in self.ready():
+            yield item
+
+        if not self.streamed:
+            yield _rpcResult(self)
 
 ################################################################################
 # SOAPParser's more public interface
 ################################################################################
-def parseSOAP(xml_str, attrs = 0):
-    t = _parseSOAP(xml_str)
-
+def parseSOAP(xml_str, attrs = 0, backend = 'sax'):
     if attrs:
-        return t.body, t.attrs
-    return t.body
+        return _parseSOAP(xml_str, backend = backend,
+                          result = lambda t: (t.body, t.attrs))
+    return _parseSOAP(xml_str, backend = backend, result = lambda t: t.body)
+
+
+def parseSOAPRPC(xml_str, header = 0, body = 0, attrs = 0, rules = None,
+                 ignore_ext=None, native = 0, numeric_arrays = 0,
+                 backend = 'sax', datetime_objects = 0, lazy = 0,
+                 select = None, config = Config):
+    """With native set, the contents of the method element are parsed
+    into plain Python objects, as simplify() would convert them.  With
+    numeric_arrays set, numeric arrays are parsed into array.array (or
+    NumPy, for 'numpy') arrays; see SOAPParser.  backend 'expat' parses
+    with an ExpatReader rather than xml.sax.  With datetime_objects set,
+    dateTime, date and time values are parsed into datetime objects.
+    With lazy set, the simple values of structs and arrays are converted
+    when first read, and attrs leaves them out; native overrides it.
+    Values are range checked as config.strict_range says.
+
+    select is a list of the paths of the elements wanted, from the body
+    entries down, like ['getQuoteResponse/Result/price'].  Only those,
+    what they hold and the multirefs they refer to are built; other body
+    entries and elements are skipped, faults and multirefs directly in
+    the Body excepted.  Should an href refer back to an element with an
+    id skipped already inside another one, the message is parsed again
+    in full.  Error is raised if the first body entry is not on the
+    paths."""
+
+    if select is not None:
+        try:
+            return _parseSOAP(xml_str, rules = rules, ignore_ext=ignore_ext,
+                native = native, numeric_arrays = numeric_arrays,
+                backend = backend, datetime_objects = datetime_objects,
+                lazy = lazy, select = select, config = config,
+                result = lambda t: _rpcResult(t, header, body, attrs,
+                                              select))
+        except _Reparse:
+            pass
+
+    return _parseSOAP(xml_str, rules = rules, ignore_ext=ignore_ext,
+                      native = native, numeric_arrays = numeric_arrays,
+                      backend = backend, datetime_objects = datetime_objects,
+                      lazy = lazy, config = config,
+                      result = lambda t: _rpcResult(t, header, body, attrs))
+
+def iterSOAPRPC(source, rules = None, ignore_ext = None, native = 0,
+                numeric_arrays = 0, backend = 'sax', datetime_objects = 0,
+                config = Config):
+    """Yield the items of the array returned by a SOAP RPC response as
+    they are parsed; see SOAPIterParser.iterparse()."""
+    return SOAPIterParser(rules = rules, native = native,
+                          numeric_arrays = numeric_arrays,
+                          datetime_objects = datetime_objects,
+                          config = config).iterparse(
+        source, ignore_ext, backend = backend)
+
+class _Peeked(Exception):
+    """Raised by _PeekParser to stop at the first body entry."""
+
+class _PeekParser(SOAPParser):
+    """SOAPParser that checks and builds what comes before the first body
+    entry and stops at its start tag, noting where the Header, Body and
+    that start tag are in the message; see peekSOAP()."""
+
+    # the reader feeding it, whose pyexpat parser knows the byte offsets
+    reader = None
+
+    def reset(self, *options):
+        SOAPParser.reset(self, *options)
+        self.method = None
+        self.offsets = [None, None, None]
+
+    def _startElement(self, name, attrs):
+        depth = len(self._stack)
+
+        if depth == 3 and self._stack[2].name == 'Body':
+            if name[0] == None and name[1][0] == ' ':
+                name = (None, name[1][1:])
+            self.method = tuple(name)
+            self.offsets[2] = self.reader._parser.CurrentByteIndex
+            raise _Peeked()
+
+        SOAPParser._startElement(self, name, attrs)
+
+        if depth == 2:
+            i = self._stack[2].name == 'Body'
+            self.offsets[i] = self.reader._parser.CurrentByteIndex
+
+class SOAPPeek:
+    """What peekSOAP() found out about a message.
+
+    method and namespace are the name and namespace URI of the first body
+    entry, or None if the body is empty.  header is the headerType of the
+    header blocks, or None, and attrs their attributes by id(), as from
+    parseSOAPRPC(attrs=1).  header_offset, body_offset and method_offset
+    are the byte offsets in the message of the start tags of the Header,
+    Body and first body entry, None for those missing."""
+
+    def __init__(self, t):
+        if t.method is None:
+            self.namespace = self.method = None
+        else:
+            self.namespace, self.method = t.method
+        self.header = t.header
+        self.attrs = t.attrs
+        self.header_offset, self.body_offset, self.method_offset = \
+            t.offsets
+
+    def __repr__(self):
+        return "<%s %s:%s at %d>" % (self.__class__.__name__,
+                                     self.namespace, self.method, id(self))
+
+_peekers = _ReaderPool(_PeekParser)
+
+def peekSOAP(data, ignore_ext = None, backend = 'sax'):
+    """Read the SOAP message data, bytes, only as far as the start tag of
+    its first body entry and return a SOAPPeek of what it holds there,
+    for routing a message without parsing its body.  The Envelope, Header
+    and Body are checked as parseSOAPRPC() checks them, and the header
+    blocks are built.  data may stop anywhere after that start tag.  The
+    SOAPAction of a request is in its HTTP headers, not in data."""
+    key = (bool(ignore_ext), False, True, False, backend)
+    t, parser = _peekers.acquire(key)
+    t.reader = parser
 
+    try:
+        parser.feed(data)
+        parser.close()
+    except _Peeked:
+        pass
 
-def parseSOAPRPC(xml_str, header = 0, body = 0, attrs = 0, rules = None, ignore_ext=None):
+    peek = SOAPPeek(t)
+    # a new pyexpat parser for the next message
+    parser.reset()
+    _peekers.release(key, t, parser)
+    return peek
+
+def _rpcResult(t, header = 0, body = 0, attrs = 0, select = None):
+    # the first body entry is skipped if not on the paths, and multirefs
+    # that follow it are not to be taken for it
+    if select is not None and (not t.body._keyord or
+       (t.body._keyord[0] not in t._select and
+        not isinstance(t.body[0], faultType))):
+        raise Error("no body entry on the select paths `%s'" %
+                    "', `".join(select))
 
-    t = _parseSOAP(xml_str, rules = rules, ignore_ext=ignore_ext)
     p = t.body[0]
 
     # Empty string, for RPC this translates into a void
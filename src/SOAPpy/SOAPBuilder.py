@@ -32,8 +32,13 @@
 #
 ################################################################################
 """
+import array
+import datetime
 import html
 
+try: import numpy
+except ImportError: numpy = None
+
 ident = '$Id: SOAPBuilder.py 1498 2010-03-12 02:13:19Z pooryorick $'
 from .version import __version__
 
@@ -55,6 +60,30 @@ except NameError:
 ################################################################################
 # SOAP Builder
 ################################################################################
+class _NSScope(dict):
+    """Namespace URI to prefix map with nested scopes.
+
+    Every change is logged; a scope starts by taking len(log) as its mark
+    and ends with restore(mark), which drops the prefixes set since.  That
+    is what copying the map for every element used to achieve."""
+
+    def __init__(self, *args):
+        dict.__init__(self, *args)
+        self.log = []           # (URI, prefix it replaced or None)
+
+    def __setitem__(self, uri, prefix):
+        self.log.append((uri, self.get(uri)))
+        dict.__setitem__(self, uri, prefix)
+
+    def restore(self, mark):
+        log = self.log
+        while len(log) > mark:
+            uri, old = log.pop()
+            if old is None:
+                dict.__delitem__(self, uri)
+            else:
+                dict.__setitem__(self, uri, old)
+
 class SOAPBuilder:
     _xml_top = '<?xml version="1.0"?>\n'
     _xml_enc_top = '<?xml version="1.0" encoding="%s"?>\n'
@@ -69,6 +98,32 @@ class SOAPBuilder:
         NS.XSD: NS.XSD_T, NS.XSD2: NS.XSD2_T, NS.XSD3: NS.XSD3_T,
         NS.XSI: NS.XSI_T, NS.XSI2: NS.XSI2_T, NS.XSI3: NS.XSI3_T}
 
+    # Built-in dump methods; watch out for order!
+    _dumpmap = (
+        (Exception, 'dump_exception'),
+        (mapType, 'dump_map'),
+        (arrayType, 'dump_list'),
+        (str, 'dump_string'),
+        (type(None), 'dump_None'),
+        (bool, 'dump_bool'),
+        (int, 'dump_int'),
+        (list, 'dump_list'),
+        (tuple, 'dump_list'),
+        (dict, 'dump_dictionary'),
+        (float, 'dump_float'),
+        (array.array, 'dump_list'),
+        (datetime.date, 'dump_datetime'),
+        (datetime.time, 'dump_datetime'),
+    )
+    if numpy is not None:
+        # before float, which numpy.float64 derives from
+        _dumpmap = ((numpy.ndarray, 'dump_ndarray'),
+                    (numpy.generic, 'dump_ndarray')) + _dumpmap
+
+    # The dump handler resolved for each type of object, cached per
+    # builder class and config.dumpmap
+    _dispatch_cache = {}
+
     def __init__(self, args = (), kw = {}, method = None, namespace = None,
         header = None, methodattrs = None, envelope = 1, encoding = 'UTF-8',
         use_refs = 0, config = Config, noroot = 0):
@@ -99,9 +154,131 @@ class SOAPBuilder:
         self.body       = not isinstance(args, bodyType)
         self.noroot     = noroot
 
+        try:
+            self._handlers = self._dispatch_cache.setdefault(
+                (self.__class__, tuple(config.dumpmap)), {})
+        except TypeError:
+            # unhashable dumpmap entries
+            self._handlers = {}
+
     def build(self):
+        try:
+            for i in self._build():
+                pass
+        except RecursionError:
+            if self.use_refs == 0:
+                # restart
+                return self._restart().build()
+            raise
+
+        if self.envelope:
+            e = ['  xmlns:%s="%s"\n' % (ns[1], ns[0]) for ns in list(self.envns.items())]
+
+            self.out = ['<', self._env_top] + e + ['>\n'] + \
+                       self.out + \
+                       [self._env_bot]
+
+        if self.encoding != None:
+            self.out.insert(0, self._xml_enc_top % self.encoding)
+            return ''.join(self.out).encode(self.encoding)
+
+        self.out.insert(0, self._xml_top)
+        return ''.join(self.out)
+
+    def iterbuild(self, chunk_size = 65536):
+        """Generator variant of build(), yielding the message in chunks of
+        chunk_size characters, the last one shorter, while it is being
+        serialized.
+
+        Output is handed out between the items of the arguments that are
+        lists, so a large array never has to be in memory as a whole.
+        As nothing can be taken back once it is handed out, shared and
+        recursive objects are looked for upfront and sent as
+        multi-reference values from the start."""
+
+        if self.envelope and self.config.buildWithGlobalNamespacePrefix \
+               and not self.config.buildWithNamespacePrefix:
+            # the envelope declares namespaces found along the way
+            yield self.build()
+            return
+
+        if self.use_refs == 0 and self._shared():
+            self.use_refs = 1
+
+        if self.encoding != None:
+            self.out = [self._xml_enc_top % self.encoding]
+        else:
+            self.out = [self._xml_top]
+
+        if self.envelope:
+            # declare the standard namespaces as the body can't be seen yet
+            self.envns = self._env_ns.copy()
+            self.out += ['<', self._env_top] + \
+                ['  xmlns:%s="%s"\n' % (ns[1], ns[0])
+                 for ns in list(self.envns.items())] + ['>\n']
+
+        for flush in self._build():
+            # arrays dumped in bulk add large parts, and ask for a flush
+            if flush or len(self.out) >= 64:
+                out = ''.join(self.out)
+                n = len(out) - len(out) % chunk_size
+                for i in range(0, n, chunk_size):
+                    yield self._encode(out[i:i + chunk_size])
+                self.out = [out[n:]]
+
+        if self.envelope:
+            self.out.append(self._env_bot)
+
+        out = ''.join(self.out)
+        self.out = []
+        for i in range(0, len(out), chunk_size):
+            yield self._encode(out[i:i + chunk_size])
+
+    def _encode(self, out):
+        if self.encoding != None:
+            return out.encode(self.encoding)
+        return out
+
+    def _restart(self):
+        return SOAPBuilder(args = self.args, kw = self.kw,
+            method = self.method, namespace = self.namespace,
+            header = self.header, methodattrs = self.methodattrs,
+            envelope = self.envelope, encoding = self.encoding,
+            use_refs = 1, config = self.config, noroot = self.noroot)
+
+    def _shared(self):
+        """Return whether any object would be dumped more than once."""
+        if type(self.args) != TupleType:
+            stack = [self.args]
+        else:
+            stack = list(self.args)
+        stack += list(self.kw.values())
+        if self.header:
+            stack.append(self.header)
+
+        seen = set()
+        while stack:
+            obj = stack.pop()
+            if obj is None or isinstance(obj, (bool, int, float)):
+                continue
+            if id(obj) in seen:
+                return 1
+            seen.add(id(obj))
+
+            if isinstance(obj, dict):
+                stack.extend(list(obj.values()))
+            elif isinstance(obj, (list, tuple)):
+                stack.extend(obj)
+            elif hasattr(obj, '__dict__'):
+                stack.extend([v for k, v in list(obj.__dict__.items())
+                              if k[:1] != '_'])
+        return 0
+
+    def _build(self):
+        # Serialize the message into self.out, yielding whenever a part
+        # of it is complete.
         if self.config.debug: print("In build.")
-        ns_map = {}
+        ns_map = _NSScope()
 
         # Cache whether typing is on or not
         typed = self.config.typed
@@ -110,6 +287,7 @@ class SOAPBuilder:
             # Create a header.
             self.dump(self.header, "Header", typed = typed)
             #self.header = None # Wipe it out so no one is using it.
+            yield
 
         if self.body:
             # Call genns to record that we've used SOAP-ENV.
@@ -120,7 +298,7 @@ class SOAPBuilder:
         if self.method:
             # Save the NS map so that it can be restored when we
             # fall out of the scope of the method definition
-            save_ns_map = ns_map.copy()
+            mark = len(ns_map.log)
             self.depth += 1
             a = ''
             if self.methodattrs:
@@ -135,37 +313,27 @@ class SOAPBuilder:
             self.out.append('<%s%s%s%s%s>\n' % (
                 methodns, self.method, n, a, self.genroot(ns_map)))
 
-        try:
-            if type(self.args) != TupleType:
-                args = (self.args,)
-            else:
-                args = self.args
+        if type(self.args) != TupleType:
+            args = (self.args,)
+        else:
+            args = self.args
 
-            for i in args:
-                self.dump(i, typed = typed, ns_map = ns_map)
+        for i in args:
+            yield from self._iterdump(i, typed = typed, ns_map = ns_map)
 
-            if hasattr(self.config, "argsOrdering") and self.method in self.config.argsOrdering:
-                for k in self.config.argsOrdering.get(self.method):
-                    self.dump(self.kw.get(k), k, typed = typed, ns_map = ns_map)                
-            else:
-                for (k, v) in list(self.kw.items()):
-                    self.dump(v, k, typed = typed, ns_map = ns_map)
-                
-        except RecursionError:
-            if self.use_refs == 0:
-                # restart
-                b = SOAPBuilder(args = self.args, kw = self.kw,
-                    method = self.method, namespace = self.namespace,
-                    header = self.header, methodattrs = self.methodattrs,
-                    envelope = self.envelope, encoding = self.encoding,
-                    use_refs = 1, config = self.config)
-                return b.build()
-            raise
+        if hasattr(self.config, "argsOrdering") and self.method in self.config.argsOrdering:
+            for k in self.config.argsOrdering.get(self.method):
+                yield from self._iterdump(self.kw.get(k), k, typed = typed,
+                                          ns_map = ns_map)
+        else:
+            for (k, v) in list(self.kw.items()):
+                yield from self._iterdump(v, k, typed = typed,
+                                          ns_map = ns_map)
 
         if self.method:
             self.out.append("</%s%s>\n" % (methodns, self.method))
             # End of the method definition; drop any local namespaces
-            ns_map = save_ns_map
+            ns_map.restore(mark)
             self.depth -= 1
 
         if self.body:
@@ -177,24 +345,11 @@ class SOAPBuilder:
 
             for obj, tag in self.multirefs:
                 self.dump(obj, tag, typed = typed, ns_map = ns_map)
+                yield
 
             self.out.append("</%sBody>\n" % body_ns)
             self.depth -= 1
 
-        if self.envelope:
-            e = ['  xmlns:%s="%s"\n' % (ns[1], ns[0]) for ns in list(self.envns.items())]
-
-            self.out = ['<', self._env_top] + e + ['>\n'] + \
-                       self.out + \
-                       [self._env_bot]
-
-        if self.encoding != None:
-            self.out.insert(0, self._xml_enc_top % self.encoding)
-            return ''.join(self.out).encode(self.encoding)
-
-        self.out.insert(0, self._xml_top)
-        return ''.join(self.out)
-
     def gentag(self):
         if self.config.debug: print("In gentag.")
         self.tcounter += 1
@@ -216,7 +371,9 @@ class SOAPBuilder:
             return (ns_map[nsURI] + ':', '')
 
         if nsURI in self._env_ns:
-            ns = self.envns[nsURI] = ns_map[nsURI] = self._env_ns[nsURI]
+            # declared on the envelope, so there is no need to remember
+            # it in the scope
+            ns = self.envns[nsURI] = self._env_ns[nsURI]
             return (ns + ':', '')
 
         if not ns:
@@ -279,15 +436,70 @@ class SOAPBuilder:
 
     def dump(self, obj, tag = None, typed = 1, ns_map = {}):
         if self.config.debug: print("In dump.", "obj=", obj)
-        ns_map = ns_map.copy()
+        try:
+            log = ns_map.log
+        except AttributeError:
+            ns_map = _NSScope(ns_map)
+            log = ns_map.log
+        mark = len(log)
         self.depth += 1
 
         if type(tag) not in (type(None), str):
             raise KeyError("tag must be a string or None")
 
-        self.dump_dispatch(obj, tag, typed, ns_map)
+        try:
+            self.dump_dispatch(obj, tag, typed, ns_map)
+        finally:
+            # drop the namespaces declared inside the element
+            if len(log) != mark:
+                ns_map.restore(mark)
         self.depth -= 1
 
+    def _iterdump(self, obj, tag = None, typed = 1, ns_map = {}):
+        # dump() yielding between the items of a list
+        if not isinstance(obj, _sequences) or \
+           getattr(obj, "ndim", 1) == 0 or \
+           isinstance(obj, mapType) or \
+           [1 for dtype, func in self.config.dumpmap
+            if isinstance(obj, dtype)]:
+            self.dump(obj, tag, typed, ns_map)
+            yield
+            return
+
+        if self.config.debug: print("In dump.", "obj=", obj)
+        if not isinstance(ns_map, _NSScope):
+            ns_map = _NSScope(ns_map)
+        mark = len(ns_map.log)
+        self.depth += 1
+
+        if type(tag) not in (type(None), str):
+            raise KeyError("tag must be a string or None")
+
+        try:
+            yield from self._dump_list(obj, tag or self.gentag(), typed,
+                                       ns_map)
+        finally:
+            ns_map.restore(mark)
+        self.depth -= 1
+
+    def _handler(self, t):
+        # Find the function dumping objects of type t, or None for the
+        # generic handling in dump_dispatch
+        for dtype, func in self.config.dumpmap:
+            # Apply additional types, override built-in types
+            if issubclass(t, dtype):
+                break
+        else:
+            for dtype, name in self._dumpmap:
+                if issubclass(t, dtype):
+                    func = getattr(self.__class__, name)
+                    break
+            else:
+                func = None
+
+        self._handlers[t] = func
+        return func
+
     # generic dumper
     def dumper(self, nsURI, obj_type, obj, tag, typed = 1, ns_map = {},
                rootattr = '', id = '',
@@ -328,17 +540,7 @@ class SOAPBuilder:
 
         tag = toXMLname(tag) # convert from SOAP 1.2 XML name encoding
 
-        if self.config.strict_range:
-            doubleType(obj)
-
-        if PosInf == obj:
-            obj = "INF"
-        elif NegInf == obj:
-            obj = "-INF"
-        elif NaN == obj:
-            obj = "NaN"
-        else:
-            obj = repr(obj)
+        obj = _floatData(obj, self.config)
 
         # Note: python 'float' is actually a SOAP 'double'.
         self.out.append(self.dumper(
@@ -391,12 +593,19 @@ class SOAPBuilder:
     dump_NoneType = dump_None # For Python 2.2+
 
     def dump_list(self, obj, tag, typed = 1, ns_map = {}):
+        for i in self._dump_list(obj, tag, typed, ns_map):
+            pass
+
+    def _dump_list(self, obj, tag, typed = 1, ns_map = {}):
         if self.config.debug: print("In dump_list.",  "obj=", obj)
         tag = tag or self.gentag()
         tag = toXMLname(tag) # convert from SOAP 1.2 XML name encoding
 
         if type(obj) == InstanceType:
             data = obj.data
+        elif isinstance(obj, _arrays):
+            # array.array or NumPy array, as Python objects
+            data = obj.tolist()
         else:
             data = obj
 
@@ -426,10 +635,9 @@ class SOAPBuilder:
         same_type = 1
 
         if not empty:
-            for i in data[1:]:
-                if type(sample) != type(i) or \
-                    (type(sample) == InstanceType and \
-                        sample.__class__ != i.__class__):
+            stype = type(sample)
+            for i in data:
+                if type(i) is not stype:
                     same_type = 0
                     break
 
@@ -454,7 +662,9 @@ class SOAPBuilder:
 
                 t = ns + typename
                                 
-            elif isinstance(sample, anyType):
+            elif isinstance(sample, (anyType, datetime.date, datetime.time)):
+                if not isinstance(sample, anyType):
+                    sample = _datetimeType(sample)
                 ns = sample._validNamespaceURI(self.config.typesNamespaceURI,
                                                self.config.strictNamespaces)
                 if ns:
@@ -498,18 +708,118 @@ class SOAPBuilder:
         else:
             elemsname = tag
             
-        if isinstance(data, (list, tuple, arrayType)):
+        if isinstance(data, _sequences):
             should_drill = True
         else:
             should_drill = not same_type
-        
-        for i in data:
-            self.dump(i, elemsname, should_drill, ns_map)
+
+        if same_type and not empty and should_drill:
+            item = self._bulkItem(sample, elemsname, ns_map)
+        else:
+            item = None
+
+        if item is not None:
+            yield from self._dump_bulk(data, item)
+        else:
+            for i in data:
+                self.dump(i, elemsname, should_drill, ns_map)
+                yield
 
         if typed: self.out.append('</%s>\n' % tag)
 
     dump_tuple = dump_list
 
+    # Text of the items of homogeneous arrays dumped in bulk, by the
+    # handler that would dump them one by one
+    _bulktypes = {
+        'dump_int': "integer",
+        'dump_float': "double",
+        'dump_bool': "boolean",
+        'dump_string': "string",
+    }
+    _floatspecial = {'inf': "INF", '-inf': "-INF"}     # as _floatData
+
+    def _bulkItem(self, sample, elemsname, ns_map):
+        # Return the (start tag, end tag, type) of the items of an array
+        # of samples, or None if they have to be dumped one by one
+        t = type(sample)
+        if t not in (int, float, bool, str):
+            # subclasses may marshal themselves
+            return None
+        try:
+            func = self._handlers[t]
+        except KeyError:
+            func = self._handler(t)
+
+        name = getattr(func, "__name__", None)
+        if name not in self._bulktypes or \
+           func is not getattr(SOAPBuilder, name) or self.config.debug:
+            return None
+        if name == 'dump_string' and self.use_refs:
+            # every string is a multi-reference value
+            return None
+
+        # only namespaces already declared, as those declared on an item
+        # are declared again on the next
+        tns = self.config.typesNamespaceURI
+        ins = self.config.schemaNamespaceURI
+        for uri in tns, ins:
+            if uri not in ns_map and uri not in self._env_ns:
+                return None
+
+        tag = toXMLname(elemsname)
+        ns = self.genns(ns_map, tns)[0]
+        ins = self.genns(ns_map, ins)[0]
+        return ('<%s %stype="%s%s">' % (tag, ins, ns, self._bulktypes[name]),
+                '</%s>\n' % tag, name)
+
+    def _dump_bulk(self, data, item, chunk = 4096):
+        # Dump the items of a homogeneous array in slices of chunk items
+        start, end, name = item
+        sep = end + start
+        for n in range(0, len(data), chunk):
+            part = data[n:n + chunk]
+            if name == 'dump_float':
+                if self.config.strict_range:
+                    text = [_floatData(i, self.config) for i in part]
+                else:
+                    special = self._floatspecial
+                    text = [special.get(i, i) for i in map(repr, part)]
+            elif name == 'dump_string':
+                # the bookkeeping of checkref, with use_refs off
+                ids = self.ids
+                for i in part:
+                    if id(i) in ids:
+                        raise RecursionError(
+                            "Cannot serialize recursive object")
+                    ids[id(i)] = self.icounter
+                    self.icounter += 1
+                text = list(map(html.escape, part))
+            else:
+                text = list(map(str, part))
+
+            self.out.append(start + sep.join(text) + end)
+            yield True
+
+    def dump_ndarray(self, obj, tag, typed = 1, ns_map = {}):
+        if self.config.debug: print("In dump_ndarray.")
+        if obj.ndim == 0:
+            # NumPy scalar
+            self.dump_dispatch(obj.item(), tag, typed, ns_map)
+        else:
+            self.dump_list(obj, tag, typed, ns_map)
+
+    def dump_datetime(self, obj, tag, typed = 1, ns_map = {}):
+        if self.config.debug: print("In dump_datetime.")
+        obj = _datetimeType(obj)
+
+        # as a value, like a float, rather than an instance that may be
+        # referred to
+        ns = obj._validNamespaceURI(self.config.typesNamespaceURI,
+                                    self.config.strictNamespaces)
+        self.out.append(self.dumper(ns, obj._type, obj, tag, typed, ns_map,
+                                    self.genroot(ns_map)))
+
     def dump_map(self, obj, tag, typed = 1, ns_map = {}):
         if self.config.debug: print("In dump_map.",  "obj=", obj)
         tag = tag or self.gentag()
@@ -595,31 +905,14 @@ class SOAPBuilder:
             else:
                 tag = self.gentag()
 
-        # Apply additional types, override built-in types
-        for dtype, func in self.config.dumpmap:
-            if isinstance(obj, dtype):
-                func(self, obj, tag, typed, ns_map)
-                return
+        try:
+            func = self._handlers[type(obj)]
+        except KeyError:
+            func = self._handler(type(obj))
 
-        # watch out for order!
-        dumpmap = (
-            (Exception, self.dump_exception),
-            (mapType, self.dump_map),
-            (arrayType, self.dump_list),
-            (str, self.dump_string),
-            (type(None), self.dump_None),
-            (bool, self.dump_bool),
-            (int, self.dump_int),
-            (int, self.dump_int),
-            (list, self.dump_list),
-            (tuple, self.dump_list),
-            (dict, self.dump_dictionary),
-            (float, self.dump_float),
-        )
-        for dtype, func in dumpmap:
-            if isinstance(obj, dtype):
-                func(obj, tag, typed, ns_map)
-                return
+        if func is not None:
+            func(self, obj, tag, typed, ns_map)
+            return
 
         r = self.genroot(ns_map)
 
@@ -643,17 +936,16 @@ class SOAPBuilder:
                 tag = ns + tag
             self.out.append("<%s%s%s%s%s>\n" % (tag, ndecl, id, a, r))
 
-            keylist = list(obj.__dict__.keys())
-
             # first write out items with order information
-            if hasattr(obj, '_keyord'):
-                for i in range(len(obj._keyord)):
-                    self.dump(obj._aslist(i), obj._keyord[i], 1, ns_map)
-                    keylist.remove(obj._keyord[i])
-
-            # now write out the rest
-            for k in keylist:
-                if (k[0] != "_"):
+            keyord = getattr(obj, '_keyord', ())
+            for i in range(len(keyord)):
+                self.dump(obj._aslist(i), keyord[i], 1, ns_map)
+
+            # now write out the rest; the items of a lazyStructType are
+            # only all in its __dict__ once read
+            keyord = set(keyord)
+            for k in list(obj.__dict__.keys()):
+                if k[0] != "_" and k not in keyord:
                     self.dump(getattr(obj,k), k, 1, ns_map)
 
             if isinstance(obj, bodyType):
@@ -695,14 +987,148 @@ class SOAPBuilder:
 
 
 
+_arrays = (array.array,)
+if numpy is not None:
+    _arrays += (numpy.ndarray,)
+_sequences = (list, tuple, arrayType) + _arrays
+
+def _datetimeType(obj):
+    # the type a datetime, date or time object is dumped as
+    if isinstance(obj, datetime.datetime):
+        return dateTimeType(obj)
+    if isinstance(obj, datetime.date):
+        return dateType(obj)
+    return timeType(obj)
+
+def _floatData(obj, config):
+    if config.strict_range:
+        doubleType(obj)
+
+    if PosInf == obj:
+        return "INF"
+    elif NegInf == obj:
+        return "-INF"
+    elif NaN == obj:
+        return "NaN"
+    return repr(obj)
+
+class SOAPTemplate:
+    """A request message compiled once for a method whose arguments are
+    always of the same scalar types.
+
+    signature is a sequence of (name, type) pairs, type being int, float,
+    str or bool.  The message is built by SOAPBuilder with sample values,
+    after which build() only has to fill in the text of the arguments."""
+
+    _data = {
+        int: str,
+        bool: str,
+        str: html.escape,
+        float: None,            # _floatData, which needs the config
+    }
+
+    def __init__(self, signature, method = None, namespace = None,
+        header = None, methodattrs = None, encoding = 'UTF-8',
+        config = Config, noroot = 0):
+
+        self.names = []
+        self.types = []
+        for name, t in signature:
+            if t not in self._data:
+                raise TypeError("can't prepare argument %s of type %s" %
+                                (name, t.__name__))
+            self.names.append(name)
+            self.types.append(t)
+
+        self.encoding = encoding
+        self.config = config
+
+        # distinct samples, or equal strings would be sent as multirefs
+        samples = {int: 0, bool: False, float: 0.0}
+        kw = {}
+        for i in range(len(self.names)):
+            kw[self.names[i]] = samples.get(self.types[i], "s%d" % i)
+
+        msg = SOAPBuilder(kw = kw, method = method, namespace = namespace,
+                          header = header, methodattrs = methodattrs,
+                          encoding = encoding, config = config,
+                          noroot = noroot).build()
+        if encoding != None:
+            msg = msg.decode(encoding)
+
+        # locate the text of every argument
+        slots = []
+        for i in range(len(self.names)):
+            data = self._text(i, kw[self.names[i]])
+            text = '>%s</%s>' % (data, toXMLname(self.names[i]))
+            pos = msg.find(text)
+            if pos < 0 or msg.find(text, pos + 1) >= 0:
+                raise Error("can't find argument %s in the message" %
+                            self.names[i])
+            slots.append((pos + 1, pos + 1 + len(data), i))
+        slots.sort()
+
+        self.parts = []
+        self.order = []
+        last = 0
+        for start, end, i in slots:
+            self.parts.append(msg[last:start])
+            self.order.append(i)
+            last = end
+        self.parts.append(msg[last:])
+
+    def _text(self, i, value):
+        f = self._data[self.types[i]]
+        if f is None:
+            return _floatData(value, self.config)
+        return f(value)
+
+    def build(self, values):
+        """Return the message for values, given in signature order, or
+        None if their types don't match the signature."""
+        types = self.types
+        if len(values) != len(types):
+            return None
+        for i in range(len(values)):
+            if type(values[i]) is not types[i]:
+                return None
+
+        parts = self.parts
+        out = [parts[0]]
+        for n in range(len(self.order)):
+            i = self.order[n]
+            out.append(self._text(i, values[i]))
+            out.append(parts[n + 1])
+
+        if self.encoding != None:
+            return ''.join(out).encode(self.encoding)
+        return ''.join(out)
+
 ################################################################################
 # SOAPBuilder's more public interface
 ################################################################################
 
 def buildSOAP(args=(), kw={}, method=None, namespace=None,
               header=None, methodattrs=None, envelope=1, encoding='UTF-8',
-              config=Config, noroot = 0):
+              config=Config, noroot = 0, stream = None):
+    """Serialize a SOAP message.  With stream, a file-like object, the
+    message is written to it while it is built instead of returned."""
+    t = SOAPBuilder(args=args, kw=kw, method=method, namespace=namespace,
+                    header=header, methodattrs=methodattrs,envelope=envelope,
+                    encoding=encoding, config=config,noroot=noroot)
+    if stream is None:
+        return t.build()
+
+    for chunk in t.iterbuild():
+        stream.write(chunk)
+
+def iterbuildSOAP(args=(), kw={}, method=None, namespace=None,
+                  header=None, methodattrs=None, envelope=1,
+                  encoding='UTF-8', config=Config, noroot = 0,
+                  chunk_size = 65536):
+    """Yield a SOAP message in chunks of about chunk_size bytes while it
+    is being serialized; see SOAPBuilder.iterbuild()."""
     t = SOAPBuilder(args=args, kw=kw, method=method, namespace=namespace,
                     header=header, methodattrs=methodattrs,envelope=envelope,
                     encoding=encoding, config=config,noroot=noroot)
-    return t.build()
+    return t.iterbuild(chunk_size)
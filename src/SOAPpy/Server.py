@@ -46,21 +46,31 @@ ident = '$Id: Server.py 1468 2008-05-24 01:55:33Z warnes $'
 from .version import __version__
 
 #import xml.sax
+import os
+import signal
 import socket
 import sys
 import socketserver
 from .Types import *
+import contextvars
+import http.client
 import http.server
+import inspect
+import itertools
 import _thread
+import queue
+import selectors
+import threading
+import time
 
 # SOAPpy-py3 modules
-from .Parser      import parseSOAPRPC
+from .Parser      import parseSOAPRPC, SOAPPushParser, peekSOAP
+from .Client      import HTTPTransport, SOAPAddress
 from .Config      import Config
 from .Types       import faultType, voidType, simplify
 from .NS          import NS
-from .SOAPBuilder import buildSOAP
+from .SOAPBuilder import buildSOAP, iterbuildSOAP
 from .Utilities   import debugHeader, debugFooter
-import collections
 
 try: from M2Crypto import SSL
 except: pass
@@ -75,9 +85,44 @@ from .version import __version__
 
 _contexts = dict()
 
+# Coroutine handlers share a thread, so their context lives in the task
+_task_context = contextvars.ContextVar('SOAPContext')
+
 def GetSOAPContext():
     global _contexts
-    return _contexts[_thread.get_ident()]
+    try:
+        return _contexts[_thread.get_ident()]
+    except KeyError:
+        try:
+            return _task_context.get()
+        except LookupError:
+            raise KeyError(_thread.get_ident())
+
+def _readBody(rfile, headers, read_size = 65536):
+    # Yield a request body as it is read, chunked or with Content-length
+    if 'chunked' in (headers.get("Transfer-Encoding") or '').lower():
+        while 1:
+            size = int(rfile.readline(65537).split(b';')[0], 16)
+            if size == 0:
+                # skip the trailer
+                while rfile.readline(65537) not in (b'\r\n', b'\n', b''):
+                    pass
+                return
+            while size > 0:
+                chunk = rfile.read(min(size, read_size))
+                if not chunk:
+                    raise http.client.IncompleteRead(b'', size)
+                size -= len(chunk)
+                yield chunk
+            rfile.readline(65537)
+    else:
+        length = int(headers.get("Content-length") or 0)
+        while length > 0:
+            chunk = rfile.read(min(length, read_size))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
 
 ################################################################################
 # Server
@@ -103,11 +148,23 @@ class SOAPContext:
         self.header     = header
         self.body       = body
         self.attrs      = attrs
-        self.xmldata    = xmldata
+        self._xmldata   = xmldata
         self.connection = connection
         self.httpheaders= httpheaders
         self.soapaction = soapaction
 
+    # The servers pass the request as the bytearray it was read into,
+    # copied to bytes only if asked for
+    @property
+    def xmldata(self):
+        if not isinstance(self._xmldata, bytes):
+            self._xmldata = bytes(self._xmldata)
+        return self._xmldata
+
+# An incoming call, as parsed and looked up by SOAPServerBase._parseCall
+class _SOAPCall:
+    fault = None
+
 # A class to describe how header messages are handled
 class HeaderHandler:
     # Initially fail out if there are any problems.
@@ -133,6 +190,18 @@ class HeaderHandler:
 ################################################################################
 class SOAPServerBase:
 
+    # Servers handling one connection at a time turn this off, so a client
+    # holding a persistent connection cannot lock everyone else out.
+    allow_keepalive = 1
+
+    # Servers that set this get idle persistent connections handed back
+    # through park_request() instead of having a thread wait on them.
+    park_connections = 0
+
+    def connection_requests(self, connection):
+        """Return the number of requests already served on connection."""
+        return 0
+
     def get_request(self):
         sock, addr = socketserver.TCPServer.get_request(self)
 
@@ -169,7 +238,7 @@ class SOAPServerBase:
             namespace = path.replace("/", ":")
             if namespace[0] == ":": namespace = namespace[1:]
         for i in dir(object.__class__):
-            if i[0] != "_" and isinstance(getattr(object, i), collections.Callable):
+            if i[0] != "_" and callable(getattr(object, i)):
                 self.registerKWFunction(getattr(object,i), namespace)
 
     # convenience  - wraps your func for you.
@@ -190,8 +259,440 @@ class SOAPServerBase:
 
         del self.objmap[namespace]
 
+    # The steps of dispatching a call, shared by the request handlers of
+    # the different servers.
+
+    def _parseCall(self, data, path, httpheaders, connection,
+                   ignore_ext = True, parsed = None):
+        """Parse a request and look up the method it calls.
+
+        parsed is the (method, header, body, attrs) result of parsing
+        data, if that has been done already (natively, if
+        config.simplify_objects is set).  On lookup failure the
+        returned call has its fault set to the response to send back."""
+
+        if parsed is None:
+            parsed = parseSOAPRPC(data, header = 1, body = 1, attrs = 1,
+                                  ignore_ext = ignore_ext,
+                                  native = self.config.simplify_objects,
+                                  numeric_arrays = self.config.numeric_arrays,
+                                  backend = self.config.parser_backend,
+                                  datetime_objects =
+                                      self.config.datetime_objects,
+                                  lazy = self.config.lazy_values,
+                                  config = self.config)
+        (r, header, body, attrs) = parsed
+
+        call = _SOAPCall()
+        call.method = method = r._name
+        call.args   = r._aslist()
+        call.kw     = r._asdict()
+        call.header = header
+        call.attrs  = attrs
+
+        # Handle mixed named and unnamed arguments by assuming
+        # that all arguments with names of the form "v[0-9]+"
+        # are unnamed and should be passed in numeric order,
+        # other arguments are named and should be passed using
+        # this name.
+
+        # This is a non-standard exension to the SOAP protocol,
+        # but is supported by Apache AXIS.
+
+        # It is enabled by default.  To disable, set
+        # Config.specialArgs to False.
+
+        ordered_args = {}
+        named_args   = {}
+
+        if self.config.specialArgs:
+
+            for (k,v) in  list(call.kw.items()):
+
+                if k[0]=="v":
+                    try:
+                        i = int(k[1:])
+                        ordered_args[i] = v
+                    except ValueError:
+                        named_args[str(k)] = v
+
+                else:
+                    named_args[str(k)] = v
+
+        # create list in proper order w/o names
+        keylist = list(ordered_args.keys())
+        keylist.sort()
+        call.ordered_args = [ordered_args[x] for x in keylist]
+        call.named_args   = named_args
+
+        # We have to decide namespace precedence
+        # I'm happy with the following scenario
+        # if r._ns is specified use it, if not check for
+        # a path, if it's specified convert it and use it as the
+        # namespace. If both are specified, use r._ns.
+
+        ns = r._ns
+
+        if len(path) > 1 and not ns:
+            ns = path.replace("/", ":")
+            if ns[0] == ":": ns = ns[1:]
+
+        call.ns = ns
+
+        # For fault messages
+        if ns:
+            call.nsmethod = "%s:%s" % (ns, method)
+        else:
+            call.nsmethod = method
+
+        # We're stuffing the method into the soapaction if there
+        # isn't one, someday, we'll set that on the client
+        # and it won't be necessary here
+        # for now we're doing both
+
+        if httpheaders.get("SOAPAction") in (None, "\"\""):
+            del httpheaders["SOAPAction"]
+            httpheaders["SOAPAction"] = method
+
+        call.context = SOAPContext(header, body, attrs, data, connection,
+                                   httpheaders, httpheaders["SOAPAction"])
+
+        # authorization method
+        a = f = None
+
+        try:
+            # First look for registered functions
+            if ns in self.funcmap and method in self.funcmap[ns]:
+                f = self.funcmap[ns][method]
+
+                # look for the authorization method
+                if self.config.authMethod != None:
+                    authmethod = self.config.authMethod
+                    if authmethod in self.funcmap[ns]:
+                        a = self.funcmap[ns][authmethod]
+            else:
+                # Now look at registered objects
+                # Check for nested attributes. This works even if
+                # there are none, because the split will return
+                # [method]
+                f = self.objmap[ns]
+
+                # Look for the authorization method
+                if self.config.authMethod != None:
+                    authmethod = self.config.authMethod
+                    if hasattr(f, authmethod):
+                        a = getattr(f, authmethod)
+
+                # then continue looking for the method
+                l = method.split(".")
+                for i in l:
+                    f = getattr(f, i)
+        except:
+            info = sys.exc_info()
+            try:
+                call.fault = buildSOAP(faultType("%s:Client" % NS.ENV_T,
+                                                 "Method Not Found",
+                                                 "%s : %s %s %s" %
+                                                 (call.nsmethod, info[0],
+                                                  info[1], info[2])),
+                                       encoding = self.encoding,
+                                       config = self.config)
+            finally:
+                del info
+
+        call.func = f
+        call.auth = a
+        return call
+
+    def _callArgs(self, call):
+        """Return the function, positional and keyword arguments to
+        invoke call with."""
+        f = call.func
+
+        # If it's wrapped, some special action may be needed
+        if isinstance(f, MethodSig):
+            c = None
+
+            if f.context:  # retrieve context object
+                c = call.context
+
+            if self.config.specialArgs:
+                named_args = dict(call.named_args)
+                if c:
+                    named_args["_SOAPContext"] = c
+                return f, call.ordered_args, named_args
+            elif f.keywords:
+                strkw = {}
+
+                for (k, v) in list(call.kw.items()):
+                    strkw[str(k)] = v
+                if c:
+                    strkw["_SOAPContext"] = c
+                return f, (), strkw
+            elif c:
+                return f, call.args, {'_SOAPContext':c}
+            else:
+                return f, call.args, {}
+
+        else:
+            if self.config.specialArgs:
+                return f, call.ordered_args, call.named_args
+            else:
+                return f, call.args, {}
+
+    def _authFailed(self, call):
+        return faultType("%s:Server" % NS.ENV_T, "Authorization failed.",
+                         "%s" % call.nsmethod)
+
+    def _invokeCall(self, call, checked = 0):
+        """Check headers and authorization, unless checked is set, then
+        call the method in the current thread and return its result."""
+        global _contexts
+
+        if call.header and not checked:
+            HeaderHandler(call.header, call.attrs)
+
+        # call context book keeping
+        thread_id = _thread.get_ident()
+        _contexts[thread_id] = call.context
+        try:
+            # Do an authorization check
+            if call.auth != None and not checked:
+                ok = call.auth(*(), **{"_SOAPContext" : call.context})
+                if inspect.isawaitable(ok):
+                    # a coroutine can't be awaited here, and is no answer
+                    if hasattr(ok, "close"):
+                        ok.close()
+                    ok = 0
+                if not ok:
+                    raise self._authFailed(call)
+
+            f, args, kw = self._callArgs(call)
+            return f(*args, **kw)
+        finally:
+            # Clean up _contexts
+            if thread_id in _contexts:
+                del _contexts[thread_id]
+
+    def _buildResponse(self, call, fr, chunk_size = 0):
+        """Serialize the response to a call; with chunk_size, return an
+        iterator yielding it in chunks while it is serialized."""
+        if type(fr) == type(self) and isinstance(fr, voidType):
+            kw = {'%sResponse' % call.method: fr}
+        else:
+            kw = {'%sResponse' % call.method: {'Result': fr}}
+
+        if chunk_size:
+            return iterbuildSOAP(kw = kw, encoding = self.encoding,
+                                 config = self.config,
+                                 chunk_size = chunk_size)
+        return buildSOAP(kw = kw, encoding = self.encoding,
+                         config = self.config)
+
+    def _methodFault(self, call, e):
+        """Build the fault response for an exception raised by a method."""
+        import traceback
+        info = sys.exc_info()
+
+        try:
+            if self.config.dumpFaultInfo:
+                s = 'Method %s exception' % call.nsmethod
+                debugHeader(s)
+                traceback.print_exception(info[0], info[1], info[2])
+                debugFooter(s)
+
+            if isinstance(e, faultType):
+                f = e
+            else:
+                f = faultType("%s:Server" % NS.ENV_T, "Method Failed",
+                              "%s" % call.nsmethod)
+
+            if self.config.returnFaultInfo:
+                f._setDetail("".join(traceback.format_exception(
+                    info[0], info[1], info[2])))
+            elif not hasattr(f, 'detail'):
+                f._setDetail("%s %s" % (info[0], info[1]))
+        finally:
+            del info
+
+        return buildSOAP(f, encoding = self.encoding, config = self.config)
+
+    def _requestFault(self, e):
+        """Build the fault response for a fault raised parsing a request."""
+        import traceback
+        info = sys.exc_info()
+        try:
+            if self.config.dumpFaultInfo:
+                s = 'Received fault exception'
+                debugHeader(s)
+                traceback.print_exception(info[0], info[1], info[2])
+                debugFooter(s)
+
+            if self.config.returnFaultInfo:
+                e._setDetail("".join(traceback.format_exception(
+                        info[0], info[1], info[2])))
+            elif not hasattr(e, 'detail'):
+                e._setDetail("%s %s" % (info[0], info[1]))
+        finally:
+            del info
+
+        return buildSOAP(e, encoding = self.encoding, config = self.config)
+
 class SOAPRequestHandler(http.server.BaseHTTPRequestHandler):
     ignore_ext = True
+    protocol_version = "HTTP/1.1"
+    read_size = 65536
+
+    def setup(self):
+        http.server.BaseHTTPRequestHandler.setup(self)
+
+        # Persistent connections are dropped after being idle for
+        # config.http_keepalive_timeout seconds
+        self.parked = 0
+        self.requests_handled = self.server.connection_requests(
+            self.connection)
+        timeout = self.server.config.http_keepalive_timeout
+        if timeout is not None and isinstance(self.connection, socket.socket):
+            self.connection.settimeout(timeout)
+
+    def handle(self):
+        self.close_connection = True
+
+        self.handle_one_request()
+        while not self.close_connection:
+            if self.server.park_connections and not self.pending_input():
+                # nothing to do until the client sends its next request
+                self.parked = 1
+                break
+            self.handle_one_request()
+
+    def pending_input(self):
+        """Return true if the next request can be read without waiting."""
+        if not isinstance(self.connection, socket.socket):
+            return True
+
+        timeout = self.connection.gettimeout()
+        try:
+            self.connection.setblocking(False)
+            return len(self.rfile.peek(1)) > 0
+        except OSError:
+            return True
+        finally:
+            self.connection.settimeout(timeout)
+
+    def send_connection_header(self):
+        self.requests_handled += 1
+        max_requests = self.server.config.http_keepalive_max_requests
+        if not self.server.allow_keepalive or \
+           (max_requests and self.requests_handled >= max_requests):
+            self.close_connection = True
+
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        elif self.request_version == 'HTTP/1.0':
+            self.send_header("Connection", "keep-alive")
+
+    def build_response(self, call, fr):
+        """Serialize the response, returning (data, rest).
+
+        Responses of more than config.http_chunk_size bytes to HTTP/1.1
+        clients are sent chunked while they are serialized: data is then
+        the first chunk and rest an iterator over the others, otherwise
+        rest is None.  Serialization errors in the first chunk can still
+        be answered with a fault."""
+        config = self.server.config
+        if not config.http_chunk_size or config.dumpSOAPOut or \
+           self.request_version != 'HTTP/1.1':
+            return self.server._buildResponse(call, fr), None
+
+        chunks = self.server._buildResponse(call, fr, config.http_chunk_size)
+        data = next(chunks, b'')
+        second = next(chunks, None)
+        if second is None:
+            return data, None
+        return data, itertools.chain([second], chunks)
+
+    def write_chunks(self, data, rest):
+        try:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            for data in rest:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        except Exception as e:
+            # too late for a fault; leave the response unterminated so the
+            # client sees it is broken
+            self.close_connection = True
+            if self.server.config.dumpFaultInfo:
+                import traceback
+                s = 'Response exception %s' % e
+                debugHeader(s)
+                traceback.print_exc()
+                debugFooter(s)
+            return
+        self.wfile.write(b"0\r\n\r\n")
+
+    def send_soap_response(self, status, resp, rest = None):
+        """Send a SOAP response, or fault, built already."""
+        self.send_response(status)
+
+        t = 'text/xml';
+        if self.server.encoding != None:
+            t += '; charset=%s' % self.server.encoding
+        self.send_header("Content-type", t)
+        if rest is None:
+            self.send_header("Content-length", str(len(resp)))
+        else:
+            self.send_header("Transfer-Encoding", "chunked")
+        self.send_connection_header()
+        self.end_headers()
+
+        if self.server.config.dumpHeadersOut and \
+            self.request_version != 'HTTP/0.9':
+            s = 'Outgoing HTTP headers'
+            debugHeader(s)
+            if status in self.responses:
+                s = ' ' + self.responses[status][0]
+            else:
+                s = ''
+            print("%s %d%s" % (self.protocol_version, status, s))
+            print("Server:", self.version_string())
+            print("Date:", self.__last_date_time_string)
+            print("Content-type:", t)
+            if rest is None:
+                print("Content-length:", len(resp))
+            else:
+                print("Transfer-Encoding: chunked")
+            debugFooter(s)
+
+        if self.server.config.dumpSOAPOut:
+            s = 'Outgoing SOAP'
+            debugHeader(s)
+            print(resp, end=' ')
+            if resp[-1:] != b'\n':
+                print()
+            debugFooter(s)
+
+        if rest is None:
+            self.wfile.write(resp)
+        else:
+            self.write_chunks(resp, rest)
+        self.wfile.flush()
+
+        # Persistent connections stay open for the next request.
+
+        # We should be able to shut down both a regular and an SSL
+        # connection, but under Python 2.1, calling shutdown on an
+        # SSL connections drops the output, so this work-around.
+        # This should be investigated more someday.
+
+        if not self.close_connection:
+            pass
+        elif self.server.config.SSLserver and \
+            isinstance(self.connection, SSL.Connection):
+            self.connection.set_shutdown(SSL.SSL_SENT_SHUTDOWN |
+                SSL.SSL_RECEIVED_SHUTDOWN)
+        else:
+            self.connection.shutdown(1)
+
     def version_string(self):
         return '<a href="http://pywebsvcs.sf.net">' + \
             'SOAPpy-py3 ' + __version__ + '</a> (Python ' + \
@@ -205,280 +706,67 @@ class SOAPRequestHandler(http.server.BaseHTTPRequestHandler):
         return self.__last_date_time_string
 
     def do_POST(self):
-        global _contexts
-
         status = 500
         try:
             if self.server.config.dumpHeadersIn:
                 s = 'Incoming HTTP headers'
                 debugHeader(s)
                 print(self.raw_requestline.strip())
-                print("\n".join([x.strip() for x in self.headers.headers]))
+                print(str(self.headers).strip())
                 debugFooter(s)
 
-            data = self.rfile.read(int(self.headers["Content-length"]))
+            # Parse the body as it comes in rather than after reading
+            # all of it
+            parser = SOAPPushParser(
+                header = 1, body = 1, attrs = 1, ignore_ext = self.ignore_ext,
+                native = self.server.config.simplify_objects,
+                numeric_arrays = self.server.config.numeric_arrays,
+                backend = self.server.config.parser_backend,
+                datetime_objects = self.server.config.datetime_objects,
+                lazy = self.server.config.lazy_values,
+                config = self.server.config)
+            # the body is kept in a single buffer, not copied again
+            data = bytearray()
+            error = None
+            for chunk in _readBody(self.rfile, self.headers, self.read_size):
+                data += chunk
+                if error is None:
+                    # on errors, keep reading so the connection stays usable
+                    try:
+                        parser.feed(chunk)
+                    except Exception as e:
+                        error = e
+            if error is not None:
+                raise error
 
             if self.server.config.dumpSOAPIn:
                 s = 'Incoming SOAP'
                 debugHeader(s)
-                print(data, end=' ')
-                if data[-1] != '\n':
+                print(bytes(data), end=' ')
+                if data[-1:] != b'\n':
                     print()
                 debugFooter(s)
 
-            (r, header, body, attrs) = \
-                parseSOAPRPC(data, header = 1, body = 1, attrs = 1, ignore_ext=self.ignore_ext)
-
-            method = r._name
-            args   = r._aslist()
-            kw     = r._asdict()
-
-            if self.server.config.simplify_objects:
-                args = simplify(args)
-                kw = simplify(kw)
-
-            # Handle mixed named and unnamed arguments by assuming
-            # that all arguments with names of the form "v[0-9]+"
-            # are unnamed and should be passed in numeric order,
-            # other arguments are named and should be passed using
-            # this name.
-
-            # This is a non-standard exension to the SOAP protocol,
-            # but is supported by Apache AXIS.
-
-            # It is enabled by default.  To disable, set
-            # Config.specialArgs to False.
-
-
-            ordered_args = {}
-            named_args   = {}
-
-            if self.server.config.specialArgs:
-
-                for (k,v) in  list(kw.items()):
+            call = self.server._parseCall(data, self.path, self.headers,
+                                          self.connection, self.ignore_ext,
+                                          parser.close())
 
-                    if k[0]=="v":
-                        try:
-                            i = int(k[1:])
-                            ordered_args[i] = v
-                        except ValueError:
-                            named_args[str(k)] = v
-
-                    else:
-                        named_args[str(k)] = v
-
-            # We have to decide namespace precedence
-            # I'm happy with the following scenario
-            # if r._ns is specified use it, if not check for
-            # a path, if it's specified convert it and use it as the
-            # namespace. If both are specified, use r._ns.
-
-            ns = r._ns
-
-            if len(self.path) > 1 and not ns:
-                ns = self.path.replace("/", ":")
-                if ns[0] == ":": ns = ns[1:]
-
-            # authorization method
-            a = None
-
-            keylist = list(ordered_args.keys())
-            keylist.sort()
-
-            # create list in proper order w/o names
-            tmp = [ordered_args[x] for x in keylist]
-            ordered_args = tmp
-
-            #print '<-> Argument Matching Yielded:'
-            #print '<-> Ordered Arguments:' + str(ordered_args)
-            #print '<-> Named Arguments  :' + str(named_args)
-
-            resp = ""
-
-            # For fault messages
-            if ns:
-                nsmethod = "%s:%s" % (ns, method)
-            else:
-                nsmethod = method
-
-            try:
-                # First look for registered functions
-                if ns in self.server.funcmap and \
-                    method in self.server.funcmap[ns]:
-                    f = self.server.funcmap[ns][method]
-
-                    # look for the authorization method
-                    if self.server.config.authMethod != None:
-                        authmethod = self.server.config.authMethod
-                        if ns in self.server.funcmap and \
-                               authmethod in self.server.funcmap[ns]:
-                            a = self.server.funcmap[ns][authmethod]
-                else:
-                    # Now look at registered objects
-                    # Check for nested attributes. This works even if
-                    # there are none, because the split will return
-                    # [method]
-                    f = self.server.objmap[ns]
-
-                    # Look for the authorization method
-                    if self.server.config.authMethod != None:
-                        authmethod = self.server.config.authMethod
-                        if hasattr(f, authmethod):
-                            a = getattr(f, authmethod)
-
-                    # then continue looking for the method
-                    l = method.split(".")
-                    for i in l:
-                        f = getattr(f, i)
-            except:
-                info = sys.exc_info()
-                try:
-                    resp = buildSOAP(faultType("%s:Client" % NS.ENV_T,
-                                               "Method Not Found",
-                                               "%s : %s %s %s" % (nsmethod,
-                                                                  info[0],
-                                                                  info[1],
-                                                                  info[2])),
-                                     encoding = self.server.encoding,
-                                     config = self.server.config)
-                finally:
-                    del info
+            rest = None
+            if call.fault is not None:
+                resp = call.fault
                 status = 500
             else:
                 try:
-                    if header:
-                        x = HeaderHandler(header, attrs)
-
-                    fr = 1
-
-                    # call context book keeping
-                    # We're stuffing the method into the soapaction if there
-                    # isn't one, someday, we'll set that on the client
-                    # and it won't be necessary here
-                    # for now we're doing both
-
-                    if "SOAPAction".lower() not in list(self.headers.keys()) or \
-                       self.headers["SOAPAction"] == "\"\"":
-                        self.headers["SOAPAction"] = method
-
-                    thread_id = _thread.get_ident()
-                    _contexts[thread_id] = SOAPContext(header, body,
-                                                       attrs, data,
-                                                       self.connection,
-                                                       self.headers,
-                                                       self.headers["SOAPAction"])
-
-                    # Do an authorization check
-                    if a != None:
-                        if not a(*(), **{"_SOAPContext" :
-                                             _contexts[thread_id] }):
-                            raise faultType("%s:Server" % NS.ENV_T,
-                                            "Authorization failed.",
-                                            "%s" % nsmethod)
-
-                    # If it's wrapped, some special action may be needed
-                    if isinstance(f, MethodSig):
-                        c = None
-
-                        if f.context:  # retrieve context object
-                            c = _contexts[thread_id]
-
-                        if self.server.config.specialArgs:
-                            if c:
-                                named_args["_SOAPContext"] = c
-                            fr = f(*ordered_args, **named_args)
-                        elif f.keywords:
-                            # This is lame, but have to de-unicode
-                            # keywords
-
-                            strkw = {}
-
-                            for (k, v) in list(kw.items()):
-                                strkw[str(k)] = v
-                            if c:
-                                strkw["_SOAPContext"] = c
-                            fr = f(*(), **strkw)
-                        elif c:
-                            fr = f(*args, **{'_SOAPContext':c})
-                        else:
-                            fr = f(*args, **{})
-
-                    else:
-                        if self.server.config.specialArgs:
-                            fr = f(*ordered_args, **named_args)
-                        else:
-                            fr = f(*args, **{})
-
-
-                    if type(fr) == type(self) and \
-                        isinstance(fr, voidType):
-                        resp = buildSOAP(kw = {'%sResponse' % method: fr},
-                            encoding = self.server.encoding,
-                            config = self.server.config)
-                    else:
-                        resp = buildSOAP(kw =
-                            {'%sResponse' % method: {'Result': fr}},
-                            encoding = self.server.encoding,
-                            config = self.server.config)
-
-                    # Clean up _contexts
-                    if thread_id in _contexts:
-                        del _contexts[thread_id]
-
+                    fr = self.server._invokeCall(call)
+                    resp, rest = self.build_response(call, fr)
                 except Exception as e:
-                    import traceback
-                    info = sys.exc_info()
-
-                    try:
-                        if self.server.config.dumpFaultInfo:
-                            s = 'Method %s exception' % nsmethod
-                            debugHeader(s)
-                            traceback.print_exception(info[0], info[1],
-                                                      info[2])
-                            debugFooter(s)
-
-                        if isinstance(e, faultType):
-                            f = e
-                        else:
-                            f = faultType("%s:Server" % NS.ENV_T,
-                                          "Method Failed",
-                                          "%s" % nsmethod)
-
-                        if self.server.config.returnFaultInfo:
-                            f._setDetail("".join(traceback.format_exception(
-                                info[0], info[1], info[2])))
-                        elif not hasattr(f, 'detail'):
-                            f._setDetail("%s %s" % (info[0], info[1]))
-                    finally:
-                        del info
-
-                    resp = buildSOAP(f, encoding = self.server.encoding,
-                       config = self.server.config)
+                    resp = self.server._methodFault(call, e)
                     status = 500
                 else:
                     status = 200
         except faultType as e:
-            import traceback
-            info = sys.exc_info()
-            try:
-                if self.server.config.dumpFaultInfo:
-                    s = 'Received fault exception'
-                    debugHeader(s)
-                    traceback.print_exception(info[0], info[1],
-                        info[2])
-                    debugFooter(s)
-
-                if self.server.config.returnFaultInfo:
-                    e._setDetail("".join(traceback.format_exception(
-                            info[0], info[1], info[2])))
-                elif not hasattr(e, 'detail'):
-                    e._setDetail("%s %s" % (info[0], info[1]))
-            finally:
-                del info
-
-            resp = buildSOAP(e, encoding = self.server.encoding,
-                config = self.server.config)
-            status = 500
+            # a request that is not acceptable, read in full already
+            self.send_soap_response(500, self.server._requestFault(e))
         except Exception as e:
             # internal error, report as HTTP server error
 
@@ -494,7 +782,12 @@ class SOAPRequestHandler(http.server.BaseHTTPRequestHandler):
 
                 debugFooter(s)
 
+            # the rest of a broken request may still be unread
+            self.close_connection = True
+
             self.send_response(500)
+            self.send_header("Content-length", "0")
+            self.send_connection_header()
             self.end_headers()
 
             if self.server.config.dumpHeadersOut and \
@@ -511,52 +804,7 @@ class SOAPRequestHandler(http.server.BaseHTTPRequestHandler):
                 debugFooter(s)
         else:
             # got a valid SOAP response
-            self.send_response(status)
-
-            t = 'text/xml';
-            if self.server.encoding != None:
-                t += '; charset=%s' % self.server.encoding
-            self.send_header("Content-type", t)
-            self.send_header("Content-length", str(len(resp)))
-            self.end_headers()
-
-            if self.server.config.dumpHeadersOut and \
-                self.request_version != 'HTTP/0.9':
-                s = 'Outgoing HTTP headers'
-                debugHeader(s)
-                if status in self.responses:
-                    s = ' ' + self.responses[status][0]
-                else:
-                    s = ''
-                print("%s %d%s" % (self.protocol_version, status, s))
-                print("Server:", self.version_string())
-                print("Date:", self.__last_date_time_string)
-                print("Content-type:", t)
-                print("Content-length:", len(resp))
-                debugFooter(s)
-
-            if self.server.config.dumpSOAPOut:
-                s = 'Outgoing SOAP'
-                debugHeader(s)
-                print(resp, end=' ')
-                if resp[-1] != '\n':
-                    print()
-                debugFooter(s)
-
-            self.wfile.write(resp)
-            self.wfile.flush()
-
-            # We should be able to shut down both a regular and an SSL
-            # connection, but under Python 2.1, calling shutdown on an
-            # SSL connections drops the output, so this work-around.
-            # This should be investigated more someday.
-
-            if self.server.config.SSLserver and \
-                isinstance(self.connection, SSL.Connection):
-                self.connection.set_shutdown(SSL.SSL_SENT_SHUTDOWN |
-                    SSL.SSL_RECEIVED_SHUTDOWN)
-            else:
-                self.connection.shutdown(1)
+            self.send_soap_response(status, resp, rest)
 
         def do_GET(self):
 
@@ -629,6 +877,8 @@ class SOAPInsecureRequestHandler(http.server.BaseHTTPRequestHandler):
 
 class SOAPServer(SOAPServerBase, socketserver.TCPServer):
 
+    allow_keepalive = 0
+
     def __init__(self, addr = ('localhost', 8000),
         RequestHandler = SOAPRequestHandler, log = 0, encoding = 'UTF-8',
         config = Config, namespace = None, ssl_context = None):
@@ -678,11 +928,483 @@ class ThreadingSOAPServer(SOAPServerBase, socketserver.ThreadingTCPServer):
 
         socketserver.ThreadingTCPServer.__init__(self, addr, RequestHandler)
 
+class PooledSOAPServer(SOAPServerBase, socketserver.TCPServer):
+    """SOAP server handing connections to a fixed pool of worker threads.
+
+    Accepted connections wait in a queue of at most queue_size entries
+    until one of the pool_size workers is free.  When the queue is full
+    the connection is answered straight away with a 503 response carrying
+    a SOAP Server fault.
+
+    Persistent connections do not tie up a worker between requests: once
+    a response is sent the connection is parked, and a poller thread puts
+    it back on the queue as soon as the next request arrives, or closes it
+    after config.http_keepalive_timeout idle seconds.
+
+    The queued, active, idle and rejected attributes count connections
+    waiting for a worker, connections being handled, parked connections
+    and connections turned away so far."""
+
+    park_connections = 1
+
+    def __init__(self, addr = ('localhost', 8000),
+        RequestHandler = SOAPRequestHandler, log = 0, encoding = 'UTF-8',
+        config = Config, namespace = None, ssl_context = None,
+        pool_size = 10, queue_size = 50):
+
+        # Test the encoding, raising an exception if it's not known
+        if encoding != None:
+            ''.encode(encoding)
+
+        if ssl_context != None and not config.SSLserver:
+            raise AttributeError("SSL server not supported by this Python installation")
+
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+
+        self.namespace          = namespace
+        self.objmap             = {}
+        self.funcmap            = {}
+        self.ssl_context        = ssl_context
+        self.encoding           = encoding
+        self.config             = config
+        self.log                = log
+
+        self.allow_reuse_address= 1
+
+        socketserver.TCPServer.__init__(self, addr, RequestHandler)
+
+        self.queued             = 0
+        self.active             = 0
+        self.idle               = 0
+        self.rejected           = 0
+        self.reject_timeout     = 0.5
+        self.reject_drain       = 65536
+        self._count_lock        = threading.Lock()
+        self._requests          = queue.Queue(queue_size)
+        self._workers           = []
+
+        # parked connections, and the requests already served on them
+        self._parked            = []
+        # rejected connections, to be drained and closed by the poller
+        self._rejecting         = []
+        self._handled           = {}
+        self._closing           = 0
+        self._selector          = selectors.DefaultSelector()
+        self._wakeup, self._waker = socket.socketpair()
+        self._wakeup.setblocking(False)
+        self._selector.register(self._wakeup, selectors.EVENT_READ)
+
+        for i in range(pool_size):
+            t = threading.Thread(target = self._worker,
+                                 name = "PooledSOAPServer-%d" % i)
+            t.daemon = True
+            t.start()
+            self._workers.append(t)
+
+        self._poller_thread = threading.Thread(target = self._poller,
+                                               name = "PooledSOAPServer-poll")
+        self._poller_thread.daemon = True
+        self._poller_thread.start()
+
+    def process_request(self, request, client_address):
+        with self._count_lock:
+            self.queued += 1
+        try:
+            self._requests.put_nowait((request, client_address))
+        except queue.Full:
+            with self._count_lock:
+                self.queued -= 1
+                self._handled.pop(request, None)
+                self.rejected += 1
+            self.reject_request(request, client_address)
+
+    def reject_request(self, request, client_address):
+        """Answer a connection the pool has no room for.
+
+        The response is sent without waiting for the request.  Closing the
+        socket with unread data resets the connection before the client
+        gets to see the response, so the poller thread then reads and
+        discards at most reject_drain bytes of the request, for at most
+        reject_timeout seconds, before closing the connection; the client
+        of a larger or slower request may not see the response."""
+        resp = buildSOAP(faultType("%s:Server" % NS.ENV_T, "Server Busy",
+                                   "all %d workers are busy" %
+                                   len(self._workers)),
+                         encoding = self.encoding, config = self.config)
+        if isinstance(resp, str):
+            resp = resp.encode(self.encoding or 'UTF-8')
+
+        t = 'text/xml'
+        if self.encoding != None:
+            t += '; charset=%s' % self.encoding
+
+        head = "HTTP/1.0 503 Service Unavailable\r\n" \
+               "Content-type: %s\r\n" \
+               "Content-length: %d\r\n" \
+               "Retry-After: 1\r\n" \
+               "Connection: close\r\n\r\n" % (t, len(resp))
+        try:
+            request.setblocking(False)
+            request.sendall(head.encode('latin-1') + resp)
+            request.shutdown(socket.SHUT_WR)
+        except OSError:
+            self.shutdown_request(request)
+            return
+
+        with self._count_lock:
+            if self._closing:
+                self.shutdown_request(request)
+                return
+            self._rejecting.append(request)
+        self._waker.send(b'x')
+
+    def _worker(self):
+        while 1:
+            item = self._requests.get()
+            if item is None:
+                break
+
+            request, client_address = item
+            with self._count_lock:
+                self.queued -= 1
+                self.active += 1
+            handler = None
+            try:
+                handler = self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                if getattr(handler, 'parked', 0):
+                    self.park_request(request, client_address,
+                                      handler.requests_handled)
+                else:
+                    self.shutdown_request(request)
+                with self._count_lock:
+                    self.active -= 1
+
+    def finish_request(self, request, client_address):
+        return self.RequestHandlerClass(request, client_address, self)
+
+    def connection_requests(self, connection):
+        with self._count_lock:
+            return self._handled.pop(connection, 0)
+
+    def park_request(self, request, client_address, requests_handled):
+        """Wait for the next request on an idle persistent connection."""
+        with self._count_lock:
+            if self._closing:
+                self.shutdown_request(request)
+                return
+            self._parked.append((request, client_address, requests_handled))
+            self.idle += 1
+        self._waker.send(b'x')
+
+    def _poller(self):
+        registered = {}
+        # rejected connections: [deadline, bytes left to read]
+        draining = {}
+
+        while not self._closing:
+            timeout = self.config.http_keepalive_timeout
+            if timeout is not None:
+                timeout = min(timeout, 1)
+            if draining:
+                left = max(0, min(d for d, n in draining.values()) -
+                           time.monotonic())
+                if timeout is None or left < timeout:
+                    timeout = left
+
+            for key, mask in self._selector.select(timeout):
+                if key.fileobj is self._wakeup:
+                    try:
+                        while self._wakeup.recv(4096):
+                            pass
+                    except OSError:
+                        pass
+                    continue
+
+                request = key.fileobj
+                if request in draining:
+                    self._drainRejected(request, draining)
+                    continue
+
+                self._selector.unregister(request)
+                client_address, requests_handled, stamp = \
+                    registered.pop(request)
+                with self._count_lock:
+                    self.idle -= 1
+                    self._handled[request] = requests_handled
+                self.process_request(request, client_address)
+
+            with self._count_lock:
+                parked, self._parked = self._parked, []
+                rejected, self._rejecting = self._rejecting, []
+
+            deadline = time.monotonic() + self.reject_timeout
+            for request in rejected:
+                draining[request] = [deadline, self.reject_drain]
+                self._selector.register(request, selectors.EVENT_READ)
+            for request, (deadline, left) in list(draining.items()):
+                if deadline <= time.monotonic():
+                    self._closeRejected(request, draining)
+
+            now = time.time()
+            for request, client_address, requests_handled in parked:
+                registered[request] = (client_address, requests_handled, now)
+                self._selector.register(request, selectors.EVENT_READ)
+
+            timeout = self.config.http_keepalive_timeout
+            if timeout is not None:
+                for request, (client_address, requests_handled, stamp) in \
+                        list(registered.items()):
+                    if now - stamp > timeout:
+                        self._closeParked(request, registered)
+
+        for request in list(registered.keys()):
+            self._closeParked(request, registered)
+        for request in list(draining.keys()):
+            self._closeRejected(request, draining)
+
+    def _closeParked(self, request, registered):
+        self._selector.unregister(request)
+        del registered[request]
+        with self._count_lock:
+            self.idle -= 1
+        self.shutdown_request(request)
+
+    def _drainRejected(self, request, draining):
+        try:
+            chunk = request.recv(min(65536, draining[request][1]))
+        except BlockingIOError:
+            return
+        except OSError:
+            chunk = b''
+        draining[request][1] -= len(chunk)
+        if not chunk or draining[request][1] <= 0:
+            self._closeRejected(request, draining)
+
+    def _closeRejected(self, request, draining):
+        self._selector.unregister(request)
+        del draining[request]
+        self.shutdown_request(request)
+
+    def server_close(self):
+        socketserver.TCPServer.server_close(self)
+
+        with self._count_lock:
+            self._closing = 1
+            parked, self._parked = self._parked, []
+            rejected, self._rejecting = self._rejecting, []
+            self.idle -= len(parked)
+        for request, client_address, requests_handled in parked:
+            self.shutdown_request(request)
+        for request in rejected:
+            self.shutdown_request(request)
+        self._waker.send(b'x')
+        self._poller_thread.join()
+
+        for t in self._workers:
+            self._requests.put(None)
+        for t in self._workers:
+            t.join()
+        self._workers = []
+
+        self._selector.close()
+        self._wakeup.close()
+        self._waker.close()
+
+# only define class if the platform can fork
+if hasattr(os, "fork"):
+
+    class PreforkSOAPServer(SOAPServerBase, socketserver.TCPServer):
+        """SOAP server running its requests in several worker processes.
+
+        serve_forever() forks `workers` processes (one per CPU by default)
+        which all accept connections on the same port, either from the
+        listening socket inherited from the parent or, with reuse_port,
+        from a socket of their own bound with SO_REUSEPORT so the kernel
+        spreads the connections between them.  Everything registered
+        before serve_forever() is called is available in every worker.
+
+        The parent restarts workers that die.  SIGTERM (or shutdown())
+        makes the workers stop accepting, finish the request at hand and
+        exit; those still running after drain_timeout seconds are killed.
+
+        Each worker handles one connection at a time, so connections are
+        closed after every response as with SOAPServer."""
+
+        allow_keepalive = 0
+
+        def __init__(self, addr = ('localhost', 8000),
+            RequestHandler = SOAPRequestHandler, log = 0, encoding = 'UTF-8',
+            config = Config, namespace = None, ssl_context = None,
+            workers = None, reuse_port = 0, drain_timeout = 30):
+
+            # Test the encoding, raising an exception if it's not known
+            if encoding != None:
+                ''.encode(encoding)
+
+            if ssl_context != None and not config.SSLserver:
+                raise AttributeError("SSL server not supported by this Python installation")
+
+            if reuse_port and not hasattr(socket, "SO_REUSEPORT"):
+                raise AttributeError("SO_REUSEPORT not supported on this platform")
+
+            self.namespace          = namespace
+            self.objmap             = {}
+            self.funcmap            = {}
+            self.ssl_context        = ssl_context
+            self.encoding           = encoding
+            self.config             = config
+            self.log                = log
+
+            self.allow_reuse_address= 1
+
+            self.workers            = workers or os.cpu_count() or 1
+            self.reuse_port         = reuse_port
+            self.drain_timeout      = drain_timeout
+            self.pids               = {}
+            self.restarts           = 0
+
+            self._stopping          = 0
+            self._stopped           = threading.Event()
+            self._stopped.set()
+
+            socketserver.TCPServer.__init__(self, addr, RequestHandler,
+                                            bind_and_activate = False)
+            try:
+                if reuse_port:
+                    # The parent only holds on to the port; a socket that
+                    # is bound but not listening gets no connections.
+                    self.socket.setsockopt(socket.SOL_SOCKET,
+                                           socket.SO_REUSEPORT, 1)
+                    self.server_bind()
+                else:
+                    self.server_bind()
+                    self.server_activate()
+            except:
+                self.server_close()
+                raise
+
+        def serve_forever(self, poll_interval = 0.5):
+            self._stopping = 0
+            self._stopped.clear()
+
+            if threading.current_thread() is threading.main_thread():
+                old_handler = signal.signal(signal.SIGTERM, self._terminate)
+            else:
+                old_handler = None
+
+            try:
+                while not self._stopping:
+                    self._reap()
+                    while len(self.pids) < self.workers and \
+                          not self._stopping:
+                        self._spawn()
+                    time.sleep(poll_interval)
+            finally:
+                self._drain()
+                if old_handler is not None:
+                    signal.signal(signal.SIGTERM, old_handler)
+                self._stopped.set()
+
+        def shutdown(self):
+            self._stopping = 1
+            self._stopped.wait()
+
+        def _terminate(self, signum, frame):
+            self._stopping = 1
+
+        def _reap(self):
+            while self.pids:
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    self.pids.clear()
+                    break
+                if pid == 0:
+                    break
+
+                started = self.pids.pop(pid, None)
+                if started is not None and not self._stopping:
+                    self.restarts += 1
+                    # don't restart workers in a tight loop if they keep
+                    # failing straight away
+                    if time.time() - started < 1:
+                        time.sleep(1)
+
+        def _spawn(self):
+            pid = os.fork()
+            if pid:
+                self.pids[pid] = time.time()
+                return
+
+            status = 1
+            try:
+                self._worker()
+                status = 0
+            except:
+                import traceback
+                traceback.print_exc()
+            finally:
+                os._exit(status)
+
+        def _worker(self, poll_interval = 0.5):
+            self._stopping = 0
+            self.pids = {}
+            signal.signal(signal.SIGTERM, self._terminate)
+            # Ctrl-C goes to the whole process group; let the parent
+            # handle it and drain the workers
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+            if self.reuse_port:
+                sock = socket.socket(self.address_family, self.socket_type)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+                sock.bind(self.server_address)
+                self.socket.close()
+                self.socket = sock
+                self.server_activate()
+
+            # Several processes wait on the same socket; a worker that
+            # loses the race for a connection must not block in accept().
+            self.socket.setblocking(False)
+            self.timeout = poll_interval
+
+            while not self._stopping:
+                self.handle_request()
+
+            self.server_close()
+
+        def _drain(self):
+            for pid in list(self.pids.keys()):
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+
+            deadline = time.time() + self.drain_timeout
+            while self.pids and time.time() < deadline:
+                self._reap()
+                if self.pids:
+                    time.sleep(0.05)
+
+            for pid in list(self.pids.keys()):
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                    os.waitpid(pid, 0)
+                except (ProcessLookupError, ChildProcessError):
+                    pass
+            self.pids.clear()
+
 # only define class if Unix domain sockets are available
 if hasattr(socket, "AF_UNIX"):
 
     class SOAPUnixSocketServer(SOAPServerBase, socketserver.UnixStreamServer):
 
+        allow_keepalive = 0
+
         def __init__(self, addr = 8000,
             RequestHandler = SOAPRequestHandler, log = 0, encoding = 'UTF-8',
             config = Config, namespace = None, ssl_context = None):
@@ -710,3 +1432,217 @@ if hasattr(socket, "AF_UNIX"):
 
 
 
+
+################################################################################
+# SOAP Gateway
+################################################################################
+
+# Headers that concern a single connection, and are not passed on
+_hop_headers = frozenset(["connection", "keep-alive", "proxy-authenticate",
+                          "proxy-authorization", "te", "trailer",
+                          "transfer-encoding", "upgrade", "host",
+                          "content-length"])
+
+class SOAPRoute:
+    """Backends the calls of a namespace, or of one method in it, are
+    forwarded to in turn, and the latency of the calls so far.
+
+    requests counts the calls forwarded and failed those no backend
+    replied to; total_time and max_time are in seconds."""
+
+    def __init__(self, namespace, method, backends, config = Config):
+        if not backends:
+            raise ValueError("a route needs at least one backend")
+
+        self.namespace  = namespace
+        self.method     = method
+        self.backends   = [SOAPAddress(b, config) for b in backends]
+        self.requests   = 0
+        self.failed     = 0
+        self.total_time = 0.0
+        self.max_time   = 0.0
+        self._next      = 0
+        self._lock      = threading.Lock()
+
+    def mean_time(self):
+        with self._lock:
+            if not self.requests:
+                return 0.0
+            return self.total_time / self.requests
+
+    def _order(self):
+        # the backends to try for the next call, starting one further on
+        # than for the previous call
+        with self._lock:
+            i = self._next
+            self._next = (i + 1) % len(self.backends)
+        return self.backends[i:] + self.backends[:i]
+
+    def _record(self, seconds, failed):
+        with self._lock:
+            self.requests += 1
+            self.failed += failed
+            self.total_time += seconds
+            if seconds > self.max_time:
+                self.max_time = seconds
+
+    def __str__(self):
+        return "%s:%s" % (self.namespace, self.method or "*")
+
+    def __repr__(self):
+        return "<%s %s at %d>" % (self.__class__.__name__, self, id(self))
+
+class SOAPGatewayRequestHandler(SOAPRequestHandler):
+    """Request handler relaying each request to the backend SOAPGateway
+    routes it to, and the backend's reply back to the client."""
+
+    def do_POST(self):
+        try:
+            data = b"".join(_readBody(self.rfile, self.headers,
+                                      self.read_size))
+
+            peek = peekSOAP(data, self.ignore_ext,
+                            self.server.config.parser_backend)
+            route = self.server._route(peek, self.path)
+
+            headers = [(k, v) for (k, v) in self.headers.items()
+                       if k.lower() not in _hop_headers]
+            status, msg, reply, resp = self.server._forward(route, data,
+                                                            headers)
+            headers = [(k, v) for (k, v) in reply.items()
+                       if k.lower() not in _hop_headers and
+                          k.lower() not in ("server", "date")]
+        except faultType as e:
+            status, msg = 500, None
+            resp = self.server._requestFault(e)
+
+            t = 'text/xml'
+            if self.server.encoding != None:
+                t += '; charset=%s' % self.server.encoding
+            headers = [("Content-type", t)]
+        except Exception as e:
+            # internal error, or a request that isn't SOAP
+            if self.server.config.dumpFaultInfo:
+                import traceback
+                s = 'Internal exception %s' % e
+                debugHeader(s)
+                traceback.print_exc()
+                debugFooter(s)
+
+            # the rest of a broken request may still be unread
+            self.close_connection = True
+            status, msg, headers, resp = 500, None, [], b''
+
+        self.send_response(status, msg)
+        for k, v in headers:
+            self.send_header(k, v)
+        self.send_header("Content-length", str(len(resp)))
+        self.send_connection_header()
+        self.end_headers()
+        self.wfile.write(resp)
+        self.wfile.flush()
+
+        if self.close_connection and isinstance(self.connection,
+                                                socket.socket):
+            self.connection.shutdown(1)
+
+class SOAPGateway(SOAPServerBase, socketserver.ThreadingTCPServer):
+    """SOAP server forwarding requests to other SOAP servers, chosen by
+    the namespace and name of the method called.
+
+    Requests are parsed only as far as peekSOAP() goes, and are forwarded
+    as they were received, over keep-alive connections from the
+    HTTPTransport pool; the backend's reply goes back to the client as it
+    is.  Routes are added with addRoute().  Calls go to the backends of a
+    route in turn, skipping backends that refuse the connection; a
+    backend that doesn't answer within upstream_timeout seconds fails
+    the call.  report() returns the latency of the calls along each
+    route, as text."""
+
+    def __init__(self, addr = ('localhost', 8000),
+        RequestHandler = SOAPGatewayRequestHandler, log = 0,
+        encoding = 'UTF-8', config = Config, ssl_context = None,
+        upstream_timeout = 60):
+
+        # Test the encoding, raising an exception if it's not known
+        if encoding != None:
+            ''.encode(encoding)
+
+        if ssl_context != None and not config.SSLserver:
+            raise AttributeError("SSL server not supported by this Python installation")
+
+        self.namespace          = None
+        self.objmap             = {}
+        self.funcmap            = {}
+        self.ssl_context        = ssl_context
+        self.encoding           = encoding
+        self.config             = config
+        self.log                = log
+
+        self.allow_reuse_address= 1
+
+        self.routes             = {}
+        self.upstream_timeout   = upstream_timeout
+        self.transport          = HTTPTransport()
+
+        socketserver.ThreadingTCPServer.__init__(self, addr, RequestHandler)
+
+    def addRoute(self, backends, namespace = '', method = None):
+        """Forward the calls of method in namespace, or of any method in
+        it that has no route of its own if method is None, to the backend
+        URLs in turn.  Returns the SOAPRoute."""
+        route = SOAPRoute(namespace, method, backends, self.config)
+        self.routes[(namespace, method)] = route
+        return route
+
+    def report(self):
+        """Return a line of latency statistics for each route."""
+        lines = []
+        for key in sorted(self.routes, key = lambda k: (k[0], k[1] or '')):
+            r = self.routes[key]
+            lines.append("%s  %d requests, %d failed, "
+                         "mean %.2f ms, max %.2f ms" %
+                         (r, r.requests, r.failed, r.mean_time() * 1e3,
+                          r.max_time * 1e3))
+        return "\n".join(lines)
+
+    def _route(self, peek, path):
+        # As for local calls, a path stands in for a missing namespace
+        ns = peek.namespace or ''
+        if len(path) > 1 and not ns:
+            ns = path.replace("/", ":")
+            if ns[0] == ":": ns = ns[1:]
+
+        route = self.routes.get((ns, peek.method)) or \
+                self.routes.get((ns, None))
+        if route is None:
+            raise faultType("%s:Client" % NS.ENV_T, "Method Not Found",
+                            "%s:%s" % (ns, peek.method))
+        return route
+
+    def _forward(self, route, data, headers):
+        """Post data to the backends of route until one replies, and
+        return (code, msg, headers, data) of the reply."""
+        start = time.monotonic()
+        failed = 1
+        try:
+            for addr in route._order():
+                try:
+                    reply = self.transport.forward(addr, data, headers,
+                                                   self.config,
+                                                   self.upstream_timeout)
+                except ConnectionRefusedError as e:
+                    # nothing was sent; try the next backend
+                    error = e
+                    continue
+                except Exception as e:
+                    # the backend may have seen the call already
+                    error = e
+                    break
+                failed = 0
+                return reply
+
+            raise faultType("%s:Server" % NS.ENV_T, "Backend Failed",
+                            "%s: %s" % (route, error))
+        finally:
+            route._record(time.monotonic() - start, failed)
@@ -57,6 +57,8 @@ import urllib.request, urllib.parse, urllib.error
 import copy
 import re
 import time
+import datetime
+import types
 from .Types import *
 
 # SOAPpy-py3 modules
@@ -80,26 +82,44 @@ def isPublic(name):  return name[0]!='_'
 # Types and Wrappers
 ###############################################################################
 
+# The attributes of an instance that has none; read-only, so that it can
+# be shared
+_noattrs = types.MappingProxyType({})
+
 class anyType:
     _validURIs = (NS.XSD, NS.XSD2, NS.XSD3, NS.ENC)
 
+    # Defaults of the private fields; instances only store those that
+    # differ, which keeps the many objects of a large message small
+    _ns = None
+    _typed = 1
+    _attrs = _noattrs
+    _cache = None
+    _data = None
+
     def __init__(self, data = None, name = None, typed = 1, attrs = None):
-        if self.__class__ == anyType:
+        cls = self.__class__
+        if cls == anyType:
             raise Error("anyType can't be instantiated directly")
 
         if type(name) in (list, tuple):
-            self._ns, self._name = name
+            if name[0] is not None:
+                self._ns = name[0]
+            self._name = name[1]
         else:
             self._ns = self._validURIs[0]
             self._name = name
-            
-        self._typed = typed
-        self._attrs = {}
 
-        self._cache = None
-        self._type = self._typeName()
+        if typed != 1:
+            self._typed = typed
+
+        # the type name is the same for all instances of a class
+        if '_type' not in cls.__dict__:
+            cls._type = self._typeName()
 
-        self._data = self._checkValueSpace(data)
+        data = self._checkValueSpace(data)
+        if data is not None:
+            self._data = data
 
         if attrs != None:
             self._setAttrs(attrs)
@@ -157,6 +177,8 @@ class anyType:
         if type(value) is StringType:
             value = str(value)
 
+        if self._attrs is _noattrs:
+            self._attrs = {}
         self._attrs[attr] = value
             
 
@@ -437,6 +459,25 @@ class durationType(anyType):
 class timeDurationType(durationType):
     _validURIs = (NS.XSD, NS.XSD2, NS.ENC)
 
+def _utcFields(d):
+    # the fields of a datetime object as dateTimeType holds them, in UTC
+    # if it has a timezone
+    offset = d.utcoffset()
+    if offset:
+        d = d - offset
+    second = d.second
+    if d.microsecond:
+        second += d.microsecond / 1000000.0
+    return (d.year, d.month, d.day, d.hour, d.minute, second)
+
+def _fraction(f):
+    # the fractional part f of a number of seconds, as ".ddd" to the
+    # microsecond; "%g" would write small fractions with an exponent
+    s = ("%.6f" % f).rstrip('0')
+    if s[0] != '0' or s == '0.':
+        return ''
+    return s[1:]
+
 class dateTimeType(anyType):
     _validURIs = (NS.XSD3,)
 
@@ -460,6 +501,8 @@ class dateTimeType(anyType):
                 data = list(data[:6])
 
                 cleanDate(data)
+            elif isinstance(data, datetime.datetime):
+                return _utcFields(data)
             else:
                 raise Exception("invalid type")
         except Exception as e:
@@ -470,13 +513,16 @@ class dateTimeType(anyType):
     def _marshalData(self):
         if self._cache == None:
             d = self._data
-            s = "%04d-%02d-%02dT%02d:%02d:%02d" % ((abs(d[0]),) + d[1:])
-            if d[0] < 0:
-                s = '-' + s
             f = d[5] - int(d[5])
-            if f != 0:
-                s += ("%g" % f)[1:]
-            s += 'Z'
+            if f == 0 and d[0] >= 0:
+                s = "%04d-%02d-%02dT%02d:%02d:%02dZ" % d
+            else:
+                s = "%04d-%02d-%02dT%02d:%02d:%02d" % ((abs(d[0]),) + d[1:])
+                if d[0] < 0:
+                    s = '-' + s
+                if f != 0:
+                    s += _fraction(f)
+                s += 'Z'
 
             self._cache = s
 
@@ -555,7 +601,7 @@ class recurringInstantType(anyType):
                 f = abs(d[5] - int(d[5]))
 
                 if f:
-                    e[5] += ("%g" % f)[1:]
+                    e[5] += _fraction(f)
 
             s = "%s%s-%s-%sT%s:%s:%sZ" % ((neg,) + tuple(e))
 
@@ -580,6 +626,9 @@ class timeType(anyType):
                 data[2] += f
             elif type(data) in (int, LongType):
                 data = time.gmtime(data)[3:6]
+            elif isinstance(data, datetime.time):
+                return _utcFields(datetime.datetime.combine(
+                    datetime.date(2000, 1, 1), data))[3:]
             elif type(data) in (list, tuple):
                 if len(data) == 9:
                     data = data[3:6]
@@ -610,7 +659,7 @@ class timeType(anyType):
             s = "%02d:%02d:%02d" % d
             f = d[2] - int(d[2])
             if f != 0:
-                s += ("%g" % f)[1:]
+                s += _fraction(f)
             s += 'Z'
 
             self._cache = s
@@ -624,6 +673,10 @@ class dateType(anyType):
                 data = time.gmtime(time.time())[0:3]
             elif type(data) in (int, LongType, FloatType):
                 data = time.gmtime(data)[0:3]
+            elif isinstance(data, datetime.datetime):
+                return _utcFields(data)[:3]
+            elif isinstance(data, datetime.date):
+                return (data.year, data.month, data.day)
             elif type(data) in (list, tuple):
                 if len(data) == 9:
                     data = data[0:3]
@@ -949,6 +1002,12 @@ class hexBinaryType(anyType):
 
         return self._cache
 
+def _encodeBase64(data):
+    # str is sent as its UTF-8 encoding
+    if type(data) is not bytes:
+        data = data.encode('utf-8')
+    return base64.encodebytes(data).decode('ascii')
+
 class base64BinaryType(anyType):
     _validURIs = (NS.XSD3,)
 
@@ -956,14 +1015,14 @@ class base64BinaryType(anyType):
         if data == None:
             raise ValueError("must supply initial %s value" % self._type)
 
-        if type(data) not in (StringType, UnicodeType):
+        if type(data) not in (StringType, UnicodeType, bytes):
             raise AttributeError("invalid %s type" % self._type)
 
         return data
 
     def _marshalData(self):
         if self._cache == None:
-            self._cache = base64.encodestring(self._data)
+            self._cache = _encodeBase64(self._data)
 
         return self._cache
 
@@ -983,7 +1042,7 @@ class binaryType(anyType):
     def _marshalData(self):
         if self._cache == None:
             if self._getAttr((None, 'encoding')) == 'base64':
-                self._cache = base64.encodestring(self._data)
+                self._cache = _encodeBase64(self._data)
             else:
                 self._cache = encodeHexString(self._data)
 
@@ -1277,12 +1336,12 @@ class compoundType(anyType):
 
     def _asdict(self, item=None, encoding=Config.dict_encoding):
         if item is not None:
-            if type(item) in (UnicodeType,StringType):
-                item = item.encode(encoding)
+            if isinstance(item, bytes):
+                item = item.decode(encoding)
             return self.__dict__[item]
         else:
             retval = {}
-            def fun(x): retval[x.encode(encoding)] = self.__dict__[x]
+            def fun(x): retval[x] = self.__dict__[x]
 
             if hasattr(self, '_keyord'):
                 list(map( fun, self._keyord))
@@ -1438,12 +1497,12 @@ class arrayType(collections.UserList, compoundType):
 
     def _asdict(self, item=None, encoding=Config.dict_encoding):
         if item is not None:
-            if type(item) in (UnicodeType,StringType):
-                item = item.encode(encoding)
+            if isinstance(item, bytes):
+                item = item.decode(encoding)
             return self.data[int(item)]
         else:
             retval = {}
-            def fun(x): retval[str(x).encode(encoding)] = self.data[x]
+            def fun(x): retval[str(x)] = self.data[x]
             
             list(map( fun, list(range(len(self.data))) ))
             return retval
@@ -1594,6 +1653,176 @@ class typedArrayType(arrayType):
         self._type = typed
         self._complexType = complexType
 
+# Containers whose simple values are converted from their text when first
+# read; the parser builds these instead of structType, arrayType and
+# typedArrayType when asked to parse lazily.  A value that fails to
+# convert raises its error from the access that reads it.
+
+class LazyValue:
+    """The text of a simple value, kept with the converter for its type
+    (see SOAPParser.converters) until the value is read."""
+    __slots__ = ('convert', 'parser', 'text', 'attrs')
+
+    def __init__(self, convert, parser, text, attrs):
+        self.convert = convert
+        self.parser = parser
+        self.text = text
+        self.attrs = attrs
+
+    def value(self):
+        data = self.convert(self.parser, self.text, self.attrs,
+                            self.parser._config)
+        if data is None:
+            return self.text
+        return data
+
+    def __repr__(self):
+        return "<LazyValue %r>" % self.text
+
+def _convertLazy(data):
+    # converts the LazyValues in the list data, or its lists, in place
+    for i in range(len(data)):
+        v = data[i]
+        if v.__class__ is LazyValue:
+            data[i] = v.value()
+        elif v.__class__ is list:
+            _convertLazy(v)
+
+class lazyStructType(structType):
+    _type = 'struct'
+
+    # the values not read yet, by name; a list of them for repeated names
+    _lazy = None
+
+    def __getattr__(self, name):
+        lazy = self.__dict__.get('_lazy')
+        if not lazy or name not in lazy:
+            raise AttributeError(name)
+
+        value = lazy[name]
+        if value.__class__ is LazyValue:
+            value = value.value()
+        else:
+            value = [v.value() for v in value]
+
+        del lazy[name]
+        self.__dict__[name] = value
+        return value
+
+    def _convert(self, *names):
+        lazy = self._lazy
+        if lazy:
+            for name in names or list(lazy):
+                if name in lazy and name not in self.__dict__:
+                    self.__getattr__(name)
+
+    def _aslist(self, item=None):
+        if item is None:
+            self._convert()
+        else:
+            self._convert(self._keyord[item])
+        return structType._aslist(self, item)
+
+    def _asdict(self, item=None, encoding=Config.dict_encoding):
+        if isinstance(item, bytes):
+            item = item.decode(encoding)
+        if item is None:
+            self._convert()
+        else:
+            self._convert(item)
+        return structType._asdict(self, item, encoding)
+
+    def __getitem__(self, item):
+        if not isinstance(item, str):
+            self._convert(self._keyord[item])
+        return structType.__getitem__(self, item)
+
+    def _keys(self):
+        self._convert()
+        return structType._keys(self)
+
+    def _getItemAsList(self, name, default = []):
+        self._convert(name)
+        return structType._getItemAsList(self, name, default)
+
+    def _addItem(self, name, value, attrs = None):
+        lazy = self._lazy
+
+        if lazy and name in lazy:
+            if value.__class__ is LazyValue:
+                if lazy[name].__class__ is LazyValue:
+                    lazy[name] = [lazy[name], value]
+                else:
+                    lazy[name].append(value)
+                return
+
+            self._convert(name)
+        elif value.__class__ is LazyValue:
+            if name not in self.__dict__:
+                if lazy is None:
+                    lazy = self._lazy = {}
+                lazy[name] = value
+                self._keyord.append(name)
+                return
+
+            value = value.value()
+
+        structType._addItem(self, name, value, attrs)
+
+    def _placeItem(self, name, value, pos, subpos = 0, attrs = None):
+        self._convert(name)
+        structType._placeItem(self, name, value, pos, subpos, attrs)
+
+    def __getstate__(self):
+        # LazyValues hold their converter, which can't be pickled
+        self._convert()
+        return self.__dict__
+
+class _LazyItems:
+    # The LazyValues of an array are all converted the first time its
+    # items, self.data, are read after the parser added them
+
+    _lazy = 0
+
+    def _getData(self):
+        data = self.__dict__['_items']
+        if self._lazy:
+            _convertLazy(data)
+            self._lazy = 0
+        return data
+
+    def _setData(self, data):
+        self.__dict__['_items'] = data
+
+    data = property(_getData, _setData)
+
+    def __getstate__(self):
+        # LazyValues hold their converter, which can't be pickled
+        self.data
+        return self.__dict__
+
+    def _addItem(self, name, value, attrs):
+        lazy = self._lazy
+        self._lazy = 0
+        try:
+            arrayType._addItem(self, name, value, attrs)
+        finally:
+            self._lazy = lazy or value.__class__ is LazyValue
+
+    def _placeItem(self, name, value, pos, subpos, attrs = None):
+        lazy = self._lazy
+        self._lazy = 0
+        try:
+            arrayType._placeItem(self, name, value, pos, subpos, attrs)
+        finally:
+            self._lazy = lazy
+
+class lazyArrayType(_LazyItems, arrayType):
+    _type = 'array'
+
+class lazyTypedArrayType(_LazyItems, typedArrayType):
+    _type = 'typedArray'
+
 class faultType(structType, Error):
     def __init__(self, faultcode = "", faultstring = "", detail = None):
         self.faultcode = faultcode
@@ -1667,13 +1896,14 @@ class MethodFailed(Exception):
 # Convert complex SOAPpy-py3 objects to native python equivalents
 #######
 
-def simplify(object, level=0):
+def simplify(object, level=0, deep=1):
     """
     Convert the SOAPpy-py3 objects and their contents to simple python types.
 
     This function recursively converts the passed 'container' object,
     and all public subobjects. (Private subobjects have names that
-    start with '_'.)
+    start with '_'.) If deep is false, the contents are taken to be
+    simple already, as parseSOAPRPC(native=1) returns them.
     
     Conversions:
     - faultType    --> raise python exception
@@ -1697,6 +1927,12 @@ def simplify(object, level=0):
             se = SOAPException(object.faultcode, object.faultstring,
                                object.detail)
             raise se
+    elif not deep:
+        if isinstance( object, arrayType ):
+            return object._aslist()
+        elif isinstance( object, compoundType ):
+            return object._asdict()
+        return object
     elif isinstance( object, arrayType ):
         data = object._aslist()
         for k in range(len(data)):
@@ -3,6 +3,8 @@ ident = '$Id: __init__.py 541 2004-01-31 04:20:06Z warnes $'
 from .version import __version__
 
 from .Client import *
+from .AsyncClient import *
+from .AsyncServer import *
 from .Config import *
 from .Errors import *
 from .NS import *
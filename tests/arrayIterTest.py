@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for iterating over the items of large SOAP arrays as they are parsed.
+#
+################################################################################
+
+import sys
+import contextlib
+import io
+import threading
+import unittest
+import xml.sax
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+
+class ArrayIterTestCase(unittest.TestCase):
+
+    def response(self, result):
+        return buildSOAP(method = "getItemsResponse", namespace = "urn:test",
+                         kw = {"Result": result})
+
+    def chunks(self, msg, size):
+        return iter([msg[i:i + size] for i in range(0, len(msg), size)])
+
+    def testChunkSizes(self):
+        msg = self.response(list(range(1000)))
+        for size in (1, 13, 1000, len(msg)):
+            self.assertEqual(list(iterSOAPRPC(self.chunks(msg, size))),
+                             list(range(1000)))
+
+    def testSources(self):
+        msg = self.response(["a", "b", "c"])
+        self.assertEqual(list(iterSOAPRPC(msg)), ["a", "b", "c"])
+        self.assertEqual(list(iterSOAPRPC(io.BytesIO(msg))), ["a", "b", "c"])
+
+    def testStructItems(self):
+        items = [{"id": i, "name": "item %d" % i} for i in range(50)]
+        r = [x._asdict() for x in iterSOAPRPC(self.response(items))]
+        self.assertEqual(r, items)
+
+    def testIncremental(self):
+        msg = self.response(list(range(100)))
+        parser = SOAPIterParser()
+        seen = []
+
+        def source():
+            for chunk in self.chunks(msg, 64):
+                # everything parsed so far has been handed out already
+                seen.append(len(parser._stream.pending)
+                            if parser._stream else 0)
+                yield chunk
+
+        self.assertEqual(list(parser.iterparse(source())), list(range(100)))
+        self.assertTrue(parser.streamed)
+        self.assertTrue(max(seen) <= 1)
+
+    def testNotAnArray(self):
+        r = list(iterSOAPRPC(self.response(42)))
+        self.assertEqual(len(r), 1)
+        self.assertEqual(r[0].Result, 42)
+
+    def testEmptyArray(self):
+        self.assertEqual(list(iterSOAPRPC(self.response([]))), [])
+
+    def testMalformed(self):
+        msg = self.response(list(range(100)))
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertRaises(xml.sax.SAXParseException, list,
+                              iterSOAPRPC(msg[:len(msg) // 2] + b"<<<"))
+        # errors are raised, not printed
+        self.assertEqual(out.getvalue(), "")
+
+    def testFault(self):
+        msg = buildSOAP(faultType("SOAP-ENV:Server", "broken"))
+        r = list(iterSOAPRPC(msg))
+        self.assertTrue(isinstance(r[0], faultType))
+
+    def testProxy(self):
+        server = ThreadingSOAPServer(('localhost', 0))
+        server.registerFunction(lambda n: list(range(n)), funcName = "items")
+        server.registerFunction(lambda: 1, funcName = "one")
+        t = threading.Thread(target = server.serve_forever)
+        t.daemon = True
+        t.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(HTTPTransport.pool.clear)
+
+        url = 'http://localhost:%d/' % server.server_address[1]
+        proxy = SOAPProxy(url, iterate_results = 1)
+
+        r = proxy.items(20000)
+        self.assertFalse(isinstance(r, list))
+        self.assertEqual(sum(r), sum(range(20000)))
+
+        # the connection went back to the pool and is reused
+        self.assertEqual(len(HTTPTransport.pool), 1)
+        self.assertEqual(list(proxy.one()), [1])
+
+        # an abandoned iteration closes its connection
+        r = proxy.items(20000)
+        next(r)
+        r.close()
+        self.assertEqual(list(proxy.items(3)), [0, 1, 2])
+
+        self.assertRaises(faultType, list, proxy.missing())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for the asyncio client, AsyncSOAPProxy.
+#
+################################################################################
+
+import sys
+import asyncio
+import threading
+import time
+import unittest
+import http.server
+import socketserver
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+
+class EchoHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        http.server.BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def do_POST(self):
+        data = self.rfile.read(int(self.headers["Content-length"]))
+        r, header, body, attrs = parseSOAPRPC(data, header = 1, body = 1,
+                                              attrs = 1)
+        method = r._name
+        args = r._aslist()
+
+        if method == 'sleep':
+            time.sleep(args[0])
+
+        self.server.seen.append((method, r._ns,
+                                 self.headers["SOAPAction"]))
+        resp = buildSOAP(kw = {'%sResponse' % method: {'Result': args[-1]}})
+        if self.server.chunked:
+            body = b"".join([b"%x\r\n%s\r\n" % (len(resp[i:i + 64]),
+                                                 resp[i:i + 64])
+                             for i in range(0, len(resp), 64)]) + b"0\r\n\r\n"
+        else:
+            body = resp
+
+        self.send_response(200)
+        self.send_header("Content-type", "text/xml")
+        if self.server.chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+class EchoServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, chunked = 0):
+        self.connections = 0
+        self.chunked = chunked
+        self.seen = []
+        socketserver.ThreadingTCPServer.__init__(self, ('localhost', 0),
+                                                 EchoHandler)
+
+class AsyncClientTestCase(unittest.TestCase):
+
+    def startServer(self, chunked = 0):
+        server = EchoServer(chunked)
+        t = threading.Thread(target = server.serve_forever)
+        t.daemon = True
+        t.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server, 'http://localhost:%d/' % server.server_address[1]
+
+    def run_async(self, coro):
+        async def wrapper():
+            try:
+                return await coro
+            finally:
+                AsyncHTTPTransport.pool.clear()
+        return asyncio.run(wrapper())
+
+    def testCall(self):
+        server, url = self.startServer()
+        proxy = AsyncSOAPProxy(url, namespace = "urn:test")
+
+        async def go():
+            return [await proxy.echo("hello"), await proxy.echo(5),
+                    await proxy.echo(1.5)]
+
+        self.assertEqual(self.run_async(go()), ["hello", 5, 1.5])
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(server.seen[0][:2], ("echo", "urn:test"))
+
+    def testChunked(self):
+        server, url = self.startServer(chunked = 1)
+        proxy = AsyncSOAPProxy(url)
+        self.assertEqual(self.run_async(proxy.echo("x" * 1000)), "x" * 1000)
+
+    def testConcurrent(self):
+        server, url = self.startServer()
+        proxy = AsyncSOAPProxy(url)
+
+        async def go():
+            return await asyncio.gather(*[proxy.sleep(0.2, i)
+                                          for i in range(20)])
+
+        t = time.time()
+        self.assertEqual(self.run_async(go()), list(range(20)))
+        self.assertTrue(time.time() - t < 2)
+
+    def testMaxConnections(self):
+        server, url = self.startServer()
+
+        class LimitedTransport(AsyncHTTPTransport):
+            max_connections = 2
+
+        proxy = AsyncSOAPProxy(url, transport = LimitedTransport)
+
+        async def go():
+            return await asyncio.gather(*[proxy.echo(i) for i in range(10)])
+
+        self.assertEqual(self.run_async(go()), list(range(10)))
+        self.assertTrue(server.connections <= 2)
+
+    def testTimeout(self):
+        server, url = self.startServer()
+        proxy = AsyncSOAPProxy(url, timeout = 0.1)
+        self.assertRaises(SOAPTimeoutError, self.run_async, proxy.sleep(1, 0))
+
+        proxy = AsyncSOAPProxy(url)
+        self.assertRaises(SOAPTimeoutError, self.run_async,
+                          proxy.invoke("sleep", (1, 0), timeout = 0.1))
+
+    def testDirectives(self):
+        server, url = self.startServer()
+        proxy = AsyncSOAPProxy(url, namespace = "urn:a")
+
+        async def go():
+            await proxy._ns("urn:b")._sa("urn:b#echo").echo(1)
+
+        self.run_async(go())
+        self.assertEqual(server.seen[0], ("echo", "urn:b", '"urn:b#echo"'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for AsyncSOAPServer, the asyncio SOAP server.
+#
+################################################################################
+
+import sys
+import asyncio
+import threading
+import time
+import unittest
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+
+class Service:
+    async def slowEcho(self, s, delay):
+        await asyncio.sleep(delay)
+        return s
+
+    def blockingEcho(self, s, delay):
+        time.sleep(delay)
+        return s
+
+async def add(a, b):
+    return a + b
+
+async def fail():
+    raise ValueError("broken")
+
+async def whoami(_SOAPContext = None):
+    return GetSOAPContext() is _SOAPContext and _SOAPContext.soapaction
+
+async def keys(**kw):
+    return sorted(kw.keys())
+
+class AsyncServerTestCase(unittest.TestCase):
+
+    def makeServer(self):
+        server = AsyncSOAPServer(('localhost', 0))
+        server.registerObject(Service(), "urn:service")
+        server.registerFunction(add)
+        server.registerFunction(fail)
+        server.registerFunction(MethodSig(whoami, context = 1))
+        server.registerKWFunction(keys)
+        return server
+
+    def run_async(self, coro):
+        async def wrapper():
+            server = self.makeServer()
+            await server.start()
+            url = 'http://localhost:%d/' % server.server_address[1]
+            try:
+                return await coro(url)
+            finally:
+                server.close()
+                await server.wait_closed()
+                AsyncHTTPTransport.pool.clear()
+        return asyncio.run(wrapper())
+
+    def testCall(self):
+        async def go(url):
+            proxy = AsyncSOAPProxy(url)
+            return [await proxy.add(1, 2), await proxy.add(a = 3, b = 4),
+                    await proxy.keys(x = 1, y = 2)]
+
+        self.assertEqual(self.run_async(go), [3, 7, ['x', 'y']])
+
+    def testContext(self):
+        async def go(url):
+            return await AsyncSOAPProxy(url).whoami()
+
+        self.assertEqual(self.run_async(go), '"whoami"')
+
+    def testConcurrentCoroutines(self):
+        async def go(url):
+            proxy = AsyncSOAPProxy(url, namespace = "urn:service")
+            t = time.time()
+            r = await asyncio.gather(*[proxy.slowEcho(i, 0.3)
+                                       for i in range(50)])
+            return r, time.time() - t
+
+        r, elapsed = self.run_async(go)
+        self.assertEqual(r, list(range(50)))
+        self.assertTrue(elapsed < 2)
+
+    def testBlockingHandlerOffloaded(self):
+        async def go(url):
+            proxy = AsyncSOAPProxy(url, namespace = "urn:service")
+            t = time.time()
+            r = await asyncio.gather(*[proxy.blockingEcho(i, 0.3)
+                                       for i in range(4)])
+            return r, time.time() - t
+
+        r, elapsed = self.run_async(go)
+        self.assertEqual(r, list(range(4)))
+        self.assertTrue(elapsed < 1)
+
+    def testFaults(self):
+        async def go(url):
+            proxy = AsyncSOAPProxy(url)
+            faults = []
+            for name in ('fail', 'missing'):
+                try:
+                    await getattr(proxy, name)()
+                except faultType as e:
+                    faults.append(e.faultstring)
+            return faults
+
+        self.assertEqual(self.run_async(go),
+                         ["Method Failed", "Method Not Found"])
+
+    def testAsyncAuth(self):
+        class Guarded:
+            async def _authorize(self, _SOAPContext = None):
+                return _SOAPContext.soapaction == '"open"'
+            def open(self):
+                return 1
+            def closed(self):
+                return 1
+
+        config = SOAPConfig(Config, authMethod = "_authorize")
+
+        async def go(url):
+            server = AsyncSOAPServer(('localhost', 0), config = config)
+            server.registerObject(Guarded(), "urn:guarded")
+            await server.start()
+            proxy = AsyncSOAPProxy('http://localhost:%d/' %
+                                   server.server_address[1],
+                                   namespace = "urn:guarded")
+            try:
+                r = [await proxy.open()]
+                try:
+                    await proxy.closed()
+                except faultType as e:
+                    r.append(e.faultstring)
+                return r
+            finally:
+                server.close()
+                await server.wait_closed()
+
+        self.assertEqual(self.run_async(go), [1, "Authorization failed."])
+
+    def testBadFraming(self):
+        errors = []
+
+        async def post(url, head):
+            port = int(url.split(':')[2].rstrip('/'))
+            reader, writer = await asyncio.open_connection('localhost', port)
+            writer.write(b'POST / HTTP/1.1\r\nHost: localhost\r\n' + head +
+                         b'\r\n\r\n<a/>')
+            r = await reader.read()
+            writer.close()
+            return r.split(b'\r\n')[0]
+
+        async def go(url):
+            asyncio.get_running_loop().set_exception_handler(
+                lambda loop, context: errors.append(context))
+            return [await post(url, b'Content-length: abc'),
+                    await post(url, b'Content-length: -1'),
+                    await post(url, b'Transfer-Encoding: chunked\r\n\r\nzz')]
+
+        self.assertEqual(self.run_async(go), [b'HTTP/1.1 400 Bad Request'] * 3)
+        self.assertEqual(errors, [])
+
+    def testSlowBody(self):
+        config = SOAPConfig(Config, http_keepalive_timeout = 0.3)
+        body = buildSOAP(method = "add", kw = {"a": 1, "b": 2})
+
+        async def go(url):
+            server = AsyncSOAPServer(('localhost', 0), config = config)
+            server.registerFunction(add)
+            server.read_timeout = 0.5
+            await server.start()
+            try:
+                # the body may take longer than the idle timeout to arrive
+                reader, writer = await asyncio.open_connection(
+                    'localhost', server.server_address[1])
+                writer.write(b'POST / HTTP/1.1\r\nHost: localhost\r\n'
+                             b'Content-length: %d\r\n\r\n' % len(body))
+                for i in range(0, len(body), len(body) // 4 + 1):
+                    await asyncio.sleep(0.2)
+                    writer.write(body[i:i + len(body) // 4 + 1])
+                r = [(await reader.readuntil(b'\r\n')).strip()]
+                writer.close()
+
+                # but each read of it is bounded
+                reader, writer = await asyncio.open_connection(
+                    'localhost', server.server_address[1])
+                writer.write(b'POST / HTTP/1.1\r\nHost: localhost\r\n'
+                             b'Content-length: %d\r\n\r\n' % len(body) +
+                             body[:10])
+                t = time.time()
+                r.append(await reader.read())
+                r.append(time.time() - t < 2)
+                writer.close()
+                return r
+            finally:
+                server.close()
+                await server.wait_closed()
+
+        self.assertEqual(self.run_async(go), [b'HTTP/1.1 200 OK', b'', True])
+
+    def testSyncClient(self):
+        server = self.makeServer()
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(server.start())
+        t = threading.Thread(target = loop.run_forever)
+        t.daemon = True
+        t.start()
+
+        try:
+            proxy = SOAPProxy('http://localhost:%d/' %
+                              server.server_address[1])
+            for i in range(3):
+                self.assertEqual(proxy.add(i, 1), i + 1)
+        finally:
+            HTTPTransport.pool.clear()
+            loop.call_soon_threadsafe(loop.stop)
+            t.join()
+            server.close()
+            loop.run_until_complete(server.wait_closed())
+            loop.close()
+
+if __name__ == '__main__':
+    unittest.main()
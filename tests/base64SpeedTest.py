@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+# Time and memory to parse a response holding one large base64 element,
+# 50 MB of text by default.  Pass the size in MB to try another size.
+
+import base64
+import os
+import time
+import tracemalloc
+import sys
+sys.path.insert(1, "..")
+
+from SOAPpy import parseSOAPRPC
+
+MB = float(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+raw = os.urandom(int(MB * 1e6 * 57 / 77) // 57 * 57)
+text = base64.encodebytes(raw)
+
+msg = b'''<?xml version="1.0" encoding="UTF-8"?>
+<SOAP-ENV:Envelope
+  xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/"
+  xmlns:SOAP-ENC="http://schemas.xmlsoap.org/soap/encoding/"
+  xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+  xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+<SOAP-ENV:Body>
+<ns1:getResponse xmlns:ns1="urn:test">
+<Result xsi:type="xsd:base64Binary">%s</Result>
+</ns1:getResponse>
+</SOAP-ENV:Body>
+</SOAP-ENV:Envelope>''' % text
+
+print()
+print("Parse a base64 element of %.1f MB (%d bytes decoded)" %
+      (len(text) / 1e6, len(raw)))
+for backend in ("sax", "expat"):
+    tracemalloc.start()
+    t = time.time()
+    r = parseSOAPRPC(msg, backend = backend).Result
+    t = time.time() - t
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert r == raw
+    del r
+    print("%-6s time %6.2f sec  peak %7.1f MB" % (backend, t, peak / 1e6))
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+# Per-element cost of serializing large arrays with SOAPBuilder.
+
+import time
+import sys
+import array
+sys.path.insert(1, "..")
+
+from SOAPpy import buildSOAP, structType
+
+N = 100000
+
+def struct(i):
+    s = structType()
+    s._addItem("a", i)
+    s._addItem("b", "x%d" % i)
+    return s
+
+data = [
+    ("int",    list(range(N))),
+    ("float",  [i * 0.5 for i in range(N)]),
+    ("string", ["s%d" % i for i in range(N)]),
+    ("bool",   [bool(i & 1) for i in range(N)]),
+    ("struct", [struct(i) for i in range(N // 10)]),
+    ("array d", array.array("d", [i * 0.5 for i in range(N)])),
+]
+
+def BuildTime(l, repeat = 5):
+    best = None
+    for i in range(repeat):
+        t = time.time()
+        buildSOAP(method = "echo", kw = {"l": l})
+        t = time.time() - t
+        if best is None or t < best:
+            best = t
+    return best
+
+print()
+print("Build, per array element")
+for name, l in data:
+    print("%-8s %8.2f usec" % (name, BuildTime(l) / len(l) * 1e6))
+
+from SOAPpy.SOAPBuilder import SOAPTemplate
+
+SIGNATURE = (("i", int), ("f", float), ("s", str))
+VALUES = [42, 2.5, "hello"]
+CALLS = 20000
+
+def SmallCallTime(build, repeat = 5):
+    best = None
+    for i in range(repeat):
+        t = time.time()
+        for j in range(CALLS):
+            build()
+        t = time.time() - t
+        if best is None or t < best:
+            best = t
+    return best / CALLS
+
+template = SOAPTemplate(SIGNATURE, method = "echo", namespace = "urn:test")
+kw = dict(zip([n for n, t in SIGNATURE], VALUES))
+
+generic = SmallCallTime(lambda: buildSOAP(method = "echo",
+                                          namespace = "urn:test", kw = kw))
+prepared = SmallCallTime(lambda: template.build(VALUES))
+
+print()
+print("Small call, generic vs prepared")
+print("%-8s %8.2f usec" % ("generic", generic * 1e6))
+print("%-8s %8.2f usec (%.1fx)" % ("prepared", prepared * 1e6,
+                                   generic / prepared))
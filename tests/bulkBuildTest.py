@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for dumping homogeneous arrays of scalars in bulk.
+#
+################################################################################
+
+import sys
+import array
+import unittest
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+from SOAPpy.SOAPBuilder import SOAPBuilder
+
+try: import numpy
+except ImportError: numpy = None
+
+class ItemBuilder(SOAPBuilder):
+    # dumps every item by itself, as overridden handlers aren't bulked
+    def dump_int(self, *args):
+        SOAPBuilder.dump_int(self, *args)
+    def dump_float(self, *args):
+        SOAPBuilder.dump_float(self, *args)
+    def dump_bool(self, *args):
+        SOAPBuilder.dump_bool(self, *args)
+    def dump_string(self, *args):
+        SOAPBuilder.dump_string(self, *args)
+
+def build(cls, value, **kw):
+    return cls(kw = {"a": value, "b": [value]}, method = "m", **kw).build()
+
+class BulkBuildTestCase(unittest.TestCase):
+
+    values = [
+        [1, -2, 10 ** 30],
+        (3, 4),
+        [1.5, float("inf"), -float("inf"), 1e-300],
+        [True, False, True],
+        ["x", "<y&>", "é"],
+        list(range(10000)),
+        ["s%d" % i for i in range(10000)],
+    ]
+
+    def testSameAsItems(self):
+        for config in (Config, SOAPConfig(buildWithNamespacePrefix = 0),
+                       SOAPConfig(typesNamespaceURI = NS.XSD3)):
+            for v in self.values:
+                self.assertEqual(build(SOAPBuilder, v, config = config),
+                                 build(ItemBuilder, v, config = config))
+
+    def testSharedStrings(self):
+        s = "shared"
+        v = [s, "other", s]
+        self.assertEqual(build(SOAPBuilder, v), build(ItemBuilder, v))
+        self.assertEqual(parseSOAPRPC(build(SOAPBuilder, v)).a, v)
+
+    def testStream(self):
+        v = list(range(20000))
+        msg = b"".join(iterbuildSOAP(method = "m", kw = {"a": v},
+                                     chunk_size = 1000))
+        self.assertEqual(msg.count(b"<item "), len(v))
+        self.assertEqual(parseSOAPRPC(msg).a, v)
+
+    def testArray(self):
+        for code, v in (("i", [1, -2, 3]), ("q", [2 ** 40, 0]),
+                        ("d", [1.5, -0.25]), ("f", [0.5, 2.0])):
+            a = array.array(code, v)
+            self.assertEqual(buildSOAP(method = "m", kw = {"a": a}),
+                             buildSOAP(method = "m", kw = {"a": v}))
+            self.assertEqual(parseSOAPRPC(buildSOAP(a, method = "m")).v1, v)
+
+        a = array.array("d", [])
+        self.assertEqual(buildSOAP(method = "m", kw = {"a": a}),
+                         buildSOAP(method = "m", kw = {"a": []}))
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def testNumPy(self):
+        for v in ([1, 2, 3], [0.5, 1e10], [True, False]):
+            a = numpy.array(v)
+            self.assertEqual(buildSOAP(method = "m", kw = {"a": a}),
+                             buildSOAP(method = "m", kw = {"a": v}))
+
+        a = numpy.arange(6).reshape(2, 3)
+        self.assertEqual(buildSOAP(method = "m", kw = {"a": a}),
+                         buildSOAP(method = "m", kw = {"a": a.tolist()}))
+        self.assertEqual(buildSOAP(method = "m", kw = {"a": numpy.int64(7)}),
+                         buildSOAP(method = "m", kw = {"a": 7}))
+        self.assertEqual(buildSOAP(method = "m",
+                                   kw = {"a": numpy.float64(0.5)}),
+                         buildSOAP(method = "m", kw = {"a": 0.5}))
+
+if __name__ == '__main__':
+    unittest.main()
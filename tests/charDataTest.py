@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for the handling of the character data of elements by SOAPParser.
+#
+################################################################################
+
+import os
+import sys
+import unittest
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+from SOAPpy.Parser import SOAPParser, _makeParser
+
+ENV = '''<?xml version="1.0"?>
+<SOAP-ENV:Envelope xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/"
+  xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+  xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+<SOAP-ENV:Body><m>%s</m></SOAP-ENV:Body></SOAP-ENV:Envelope>'''
+
+def message(body):
+    return (ENV % body).encode()
+
+class SmallParser(SOAPParser):
+    # moves the text to a buffer after a couple of pieces
+    max_pieces = 2
+
+def parse(msg, cls = SOAPParser, backend = "sax", size = 3):
+    t = cls()
+    parser = _makeParser(t, backend = backend)
+    for i in range(0, len(msg), size):
+        parser.feed(msg[i:i + size])
+    parser.close()
+    return t.body[0]._asdict()
+
+class CharDataTestCase(unittest.TestCase):
+
+    def testPieces(self):
+        msg = message('<a xsi:type="xsd:string">%s</a>'
+                      '<b xsi:type="xsd:int"> 12345 </b>'
+                      '<c>x&amp;y<![CDATA[<z>]]></c>' % ("text " * 100))
+        expected = {"a": "text " * 100, "b": 12345, "c": "x&y<z>"}
+        for backend in ("sax", "expat"):
+            for cls in (SOAPParser, SmallParser):
+                self.assertEqual(parse(msg, cls, backend), expected)
+
+    def testBlank(self):
+        for cls in (SOAPParser, SmallParser):
+            r = parse(message('<a href="#x">  \n  </a><b id="x">1</b>'
+                              '<n xsi:nil="true">\n\t\n</n>'), cls)
+            self.assertEqual((r["a"], r["n"]), ("1", None))
+
+            self.assertRaises(Error, parse,
+                              message('<a xsi:nil="true">\n x</a>'), cls)
+            self.assertRaises(Error, parse,
+                              message('<a href="#x">    x</a><b id="x"/>'),
+                              cls)
+
+    def testEmptyStruct(self):
+        msg = b'''<?xml version="1.0"?>
+<SOAP-ENV:Envelope xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/">
+<SOAP-ENV:Body><m>
+  \n  </m></SOAP-ENV:Body></SOAP-ENV:Envelope>'''
+        for cls in (SOAPParser, SmallParser):
+            t = cls()
+            parser = _makeParser(t)
+            for i in range(0, len(msg), 2):
+                parser.feed(msg[i:i + 2])
+            parser.close()
+            self.assertTrue(isinstance(t.body[0], structType))
+
+    def testNotNil(self):
+        r = parseSOAPRPC(message('<a xsi:nil="false" xsi:type="xsd:int">'
+                                 '3</a>'))
+        self.assertEqual(r.a, 3)
+
+    def testJoinedOnce(self):
+        t = SmallParser()
+        t._data = []
+        for c in ("a", " ", "b", "c"):
+            t.characters(c)
+        self.assertFalse(t._blank())
+        text = t._text()
+        self.assertEqual(text, "a bc")
+        self.assertTrue(t._text() is text)
+
+        t._data = []
+        for c in (" ", "\n", " "):
+            t.characters(c)
+        self.assertTrue(t._blank())
+
+    def testBase64(self):
+        raw = os.urandom(300000)
+        msg = buildSOAP(method = "m", kw = {"b": base64BinaryType(raw),
+                                            "e": base64BinaryType(b""),
+                                            "s": base64BinaryType("é")})
+        for backend in ("sax", "expat"):
+            r = parseSOAPRPC(msg, backend = backend)
+            self.assertEqual((r.b, r.e, r.s), (raw, b"", "é".encode()))
+
+        self.assertRaises(Exception, parseSOAPRPC,
+                          message('<a xsi:type="xsd:base64Binary">hello</a>'))
+
+if __name__ == '__main__':
+    unittest.main()
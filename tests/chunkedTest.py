@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for streamed serialization and chunked transfer-encoding.
+#
+################################################################################
+
+import sys
+import http.client
+import io
+import socket
+import threading
+import unittest
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+
+class StreamBuildTestCase(unittest.TestCase):
+
+    kw = {"l": list(range(20000)), "s": "hello é", "d": {"x": [1, 2]}}
+
+    def testChunks(self):
+        chunks = list(iterbuildSOAP(method = "echo", namespace = "urn:test",
+                                    kw = self.kw, chunk_size = 4096))
+        self.assertTrue(len(chunks) > 10)
+        self.assertTrue(max([len(c) for c in chunks[:-1]]) < 8192)
+
+        r = parseSOAPRPC(b"".join(chunks))
+        self.assertEqual(list(r.l), list(range(20000)))
+        self.assertEqual(r.s, "hello é")
+        self.assertEqual(list(r.d.x), [1, 2])
+
+    def testStream(self):
+        f = io.BytesIO()
+        self.assertEqual(buildSOAP(method = "echo", kw = self.kw, stream = f),
+                         None)
+        self.assertEqual(f.getvalue(),
+                         b"".join(iterbuildSOAP(method = "echo",
+                                                kw = self.kw)))
+
+    def testShared(self):
+        s = structType()
+        s._addItem("a", 1)
+        msg = b"".join(iterbuildSOAP(method = "echo", kw = {"l": [s, s]}))
+        full = buildSOAP(method = "echo", kw = {"l": [s, s]})
+        self.assertEqual(msg.count(b'href="#'), full.count(b'href="#'))
+
+        msg = b"".join(iterbuildSOAP(method = "echo",
+                                     kw = {"l": ["x", "y"]}))
+        self.assertFalse(b'href' in msg)
+
+    def testFault(self):
+        f = faultType("SOAP-ENV:Server", "broken")
+        r = parseSOAPRPC(b"".join(iterbuildSOAP(f)))
+        self.assertEqual(r.faultstring, "broken")
+
+class ChunkedTransferTestCase(unittest.TestCase):
+
+    def startServer(self, serverClass = ThreadingSOAPServer):
+        server = serverClass(('localhost', 0))
+        server.registerFunction(lambda n: list(range(n)), funcName = "items")
+        server.registerFunction(lambda l: len(l), funcName = "count")
+        t = threading.Thread(target = server.serve_forever)
+        t.daemon = True
+        t.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(HTTPTransport.pool.clear)
+        return server, 'http://localhost:%d/' % server.server_address[1]
+
+    def request(self, server, body):
+        s = socket.create_connection(server.server_address)
+        self.addCleanup(s.close)
+        f = s.makefile('rb')
+        self.addCleanup(f.close)
+        s.sendall(b"POST / HTTP/1.1\r\nHost: x\r\nConnection: close\r\n"
+                  b"Content-type: text/xml\r\n"
+                  b"Content-length: %d\r\n\r\n" % len(body) + body)
+        status = f.readline()
+        headers = http.client.parse_headers(f)
+        return status, headers, f.read()
+
+    def testChunkedResponse(self):
+        server, url = self.startServer()
+
+        status, headers, body = self.request(server,
+            buildSOAP(method = "items", kw = {"n": 20000}))
+        self.assertEqual(headers["Transfer-Encoding"], "chunked")
+        self.assertEqual(headers["Content-length"], None)
+        self.assertTrue(body.endswith(b"\r\n0\r\n\r\n"))
+
+        status, headers, body = self.request(server,
+            buildSOAP(method = "items", kw = {"n": 3}))
+        self.assertEqual(headers["Transfer-Encoding"], None)
+        self.assertEqual(int(headers["Content-length"]), len(body))
+
+        proxy = SOAPProxy(url)
+        self.assertEqual(proxy.items(20000), list(range(20000)))
+        self.assertEqual(proxy.items(3), [0, 1, 2])
+
+    def testChunkedRequest(self):
+        config = SOAPConfig(http_chunked_requests = 1, http_chunk_size = 4096)
+        for serverClass in (ThreadingSOAPServer, PooledSOAPServer):
+            server, url = self.startServer(serverClass)
+            proxy = SOAPProxy(url, config = config)
+            for i in range(2):
+                self.assertEqual(proxy.count(list(range(20000))), 20000)
+                self.assertEqual(proxy.count([1]), 1)
+
+    def testChunkedRequestAsyncServer(self):
+        import asyncio
+
+        async def go():
+            server = AsyncSOAPServer(('localhost', 0))
+            server.registerFunction(lambda l: len(l), funcName = "count")
+            await server.start()
+            proxy = SOAPProxy('http://localhost:%d/' %
+                              server.server_address[1],
+                              config = SOAPConfig(http_chunked_requests = 1,
+                                                  http_pool_size = 0))
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(None, proxy.count,
+                                                  list(range(20000)))
+            finally:
+                server.close()
+                await server.wait_closed()
+
+        self.assertEqual(asyncio.run(go()), 20000)
+
+if __name__ == '__main__':
+    unittest.main()
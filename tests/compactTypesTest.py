@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for the private fields that SOAPpy types share between instances.
+#
+################################################################################
+
+import sys
+import operator
+import unittest
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+
+class CompactTypesTestCase(unittest.TestCase):
+
+    def testAttrs(self):
+        a = structType()
+        b = structType()
+        a._setAttr("x", "1")
+        self.assertEqual(a._getAttr("x"), "1")
+        self.assertEqual(b._getAttr("x"), None)
+        self.assertEqual(dict(b._attrs), {})
+        self.assertRaises(TypeError, operator.setitem, b._attrs, "x", "1")
+
+        c = stringType("s", attrs = a)
+        self.assertEqual(c._getAttr("x"), "1")
+
+    def testDefaults(self):
+        s = structType(name = (None, "s"))
+        s._addItem("a", 1)
+        self.assertEqual([k for k in s.__dict__ if k[0] == "_"],
+                         ["_name", "_keyord"])
+        self.assertEqual((s._ns, s._typed, s._type, s._data),
+                         (None, 1, "struct", None))
+
+        t = typedArrayType(typed = "int", name = "t")
+        self.assertEqual(t._type, "int")
+        self.assertEqual(arrayType()._type, "array")
+        self.assertEqual(stringType("x", typed = 0)._typed, 0)
+        self.assertEqual(stringType("x")._ns, NS.XSD)
+
+    def testCache(self):
+        d = durationType((1, 2, 3, 4, 5, 6))
+        self.assertEqual(d._cache, None)
+        self.assertEqual(d._marshalData(), d._cache)
+
+    def testParsed(self):
+        s = structType()
+        s._addItem("a", 1)
+        s._setAttr(("urn:x", "flag"), "1")
+        r = parseSOAPRPC(buildSOAP(method = "m", kw = {"s": s, "t": {"b": 2}}))
+        self.assertEqual(r.s._getAttr(("urn:x", "flag")), "1")
+        self.assertEqual(dict(r.t._attrs), {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for the HTTP/1.1 keep-alive connection pool behind HTTPTransport.
+#
+################################################################################
+
+import sys
+import threading
+import time
+import unittest
+import http.server
+import socketserver
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+
+RESPONSE = b'''<?xml version="1.0" encoding="UTF-8"?>
+<SOAP-ENV:Envelope
+  SOAP-ENV:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/"
+  xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/"
+  xmlns:xsd="http://www.w3.org/1999/XMLSchema"
+  xmlns:xsi="http://www.w3.org/1999/XMLSchema-instance">
+<SOAP-ENV:Body>
+<pingResponse><Result xsi:type="xsd:int">42</Result></pingResponse>
+</SOAP-ENV:Body>
+</SOAP-ENV:Envelope>
+'''
+
+class KeepAliveHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        http.server.BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-length"]))
+        self.send_response(200)
+        self.send_header("Content-type", "text/xml")
+        self.send_header("Content-length", str(len(RESPONSE)))
+        if self.server.close_mode == 'header':
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+        self.wfile.flush()
+        if self.server.close_mode == 'silent':
+            # drop the connection without telling the client
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+class KeepAliveServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, close_mode = None):
+        self.connections = 0
+        self.close_mode = close_mode
+        socketserver.ThreadingTCPServer.__init__(self, ('localhost', 0),
+                                                 KeepAliveHandler)
+
+class ConnectionPoolTestCase(unittest.TestCase):
+
+    def startServer(self, close_mode = None):
+        server = KeepAliveServer(close_mode)
+        t = threading.Thread(target = server.serve_forever)
+        t.daemon = True
+        t.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(HTTPTransport.pool.clear)
+        return server, 'http://localhost:%d/' % server.server_address[1]
+
+    def testReuse(self):
+        server, url = self.startServer()
+        proxy = SOAPProxy(url)
+        for i in range(5):
+            self.assertEqual(proxy.ping(), 42)
+        self.assertEqual(server.connections, 1)
+
+    def testReuseAcrossProxies(self):
+        server, url = self.startServer()
+        for i in range(3):
+            self.assertEqual(SOAPProxy(url).ping(), 42)
+        self.assertEqual(server.connections, 1)
+
+    def testConnectionClose(self):
+        server, url = self.startServer('header')
+        proxy = SOAPProxy(url)
+        for i in range(3):
+            self.assertEqual(proxy.ping(), 42)
+        self.assertEqual(server.connections, 3)
+        self.assertEqual(len(HTTPTransport.pool), 0)
+
+    def testBrokenConnectionEvicted(self):
+        server, url = self.startServer('silent')
+        proxy = SOAPProxy(url)
+        for i in range(3):
+            self.assertEqual(proxy.ping(), 42)
+            time.sleep(0.05)
+        self.assertEqual(server.connections, 3)
+
+    def testIdleTimeout(self):
+        server, url = self.startServer()
+        config = SOAPConfig(http_pool_idle_timeout = 0)
+        proxy = SOAPProxy(url, config = config)
+        for i in range(3):
+            self.assertEqual(proxy.ping(), 42)
+            time.sleep(0.01)
+        self.assertEqual(server.connections, 3)
+
+    def testPoolDisabled(self):
+        server, url = self.startServer()
+        config = SOAPConfig(http_pool_size = 0)
+        proxy = SOAPProxy(url, config = config)
+        for i in range(3):
+            self.assertEqual(proxy.ping(), 42)
+        self.assertEqual(server.connections, 3)
+        self.assertEqual(len(HTTPTransport.pool), 0)
+
+    def testThreads(self):
+        server, url = self.startServer()
+        results = []
+
+        def worker():
+            proxy = SOAPProxy(url)
+            for i in range(10):
+                results.append(proxy.ping())
+
+        threads = [threading.Thread(target = worker) for i in range(4)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+
+        self.assertEqual(results, [42] * 40)
+        self.assertTrue(server.connections <= 4)
+
+if __name__ == '__main__':
+    unittest.main()
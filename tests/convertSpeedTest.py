@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+
+# Cost of converting the text of simple values, per type.
+
+import time
+import sys
+sys.path.insert(1, "..")
+
+from SOAPpy import NS
+from SOAPpy.Parser import SOAPParser
+
+N = 20000
+
+samples = [
+    (NS.XSD, "int",                "-12345"),
+    (NS.XSD, "integer",            "12345678901234567890"),
+    (NS.XSD, "unsignedByte",       "200"),
+    (NS.XSD, "string",             "hello"),
+    (NS.XSD, "boolean",            "true"),
+    (NS.XSD, "double",             "2.5e10"),
+    (NS.XSD, "float",              "0.25"),
+    (NS.XSD, "decimal",            "10.75"),
+    (NS.XSD3, "token",             "  a  token "),
+    (NS.XSD3, "anyURI",            "http://example.com/a%20b"),
+    (NS.XSD3, "hexBinary",         "48656c6c6f"),
+    (NS.XSD3, "dateTime",          "2001-02-03T04:05:06Z"),
+    (NS.XSD3, "dateTime",          "2001-02-03T04:05:06.25+01:30"),
+    (NS.XSD3, "dateTime",          "-0044-03-15T12:00:00Z"),
+    (NS.XSD3, "date",              "2001-02-03"),
+    (NS.XSD, "time",               "04:05:06Z"),
+    (NS.XSD3, "gYear",             "1999"),
+    (NS.XSD2, "CDATA",             "some  text"),
+]
+
+def ConvertTime(t, value, repeat = 5):
+    p = SOAPParser()
+    best = None
+    for i in range(repeat):
+        start = time.time()
+        for j in range(N):
+            p.convertType(value, t, {})
+        start = time.time() - start
+        if best is None or start < best:
+            best = start
+    return best
+
+print()
+print("Convert, per value")
+for ns, name, value in samples:
+    print("%-12s %8.2f usec" % (name, ConvertTime((ns, name), value) /
+                                N * 1e6))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for the conversion of simple values by SOAPParser.
+#
+################################################################################
+
+import sys
+import unittest
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+from SOAPpy.Parser import SOAPParser
+
+class ConvertTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.p = SOAPParser()
+
+    def convert(self, name, value, ns = NS.XSD, config = Config):
+        return self.p.convertType(value, (ns, name), {}, config)
+
+    def testTypes(self):
+        self.assertEqual(self.convert("int", " -5 "), -5)
+        self.assertEqual(self.convert("integer", "10" * 20), int("10" * 20))
+        self.assertEqual(self.convert("string", None), "")
+        self.assertEqual(self.convert("boolean", " TRUE"), True)
+        self.assertEqual(self.convert("bool", "0", NS.ENC), False)
+        self.assertEqual(self.convert("double", "2.5"), 2.5)
+        self.assertEqual(self.convert("decimal", "1.25", NS.XSD3), 1.25)
+        self.assertEqual(self.convert("NMTOKENS", " a  b "), ["a", "b"])
+        self.assertEqual(self.convert("anyURI", "a%20b", NS.XSD3), "a b")
+        self.assertEqual(self.convert("CDATA", " a  b ", NS.XSD2), "a b")
+        self.assertEqual(self.convert("gYear", "1999", NS.XSD3), 1999)
+
+    def testLimits(self):
+        self.assertEqual(self.convert("byte", "-128"), -128)
+        self.assertRaises(UnderflowError, self.convert, "byte", "-129")
+        self.assertRaises(OverflowError, self.convert, "unsignedInt",
+                          "4294967296")
+        self.assertRaises(OverflowError, self.convert, "negativeInteger",
+                          "0")
+        self.assertEqual(self.convert("float", "1e300"), 1e300)
+        self.assertRaises(OverflowError, self.convert, "float", "1e300",
+                          config = SOAPConfig(strict_range = 1))
+
+    def testNamespaces(self):
+        # hexBinary is a schema type, uriReference not one of XSD3
+        self.assertEqual(self.convert("hexBinary", "4142", NS.XSD3), "AB")
+        self.assertRaises(UnknownTypeError, self.convert, "hexBinary",
+                          "4142", NS.ENC)
+        self.assertRaises(UnknownTypeError, self.convert, "uriReference",
+                          "a", NS.XSD3)
+        self.assertRaises(UnknownTypeError, self.convert, "int", "1",
+                          "urn:x")
+
+    def testArrayType(self):
+        self.assertEqual(self.convert("arrayType=int[2]", ["1", "2"], None),
+                         [1, 2])
+        self.assertEqual(self.convert("arrayType=ur-type[1]", ["x"], None),
+                         ["x"])
+        self.assertEqual(self.convert("int", "3", None), 3)
+
+    def testExtend(self):
+        class Parser(SOAPParser):
+            converters = dict(SOAPParser.converters)
+            converters[("urn:x", "upper")] = \
+                lambda p, d, attrs, config: d.upper()
+
+        self.assertEqual(Parser().convertType("a", ("urn:x", "upper"), {}),
+                         "A")
+        self.assertRaises(UnknownTypeError, self.convert, "upper", "a",
+                          "urn:x")
+
+if __name__ == '__main__':
+    unittest.main()
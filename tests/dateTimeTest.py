@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for reading and writing dateTime, date and time values.
+#
+################################################################################
+
+import sys
+import datetime
+import unittest
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+from SOAPpy.Parser import SOAPParser
+
+UTC = datetime.timezone.utc
+EAST = datetime.timezone(datetime.timedelta(hours = 1, minutes = 30))
+
+VALUES = [
+    ("dateTime", "2001-02-03T04:05:06Z"),
+    ("dateTime", " 2001-02-03T04:05:06.25\n"),
+    ("dateTime", "2001-02-03T04:05:06."),
+    ("dateTime", "2001-02-03T04:05:06+01:30"),
+    ("dateTime", "2001-02-03T00:05:06+01:30"),
+    ("dateTime", "2000-03-01T00:05:06+01:30"),
+    ("dateTime", "2001-02-03T22:05:06-01:30"),
+    ("dateTime", "1999-12-31T23:59:60.5Z"),
+    ("timeInstant", "2004-02-29T12:00:00Z"),
+    ("date", "2001-02-03"),
+    ("date", "2001-02-03Z"),
+    ("date", "2001-03-01+05:00"),
+    ("time", "04:05:06"),
+    ("time", "04:05:06.5Z"),
+    ("time", "00:05:06+01:30"),
+    ("time", "23:05:06-01:30"),
+]
+
+class DateTimeTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.p = SOAPParser()
+        # the general patterns only
+        self.slow = SOAPParser()
+        self.slow.isodates = {}
+
+    def testTuples(self):
+        convert = self.p.convertDateTime
+        self.assertEqual(convert("2001-02-03T04:05:06Z", "dateTime"),
+                         (2001, 2, 3, 4, 5, 6.0))
+        self.assertEqual(convert("2001-02-03T04:05:06.25+01:30", "dateTime"),
+                         (2001, 2, 3, 2, 35, 6.25))
+        self.assertEqual(convert("2001-02-28T23:05:06-01:30", "dateTime"),
+                         (2001, 3, 1, 0, 35, 6.0))
+        self.assertEqual(convert("2001-02-03", "date"), (2001, 2, 3))
+        self.assertEqual(convert("04:05:06.5Z", "time"), (4, 5, 6.5))
+        # without a date the hour isn't wrapped
+        self.assertEqual(convert("00:05:06+01:30", "time"), (-2, 35, 6.0))
+
+    def testSameAsGeneral(self):
+        for kind, value in VALUES:
+            self.assertEqual(self.p.convertDateTime(value, kind),
+                             self.slow.convertDateTime(value, kind))
+
+    def testExotic(self):
+        convert = self.p.convertDateTime
+        self.assertEqual(convert("-0044-03-15T12:00:00Z", "dateTime"),
+                         (-44, 3, 15, 12, 0, 0.0))
+        self.assertEqual(convert("12345-01-02T03:04:05Z", "dateTime"),
+                         (12345, 1, 2, 3, 4, 5.0))
+        self.assertEqual(convert("0000-01-02", "date"), (0, 1, 2))
+        # not read into datetime objects either
+        self.assertEqual(convert("-0044-03-15", "date", 1), (-44, 3, 15))
+
+    def testErrors(self):
+        for kind, value in (("dateTime", "2001-02-29T04:05:06Z"),
+                            ("dateTime", "2001-02-03T24:05:06Z"),
+                            ("dateTime", "2001-02-03T04:05:61.5Z"),
+                            ("dateTime", "2001-02-03 04:05:06Z"),
+                            ("date", "2001-13-03"),
+                            ("time", "04:60:06")):
+            for p in (self.p, self.slow):
+                self.assertRaises(Error, p.convertDateTime, value, kind)
+                self.assertRaises(Error, p.convertDateTime, value, kind, 1)
+
+    def testObjects(self):
+        convert = self.p.convertDateTime
+        self.assertEqual(
+            convert("2001-02-03T04:05:06.25+01:30", "dateTime", 1),
+            datetime.datetime(2001, 2, 3, 2, 35, 6, 250000, UTC))
+        t = convert("2001-02-03T04:05:06", "dateTime", 1)
+        self.assertEqual(t, datetime.datetime(2001, 2, 3, 4, 5, 6))
+        self.assertEqual(t.tzinfo, None)
+        self.assertEqual(convert("2001-02-03Z", "date", 1),
+                         datetime.date(2001, 2, 3))
+        self.assertEqual(convert("00:05:06.5+01:30", "time", 1),
+                         datetime.time(22, 35, 6, 500000, UTC))
+        # leap seconds can't be held by datetime
+        self.assertEqual(convert("1999-12-31T23:59:60Z", "dateTime", 1),
+                         (1999, 12, 31, 23, 59, 60.0))
+
+    def testBuild(self):
+        values = {"a": datetime.datetime(2001, 2, 3, 4, 5, 6, 250000, EAST),
+                  "b": datetime.date(2001, 2, 3),
+                  "c": datetime.time(1, 2, 3, tzinfo = EAST),
+                  "l": [datetime.datetime(2001, 2, 3)] * 2}
+        msg = buildSOAP(method = "m", kw = values)
+        for text in (b'<a xsi:type="xsd3:dateTime">'
+                     b'2001-02-03T02:35:06.25Z</a>',
+                     b'<b xsi:type="xsd:date">2001-02-03Z</b>',
+                     b'<c xsi:type="xsd:time">23:32:03Z</c>',
+                     b'arrayType="xsd3:dateTime[2]"'):
+            self.assertTrue(text in msg)
+        # values, not objects that may be referred to
+        self.assertFalse(b"href" in msg)
+
+        r = parseSOAPRPC(msg, datetime_objects = 1)
+        self.assertEqual(r.a, values["a"])
+        self.assertEqual(r.b, values["b"])
+        self.assertEqual(r.c, datetime.time(23, 32, 3, tzinfo = UTC))
+        self.assertEqual(list(r.l),
+                         [datetime.datetime(2001, 2, 3, tzinfo = UTC)] * 2)
+
+        r = parseSOAPRPC(msg)
+        self.assertEqual(r.a, (2001, 2, 3, 2, 35, 6.25))
+        self.assertEqual(r.c, (23, 32, 3.0))
+
+    def testMicroseconds(self):
+        for us, text in ((1, "06.000001"), (10, "06.00001"),
+                         (99, "06.000099"), (120000, "06.12")):
+            values = {"a": datetime.datetime(2001, 2, 3, 4, 5, 6, us, UTC),
+                      "t": datetime.time(4, 5, 6, us, UTC)}
+            msg = buildSOAP(method = "m", kw = values)
+            self.assertTrue(b"T04:05:" + text.encode() + b"Z</a>" in msg)
+            self.assertTrue(b">04:05:" + text.encode() + b"Z</t>" in msg)
+
+            r = parseSOAPRPC(msg, datetime_objects = 1)
+            self.assertEqual((r.a, r.t), (values["a"], values["t"]))
+
+    def testMarshal(self):
+        for value, text in (((2001, 2, 3, 4, 5, 6), "2001-02-03T04:05:06Z"),
+                            ((2001, 2, 3, 4, 5, 6.25),
+                             "2001-02-03T04:05:06.25Z"),
+                            ((-44, 3, 15, 12, 0, 0), "-0044-03-15T12:00:00Z"),
+                            ((-44, 3, 15, 12, 0, 0.5),
+                             "-0044-03-15T12:00:00.5Z")):
+            self.assertEqual(dateTimeType(value)._marshalData(), text)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for the cached type dispatch of SOAPBuilder.
+#
+################################################################################
+
+import sys
+import unittest
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+from SOAPpy.SOAPBuilder import SOAPBuilder
+
+class Point:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+def dump_point(self, obj, tag, typed = 1, ns_map = {}):
+    self.out.append('<%s>%d,%d</%s>\n' % (tag, obj.x, obj.y, tag))
+
+class HexBuilder(SOAPBuilder):
+    def dump_int(self, obj, tag, typed = 1, ns_map = {}):
+        self.out.append('<%s>%x</%s>\n' % (tag, obj, tag))
+
+class DumpDispatchTestCase(unittest.TestCase):
+
+    def build(self, obj, config = Config, builder = SOAPBuilder):
+        return builder(kw = {"v": obj}, method = "m", config = config).build()
+
+    def testConfigDumpmap(self):
+        config = SOAPConfig()
+        self.assertTrue(b"<x" in self.build(Point(1, 2), config))
+
+        # a new dumpmap takes effect for types already seen
+        config.dumpmap = ((Point, dump_point),)
+        self.assertTrue(b"<v>1,2</v>" in self.build(Point(1, 2), config))
+
+        config.dumpmap = ()
+        self.assertFalse(b"<v>1,2</v>" in self.build(Point(1, 2), config))
+
+    def testOverrideBuiltin(self):
+        config = SOAPConfig(dumpmap = ((int, lambda self, obj, tag, *a:
+                                        self.out.append("<%s>int</%s>" %
+                                                        (tag, tag))),))
+        msg = self.build([1, True, 2.5], config)
+        # bool is a subclass of int, float is not
+        self.assertEqual(msg.count(b"<item>int</item>"), 2)
+
+    def testSubclass(self):
+        self.assertTrue(b">ff</v>" in self.build(255, builder = HexBuilder))
+        self.assertTrue(b">255</v>" in self.build(255))
+
+    def testTypes(self):
+        r = parseSOAPRPC(buildSOAP(kw = {"l": [1, 2.5, "s", None, True,
+                                               (1, 2), {"a": 1}]},
+                                   method = "m"))
+        self.assertEqual(r.l[:4], [1, 2.5, "s", None])
+        self.assertEqual(r.l[5], [1, 2])
+        self.assertEqual(r.l[6].a, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for the pyexpat parser backend.
+#
+################################################################################
+
+import sys
+import threading
+import unittest
+import xml.sax
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+from SOAPpy.Parser import _parseSOAP
+from defusedxml.common import DTDForbidden, EntitiesForbidden, \
+     ExternalReferenceForbidden
+
+def struct(**kw):
+    s = structType()
+    for k, v in kw.items():
+        s._addItem(k, v)
+    return s
+
+shared = struct(a = 1)
+
+MESSAGES = [
+    buildSOAP(method = "m", namespace = "urn:x",
+              kw = {"i": 1, "f": 2.5, "s": "<é&>", "b": True, "n": None}),
+    buildSOAP(method = "m", kw = {"l": [1, 2.5, "x"], "d": [1.5, 2.5],
+                                  "st": [struct(a = i, b = "x%d" % i)
+                                         for i in range(3)]}),
+    buildSOAP(method = "m", kw = {"l": [shared, shared],
+                                  "t": {"k": [[1, 2], [3]]}}),
+    buildSOAP(method = "m", header = headerType({"token": "abc"}),
+              kw = {"s": struct(x = "é" * 10000)}),
+    buildSOAP(faultType("SOAP-ENV:Server", "broken", "detail")),
+    b'''<?xml version="1.0"?>
+<SOAP-ENV:Envelope xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/"
+  xmlns:xsd="http://www.w3.org/2001/XMLSchema"
+  xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
+<SOAP-ENV:Body><m xmlns="urn:default"><a xsi:type="xsd:int">1</a>
+<b>te<![CDATA[x<t]]>&amp;&#233;</b></m></SOAP-ENV:Body></SOAP-ENV:Envelope>''',
+]
+
+def result(r):
+    if isinstance(r, faultType):
+        return r.faultcode, r.faultstring, r.detail
+    return simplify(r)
+
+def parse(msg, backend, **kw):
+    r, attrs = parseSOAPRPC(msg, attrs = 1, backend = backend, **kw)
+    return result(r), attrs[id(r)]
+
+class ExpatBackendTestCase(unittest.TestCase):
+
+    def testSameResult(self):
+        for msg in MESSAGES:
+            for kw in ({}, {"native": 1}, {"numeric_arrays": 1}):
+                self.assertEqual(parse(msg, "expat", **kw),
+                                 parse(msg, "sax", **kw))
+
+    def testPush(self):
+        for msg in MESSAGES:
+            p = SOAPPushParser(backend = "expat")
+            for i in range(0, len(msg), 7):
+                p.feed(msg[i:i + 7])
+            self.assertEqual(result(p.close()), result(parseSOAPRPC(msg)))
+
+    def testIter(self):
+        msg = buildSOAP(method = "m", kw = {"l": list(range(1000))})
+        self.assertEqual(list(iterSOAPRPC(msg, backend = "expat")),
+                         list(range(1000)))
+
+    def testErrors(self):
+        env = b'<SOAP-ENV:Envelope xmlns:SOAP-ENV="%s">' % NS.ENV.encode()
+        for msg in (env, env + b"<SOAP-ENV:Body></a>", env + b"&x;"):
+            for backend in ("sax", "expat"):
+                self.assertRaises(xml.sax.SAXParseException,
+                                  _parseSOAP, msg, backend = backend)
+
+        self.assertRaises(ValueError, _parseSOAP, MESSAGES[0],
+                          backend = "dom")
+
+    def testForbidden(self):
+        env = b'<SOAP-ENV:Envelope xmlns:SOAP-ENV="%s">&x;' \
+              b'</SOAP-ENV:Envelope>' % NS.ENV.encode()
+        dtd = b'<!DOCTYPE SOAP-ENV:Envelope [<!ENTITY x "y">]>' + env
+        ext = b'<!DOCTYPE SOAP-ENV:Envelope [' \
+              b'<!ENTITY x SYSTEM "file:///etc/passwd">]>' + env
+
+        for backend in ("sax", "expat"):
+            self.assertRaises(DTDForbidden, _parseSOAP, dtd,
+                              ignore_ext = True, backend = backend)
+            self.assertRaises(EntitiesForbidden, _parseSOAP, dtd,
+                              forbid_entities = True, backend = backend)
+            self.assertRaises(ExternalReferenceForbidden, _parseSOAP, ext,
+                              backend = backend)
+
+    def testServer(self):
+        config = SOAPConfig(parser_backend = "expat")
+        server = ThreadingSOAPServer(('localhost', 0), config = config)
+        server.registerFunction(lambda l: l, funcName = "echo")
+        t = threading.Thread(target = server.serve_forever)
+        t.daemon = True
+        t.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(HTTPTransport.pool.clear)
+
+        url = 'http://localhost:%d/' % server.server_address[1]
+        proxy = SOAPProxy(url, config = config)
+        self.assertEqual(simplify(proxy.echo([1, "x", 2.5])), [1, "x", 2.5])
+
+        proxy = SOAPProxy(url, config = config, iterate_results = 1)
+        self.assertEqual(list(proxy.echo(list(range(100)))),
+                         list(range(100)))
+
+if __name__ == '__main__':
+    unittest.main()
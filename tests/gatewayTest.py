@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for SOAPGateway, forwarding requests to backend SOAP servers by the
+# method they call.
+#
+################################################################################
+
+import sys
+import threading
+import time
+import unittest
+import socket
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+
+def serve(server, test):
+    t = threading.Thread(target = server.serve_forever)
+    t.daemon = True
+    t.start()
+    test.addCleanup(server.server_close)
+    test.addCleanup(server.shutdown)
+    return 'http://localhost:%d/' % server.server_address[1]
+
+def deadURL():
+    # a port nothing listens on
+    s = socket.socket()
+    s.bind(('localhost', 0))
+    port = s.getsockname()[1]
+    s.close()
+    return 'http://localhost:%d/' % port
+
+class GatewayTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+
+        self.backends = []
+        for name in ("a", "b"):
+            server = ThreadingSOAPServer(('localhost', 0))
+            def where(_SOAPContext = None, name = name):
+                self.calls.append((name, _SOAPContext.xmldata))
+                return name
+            server.registerFunction(MethodSig(where, context = 1),
+                                    "urn:where")
+            server.registerFunction(lambda x: x * 2, "urn:math", "double")
+            server.registerFunction(lambda: 1 / 0, "urn:math", "fail")
+            self.backends.append(serve(server, self))
+
+        self.gateway = SOAPGateway(('localhost', 0))
+        self.url = serve(self.gateway, self)
+        self.addCleanup(HTTPTransport.pool.clear)
+
+    def testRoute(self):
+        self.gateway.addRoute([self.backends[0]], "urn:where")
+        math = self.gateway.addRoute([self.backends[1]], "urn:math")
+
+        self.assertEqual(SOAPProxy(self.url, "urn:where").where(), "a")
+        self.assertEqual(SOAPProxy(self.url, "urn:math").double(21), 42)
+
+        # the request got to the backend as it was sent
+        data = buildSOAP(method = "where", namespace = "urn:where")
+        r = HTTPTransport().call(self.url, data, "urn:where")[0]
+        self.assertEqual(parseSOAPRPC(r).Result, "a")
+        self.assertEqual(self.calls[-1], ("a", data))
+
+        # faults of the backend come back as they are
+        try:
+            SOAPProxy(self.url, "urn:math").fail()
+        except faultType as e:
+            self.assertEqual(e.faultstring, "Method Failed")
+        else:
+            self.fail("no fault")
+
+        self.assertEqual((math.requests, math.failed), (2, 0))
+        self.assertTrue(0 < math.mean_time() <= math.max_time)
+        self.assertEqual(self.gateway.report().splitlines()[0].split(",")[0],
+                         "urn:math:*  2 requests")
+
+    def testMethodRoute(self):
+        self.gateway.addRoute(self.backends, "urn:where")
+        self.gateway.addRoute([self.backends[1]], "urn:math", "double")
+
+        # calls go to the backends of a route in turn
+        proxy = SOAPProxy(self.url, "urn:where")
+        self.assertEqual(sorted([proxy.where() for i in range(4)]),
+                         ["a", "a", "b", "b"])
+
+        proxy = SOAPProxy(self.url, "urn:math")
+        self.assertEqual(proxy.double(2), 4)
+        self.assertRaises(faultType, proxy.fail)
+        self.assertEqual(self.gateway.routes[("urn:math", "double")].requests,
+                         1)
+
+        # the namespace can come from the path, on both sides
+        self.gateway.addRoute([self.backends[1] + "urn/math"], "math",
+                              "double")
+        self.assertEqual(SOAPProxy(self.url + "math").double(3), 6)
+
+    def testNoRoute(self):
+        try:
+            SOAPProxy(self.url, "urn:where").where()
+        except faultType as e:
+            self.assertEqual(e.faultcode, "SOAP-ENV:Client")
+            self.assertEqual(e.faultstring, "Method Not Found")
+        else:
+            self.fail("no fault")
+
+        self.assertRaises(HTTPError, HTTPTransport().call, self.url,
+                          b"<a/>", None)
+
+    def testFailover(self):
+        route = self.gateway.addRoute([deadURL(), self.backends[0]],
+                                      "urn:where")
+        proxy = SOAPProxy(self.url, "urn:where")
+        for i in range(3):
+            self.assertEqual(proxy.where(), "a")
+
+        self.gateway.addRoute([deadURL()], "urn:math")
+        try:
+            SOAPProxy(self.url, "urn:math").double(1)
+        except faultType as e:
+            self.assertEqual(e.faultcode, "SOAP-ENV:Server")
+            self.assertEqual(e.faultstring, "Backend Failed")
+        else:
+            self.fail("no fault")
+        self.assertEqual(self.gateway.routes[("urn:math", None)].failed, 1)
+        self.assertEqual(route.failed, 0)
+
+    def testTimeout(self):
+        # a backend that takes the request and never answers
+        hung = socket.socket()
+        hung.bind(('localhost', 0))
+        hung.listen(1)
+        self.addCleanup(hung.close)
+
+        gateway = SOAPGateway(('localhost', 0), upstream_timeout = 0.3)
+        url = serve(gateway, self)
+        self.addCleanup(HTTPTransport.pool.clear)
+        route = gateway.addRoute(['http://localhost:%d/' %
+                                  hung.getsockname()[1]], "urn:math")
+        t = time.time()
+        try:
+            SOAPProxy(url, "urn:math").double(1)
+        except faultType as e:
+            self.assertEqual(e.faultstring, "Backend Failed")
+        else:
+            self.fail("no fault")
+        self.assertTrue(time.time() - t < 2)
+        self.assertEqual((route.requests, route.failed), (1, 1))
+        self.assertTrue(route.max_time >= 0.3)
+
+    def testKeepAlive(self):
+        self.gateway.addRoute([self.backends[0]], "urn:where")
+        proxy = SOAPProxy(self.url, "urn:where")
+        for i in range(5):
+            proxy.where()
+
+        # one connection to the gateway, and one on to the backend
+        host = self.backends[0].split("/")[2]
+        self.assertEqual(len(HTTPTransport.pool._idle[("http", host)]), 1)
+        self.assertEqual(len(HTTPTransport.pool), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for HTTP/1.1 persistent connections in the SOAP servers.
+#
+################################################################################
+
+import sys
+import socket
+import threading
+import time
+import unittest
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+
+class CountingHandler(SOAPRequestHandler):
+    def setup(self):
+        SOAPRequestHandler.setup(self)
+        self.server.clients.add(self.client_address)
+
+class KeepAliveServerTestCase(unittest.TestCase):
+
+    def startServer(self, serverClass = ThreadingSOAPServer, pool_size = None,
+                    **kw):
+        config = SOAPConfig(**kw)
+        if pool_size:
+            server = serverClass(('localhost', 0),
+                                 RequestHandler = CountingHandler,
+                                 config = config, pool_size = pool_size)
+        else:
+            server = serverClass(('localhost', 0),
+                                 RequestHandler = CountingHandler,
+                                 config = config)
+        server.clients = set()
+
+        def ping():
+            return 1
+
+        server.registerFunction(ping)
+
+        t = threading.Thread(target = server.serve_forever)
+        t.daemon = True
+        t.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(HTTPTransport.pool.clear)
+        return server, 'http://localhost:%d/' % server.server_address[1]
+
+    def testReuse(self):
+        server, url = self.startServer()
+        proxy = SOAPProxy(url)
+        for i in range(5):
+            self.assertEqual(proxy.ping(), 1)
+        self.assertEqual(len(server.clients), 1)
+
+    def testMaxRequests(self):
+        server, url = self.startServer(http_keepalive_max_requests = 2)
+        proxy = SOAPProxy(url)
+        for i in range(5):
+            self.assertEqual(proxy.ping(), 1)
+        self.assertEqual(len(server.clients), 3)
+
+    def testIdleTimeout(self):
+        server, url = self.startServer(http_keepalive_timeout = 0.1)
+        proxy = SOAPProxy(url)
+        self.assertEqual(proxy.ping(), 1)
+        time.sleep(0.3)
+        self.assertEqual(proxy.ping(), 1)
+        self.assertEqual(len(server.clients), 2)
+
+    def testSerialServer(self):
+        server, url = self.startServer(SOAPServer)
+        proxy = SOAPProxy(url)
+        for i in range(3):
+            self.assertEqual(proxy.ping(), 1)
+        self.assertEqual(len(server.clients), 3)
+
+    def testHTTP10(self):
+        server, url = self.startServer()
+        body = buildSOAP(method = "ping")
+        s = socket.create_connection(server.server_address)
+        s.sendall(b"POST / HTTP/1.0\r\nContent-type: text/xml\r\n"
+                  b"Content-length: %d\r\n\r\n" % len(body) + body)
+        data = b""
+        while 1:
+            chunk = s.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+        s.close()
+        self.assertTrue(b"\r\nConnection: close\r\n" in data)
+        self.assertEqual(parseSOAPRPC(data.split(b"\r\n\r\n", 1)[1]).Result,
+                         1)
+
+    def testRequestFault(self):
+        # faults raised parsing the request are sent, and the connection
+        # stays usable
+        server, url = self.startServer()
+        body = (b'<?xml version="1.0"?><E:Envelope xmlns:E="urn:not-soap">'
+                b'<E:Body><ping/></E:Body></E:Envelope>')
+        t = HTTPTransport()
+        t0 = time.time()
+        data = t.call(url, body, None, timeout = 5)[0]
+        self.assertTrue(time.time() - t0 < 2)
+        r = parseSOAPRPC(data)
+        self.assertTrue(isinstance(r, faultType))
+        self.assertEqual(r.faultcode, "SOAP-ENV:VersionMismatch")
+
+        self.assertEqual(SOAPProxy(url).ping(), 1)
+        self.assertEqual(len(server.clients), 1)
+
+    def testPooledServer(self):
+        # one worker, yet two clients each holding a persistent connection
+        server, url = self.startServer(PooledSOAPServer, pool_size = 1)
+        a, b = SOAPProxy(url), SOAPProxy(url)
+        a.transport.pool = HTTPConnectionPool()
+        b.transport.pool = HTTPConnectionPool()
+        self.addCleanup(a.transport.pool.clear)
+        self.addCleanup(b.transport.pool.clear)
+        t = time.time()
+        for i in range(3):
+            self.assertEqual(a.ping(), 1)
+            self.assertEqual(b.ping(), 1)
+        self.assertTrue(time.time() - t < 5)
+        self.assertEqual(len(server.clients), 2)
+        self.waitFor(lambda: server.idle == 2 and server.active == 0)
+
+    def testPooledMaxRequests(self):
+        server, url = self.startServer(PooledSOAPServer,
+                                       http_keepalive_max_requests = 2)
+        proxy = SOAPProxy(url)
+        for i in range(5):
+            self.assertEqual(proxy.ping(), 1)
+        self.assertEqual(len(server.clients), 3)
+
+    def testPooledIdleTimeout(self):
+        server, url = self.startServer(PooledSOAPServer,
+                                       http_keepalive_timeout = 0.1)
+        proxy = SOAPProxy(url)
+        self.assertEqual(proxy.ping(), 1)
+        self.waitFor(lambda: server.idle == 1)
+        self.waitFor(lambda: server.idle == 0)
+        self.assertEqual(proxy.ping(), 1)
+        self.assertEqual(len(server.clients), 2)
+
+    def waitFor(self, cond):
+        for i in range(300):
+            if cond():
+                return
+            time.sleep(0.01)
+        self.fail("condition not reached")
+
+if __name__ == '__main__':
+    unittest.main()
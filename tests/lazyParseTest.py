@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for parsing with the simple values converted when first read.
+#
+################################################################################
+
+import sys
+import datetime
+import pickle
+import threading
+import unittest
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+
+ENV = '''<?xml version="1.0"?>
+<SOAP-ENV:Envelope xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/"
+  xmlns:SOAP-ENC="http://schemas.xmlsoap.org/soap/encoding/"
+  xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+  xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+<SOAP-ENV:Body>%s</SOAP-ENV:Body></SOAP-ENV:Envelope>'''
+
+def message(body):
+    return (ENV % body).encode()
+
+VALUES = {"i": 5, "f": 2.5, "s": "text", "t": True,
+          "b": base64BinaryType(b"bytes"),
+          "l": [1, "two", 3.0], "n": None,
+          "d": {"x": 1, "y": ["a", "b"], "z": {"w": 7}}}
+
+class LazyParseTestCase(unittest.TestCase):
+
+    def testSameValues(self):
+        msg = buildSOAP(method = "m", kw = VALUES)
+        for backend in ("sax", "expat"):
+            r = parseSOAPRPC(msg, lazy = 1, backend = backend)
+            self.assertTrue(isinstance(r, lazyStructType))
+            self.assertEqual(simplify(r), simplify(parseSOAPRPC(msg)))
+
+    def testConvertedOnRead(self):
+        r = parseSOAPRPC(buildSOAP(method = "m", kw = VALUES), lazy = 1)
+        self.assertEqual(sorted(r._lazy), ["b", "f", "i", "s", "t"])
+        self.assertFalse("i" in r.__dict__)
+
+        self.assertEqual(r.i, 5)
+        self.assertEqual(r.__dict__["i"], 5)
+        self.assertFalse("i" in r._lazy)
+        self.assertEqual(r["f"], 2.5)
+        self.assertEqual(r[2], "text")
+        self.assertEqual(sorted(r._lazy), ["b", "t"])
+
+        self.assertTrue(r.l._lazy)
+        self.assertEqual(r.l[1], "two")
+        self.assertFalse(r.l._lazy)
+
+        self.assertEqual(r._asdict()["b"], b"bytes")
+        self.assertFalse(r._lazy)
+        self.assertEqual(r._keyord, list(VALUES))
+
+    def testErrorOnRead(self):
+        msg = message('<m><a xsi:type="xsd:int">x</a>'
+                      '<b xsi:type="xsd:int">1</b>'
+                      '<l SOAP-ENC:arrayType="xsd:ur-type[2]">'
+                      '<i xsi:type="xsd:int">1</i>'
+                      '<i xsi:type="xsd:byte">300</i></l></m>')
+        self.assertRaises(Exception, parseSOAPRPC, msg)
+
+        r = parseSOAPRPC(msg, lazy = 1)
+        self.assertEqual(r.b, 1)
+        self.assertRaises(ValueError, getattr, r, "a")
+        self.assertRaises(ValueError, getattr, r, "a")
+        self.assertRaises(ValueError, r._asdict)
+        self.assertRaises(OverflowError, r.l.__getitem__, 0)
+        self.assertRaises(OverflowError, list, r.l)
+
+    def testRepeated(self):
+        r = parseSOAPRPC(message('<m><a xsi:type="xsd:int">1</a>'
+                                 '<a xsi:type="xsd:int">2</a>'
+                                 '<b xsi:type="xsd:int">3</b>'
+                                 '<a xsi:type="xsd:int">4</a>'
+                                 '<c><x>1</x></c><c xsi:type="xsd:int">5</c>'
+                                 '</m>'), lazy = 1)
+        self.assertEqual(r._lazy["a"].__class__, list)
+        self.assertEqual(r.a, [1, 2, 4])
+        self.assertEqual(r._getItemAsList("b"), [3])
+        self.assertEqual((r.c[0].x, r.c[1]), ("1", 5))
+        self.assertEqual(r._keyord, ["a", "b", "c"])
+
+    def testRefs(self):
+        msg = message('<m><a href="#1"/><b xsi:type="xsd:int">2</b>'
+                      '<l SOAP-ENC:arrayType="xsd:ur-type[3]">'
+                      '<i xsi:type="xsd:int">1</i><i href="#2"/><i href="#1"/>'
+                      '</l></m>'
+                      '<v id="1" SOAP-ENC:root="0" xsi:type="xsd:int">7</v>'
+                      '<w id="2" SOAP-ENC:root="0"><x xsi:type="xsd:int">8</x>'
+                      '</w>')
+        for backend in ("sax", "expat"):
+            r = parseSOAPRPC(msg, lazy = 1, backend = backend)
+            self.assertEqual((r.a, r.b), (7, 2))
+            self.assertEqual((r.l[0], r.l[1].x, r.l[2]), (1, 8, 7))
+
+    def testArrays(self):
+        r = parseSOAPRPC(message(
+            '<m><l SOAP-ENC:arrayType="xsd:int[2,2]">'
+            '<i>1</i><i>2</i><i>3</i><i>4</i></l>'
+            '<s SOAP-ENC:arrayType="xsd:string[4]">'
+            '<i SOAP-ENC:position="[2]">c</i><i SOAP-ENC:position="[0]">a</i>'
+            '</s></m>'), lazy = 1)
+        self.assertTrue(isinstance(r.l, lazyTypedArrayType))
+        self.assertEqual(r.l._aslist(), [[1, 2], [3, 4]])
+        self.assertEqual(list(r.s), ["a", None, "c", None])
+
+    def testOthersConverted(self):
+        # faults, and values directly in the body or header, are not kept
+        r = parseSOAPRPC(message('<SOAP-ENV:Fault><faultcode>SOAP-ENV:Server'
+                                 '</faultcode><faultstring>no</faultstring>'
+                                 '</SOAP-ENV:Fault>'), lazy = 1)
+        self.assertEqual(r.faultstring, "no")
+
+        r, body = parseSOAPRPC(message('<a xsi:type="xsd:int">1</a>'
+                                       '<b xsi:type="xsd:int">2</b>'),
+                               body = 1, lazy = 1)
+        self.assertEqual((r, body.__dict__["b"]), (1, 2))
+
+        # native builds plain objects anyway
+        r = parseSOAPRPC(buildSOAP(method = "m", kw = VALUES), lazy = 1,
+                         native = 1)
+        self.assertEqual(r._lazy, None)
+        self.assertEqual(r.d, {"x": 1, "y": ["a", "b"], "z": {"w": 7}})
+
+    def testAttrs(self):
+        r, attrs = parseSOAPRPC(message('<m a="1"><b x="2" '
+                                        'xsi:type="xsd:int">1</b></m>'),
+                                attrs = 1, lazy = 1)
+        self.assertEqual(r.b, 1)
+        self.assertEqual(attrs[id(r)], {(None, "a"): "1"})
+        self.assertFalse(id(r.b) in attrs)
+
+    def testDateTimes(self):
+        msg = message('<m><d xsi:type="xsd:date">2001-02-03</d></m>')
+        r = parseSOAPRPC(msg, lazy = 1, datetime_objects = 1)
+        self.assertEqual(r.d, datetime.date(2001, 2, 3))
+        r = parseSOAPRPC(msg, lazy = 1)
+        self.assertEqual(r.d, (2001, 2, 3))
+
+    def testBuild(self):
+        # (plain bytes aren't written as base64)
+        values = dict(VALUES)
+        del values["b"]
+        msg = buildSOAP(method = "m", kw = values)
+        r = parseSOAPRPC(msg, lazy = 1)
+        again = parseSOAPRPC(buildSOAP(method = "n", kw = {"r": r}))
+        self.assertEqual(simplify(again.r), simplify(parseSOAPRPC(msg)))
+
+    def testPickle(self):
+        msg = buildSOAP(method = "m", kw = VALUES)
+        r = parseSOAPRPC(msg, lazy = 1)
+        self.assertEqual(simplify(pickle.loads(pickle.dumps(r))),
+                         simplify(parseSOAPRPC(msg)))
+
+        r = parseSOAPRPC(msg, lazy = 1)
+        for value in (r.d, r.l):
+            self.assertEqual(simplify(pickle.loads(pickle.dumps(value))),
+                             simplify(value))
+
+    def testProxy(self):
+        config = SOAPConfig(lazy_values = 1)
+        server = ThreadingSOAPServer(('localhost', 0), config = config)
+        server.registerFunction(lambda r: (r.__class__.__name__, r.i),
+                                funcName = "peek")
+        server.registerFunction(lambda: 1, funcName = "one")
+        t = threading.Thread(target = server.serve_forever)
+        t.daemon = True
+        t.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(HTTPTransport.pool.clear)
+
+        proxy = SOAPProxy('http://localhost:%d/' % server.server_address[1],
+                          config = config)
+        self.assertEqual(proxy.peek({"i": 3, "f": 1.5}),
+                         ["lazyStructType", 3])
+        # a single value is still unwrapped
+        self.assertEqual(proxy.one(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+# Time to parse a response of records with many typed fields, and read a
+# few of them, with the values converted as parsed and when first read.
+
+import time
+import sys
+sys.path.insert(1, "..")
+
+from SOAPpy import parseSOAPRPC
+
+N = 500
+
+record = ('<item>'
+          '<id xsi:type="xsd:int">%d</id>'
+          '<price xsi:type="xsd:double">12.75</price>'
+          '<amount xsi:type="xsd:decimal">1000.50</amount>'
+          '<count xsi:type="xsd:unsignedShort">42</count>'
+          '<active xsi:type="xsd:boolean">true</active>'
+          '<created xsi:type="xsd:dateTime">2001-02-03T04:05:06Z</created>'
+          '<day xsi:type="xsd:date">2001-02-03</day>'
+          '<token xsi:type="xsd:base64Binary">c2VjcmV0IHRva2Vu</token>'
+          '<code xsi:type="xsd:hexBinary">48656c6c6f</code>'
+          '<name xsi:type="xsd:string">name</name>'
+          '</item>')
+
+msg = ('''<?xml version="1.0" encoding="UTF-8"?>
+<SOAP-ENV:Envelope
+  xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/"
+  xmlns:SOAP-ENC="http://schemas.xmlsoap.org/soap/encoding/"
+  xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+  xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+<SOAP-ENV:Body>
+<ns1:getResponse xmlns:ns1="urn:test">
+<Result SOAP-ENC:arrayType="xsd:ur-type[%d]" xsi:type="SOAP-ENC:Array">
+%s
+</Result>
+</ns1:getResponse>
+</SOAP-ENV:Body>
+</SOAP-ENV:Envelope>''' % (N, "\n".join([record % i for i in range(N)]))).encode()
+
+def ParseTime(lazy, read, backend, repeat = 5):
+    best = None
+    for i in range(repeat):
+        start = time.time()
+        for item in parseSOAPRPC(msg, lazy = lazy, backend = backend).Result:
+            for name in read:
+                getattr(item, name)
+        start = time.time() - start
+        if best is None or start < best:
+            best = start
+    return best
+
+print()
+print("Parse %d records of 10 fields, %d bytes" % (N, len(msg)))
+for backend in ("sax", "expat"):
+    for read in ((), ("id",), ("id", "price", "created"),
+                 ("id", "price", "amount", "count", "active", "created",
+                  "day", "token", "code", "name")):
+        eager = ParseTime(0, read, backend)
+        lazy = ParseTime(1, read, backend)
+        print("%-6s read %2d fields  eager %7.2f ms  lazy %7.2f ms  %3.0f%%" %
+              (backend, len(read), eager * 1e3, lazy * 1e3,
+               lazy / eager * 100))
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+
+# Memory held by a parsed response of about a million elements: an array
+# of structs with three scalar fields each.  Pass the number of elements
+# to try another size.
+
+import time
+import tracemalloc
+import sys
+sys.path.insert(1, "..")
+
+from SOAPpy import parseSOAPRPC
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+S = N // 4                      # each struct is four elements
+
+msg = ('''<?xml version="1.0" encoding="UTF-8"?>
+<SOAP-ENV:Envelope
+  xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/"
+  xmlns:SOAP-ENC="http://schemas.xmlsoap.org/soap/encoding/"
+  xmlns:xsi="http://www.w3.org/1999/XMLSchema-instance"
+  xmlns:xsd="http://www.w3.org/1999/XMLSchema">
+<SOAP-ENV:Body>
+<ns1:listResponse xmlns:ns1="urn:test">
+<Result SOAP-ENC:arrayType="xsd:anyType[%d]" xsi:type="SOAP-ENC:Array">
+%s</Result>
+</ns1:listResponse>
+</SOAP-ENV:Body>
+</SOAP-ENV:Envelope>''' % (S, ''.join(['<item>'
+    '<id xsi:type="xsd:int">%d</id>'
+    '<name xsi:type="xsd:string">item %d</name>'
+    '<price xsi:type="xsd:double">%d.25</price>'
+    '</item>\n' % (i, i, i) for i in range(S)]))).encode()
+
+tracemalloc.start()
+t = time.time()
+r = parseSOAPRPC(msg)
+t = time.time() - t
+held, peak = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+
+print()
+print("Parse %d elements (%d structs, %d bytes)" % (N, S, len(msg)))
+print("time   %8.2f sec" % t)
+print("held   %8.1f MB  %6.0f bytes per struct" % (held / 1e6, held / S))
+print("peak   %8.1f MB" % (peak / 1e6))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for parsing straight into simple Python types.
+#
+################################################################################
+
+import sys
+import threading
+import unittest
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+from SOAPpy.Types import simplify
+
+ENV = '''<?xml version="1.0" encoding="UTF-8"?>
+<SOAP-ENV:Envelope
+  SOAP-ENV:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/"
+  xmlns:SOAP-ENC="http://schemas.xmlsoap.org/soap/encoding/"
+  xmlns:xsi="http://www.w3.org/1999/XMLSchema-instance"
+  xmlns:xsd="http://www.w3.org/1999/XMLSchema"
+  xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/">
+<SOAP-ENV:Body>
+%s
+</SOAP-ENV:Body>
+</SOAP-ENV:Envelope>'''
+
+class NativeParseTestCase(unittest.TestCase):
+
+    def check(self, msg):
+        if isinstance(msg, str):
+            msg = (ENV % msg).encode()
+        expected = simplify(parseSOAPRPC(msg))
+        r = parseSOAPRPC(msg, native = 1)
+        self.assertTrue(isinstance(r, structType))
+        self.assertEqual(simplify(r, deep = 0), expected)
+        return expected
+
+    def testBuilt(self):
+        s = structType()
+        s._addItem("a", 1)
+        s._addItem("b", [1, 2.5, "x", None])
+        t = structType()
+        for i in range(3):
+            t._addItem("a", i)
+        r = self.check(buildSOAP(method = "m", kw = {
+            "s": s, "t": t, "l": [s, s, {"x": []}], "n": None,
+            "e": [], "str": "hi"}))
+        self.assertEqual(r["t"], {"a": [0, 1, 2]})
+
+    def testRefs(self):
+        # a forward reference, a backward one and one inside an array
+        r = self.check('''
+<m:r xmlns:m="urn:m"><a href="#1"/><l SOAP-ENC:arrayType="xsd:anyType[2]"
+  xsi:type="SOAP-ENC:Array"><item href="#1"/><item>x</item></l></m:r>
+<s id="1" SOAP-ENC:root="0"><v xsi:type="xsd:int">5</v><w href="#2"/></s>
+<w id="2" SOAP-ENC:root="0" xsi:type="xsd:string">y</w>''')
+        self.assertEqual(r, {"a": {"v": 5, "w": "y"},
+                             "l": [{"v": 5, "w": "y"}, "x"]})
+
+    def testArrays(self):
+        self.check('''<m:r xmlns:m="urn:m">
+<a SOAP-ENC:arrayType="xsd:int[4]" xsi:type="SOAP-ENC:Array">
+<i>1</i><i>2</i></a>
+<b SOAP-ENC:arrayType="xsd:int[4]" SOAP-ENC:offset="[1]"
+  xsi:type="SOAP-ENC:Array"><i>1</i><i>2</i></b>
+<c SOAP-ENC:arrayType="xsd:int[3]" xsi:type="SOAP-ENC:Array">
+<i SOAP-ENC:position="[2]">7</i></c>
+<d SOAP-ENC:arrayType="xsd:int[2,2]" xsi:type="SOAP-ENC:Array">
+<i>1</i><i>2</i><i>3</i><i>4</i></d>
+</m:r>''')
+
+    def testFault(self):
+        f = faultType("SOAP-ENV:Server", "broken", {"why": [1, 2]})
+        r = parseSOAPRPC(buildSOAP(f), native = 1)
+        self.assertTrue(isinstance(r, faultType))
+        self.assertTrue(isinstance(r.detail, structType))
+
+    def testHeader(self):
+        h = headerType({"token": {"a": 1}})
+        r, header = parseSOAPRPC(buildSOAP(method = "m", header = h,
+                                           kw = {"s": {"a": 1}}),
+                                 header = 1, native = 1)
+        self.assertTrue(isinstance(header.token, structType))
+        self.assertEqual(r.s, {"a": 1})
+
+    def testIter(self):
+        msg = buildSOAP(method = "m", kw = {"l": [{"a": i} for i in
+                                                  range(3)]})
+        self.assertEqual(list(iterSOAPRPC(msg, native = 1)),
+                         [{"a": 0}, {"a": 1}, {"a": 2}])
+
+class NativeCallTestCase(unittest.TestCase):
+
+    def testCall(self):
+        config = SOAPConfig(simplify_objects = 1)
+        server = ThreadingSOAPServer(('localhost', 0), config = config)
+
+        def echo(s, l):
+            assert type(s) == dict and type(l) == list
+            return {"s": s, "l": l}
+
+        server.registerFunction(echo)
+        t = threading.Thread(target = server.serve_forever)
+        t.daemon = True
+        t.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(HTTPTransport.pool.clear)
+
+        proxy = SOAPProxy('http://localhost:%d/' % server.server_address[1],
+                          config = config)
+        s = {"a": 1, "b": [1, 2]}
+        self.assertEqual(proxy.echo(s, [s, "x"]),
+                         {"s": s, "l": [s, "x"]})
+        self.assertRaises(faultType, proxy.echo, 1)
+
+if __name__ == '__main__':
+    unittest.main()
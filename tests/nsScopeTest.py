@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for the namespace scopes used by SOAPBuilder.
+#
+################################################################################
+
+import sys
+import unittest
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+from SOAPpy.SOAPBuilder import _NSScope
+
+class NSScopeTestCase(unittest.TestCase):
+
+    def testRestore(self):
+        s = _NSScope({"urn:a": "a"})
+        mark = len(s.log)
+        s["urn:b"] = "b"
+        inner = len(s.log)
+        s["urn:a"] = "x"
+        s.restore(inner)
+        self.assertEqual(s, {"urn:a": "a", "urn:b": "b"})
+        s.restore(mark)
+        self.assertEqual(s, {"urn:a": "a"})
+
+    def testSiblings(self):
+        # a namespace declared on an element is not in scope for its
+        # siblings, so each of them declares it again
+        s = structType()
+        s._addItem("a", 1)
+        s._setAttr(("urn:x", "flag"), "1")
+        t = structType()
+        t._addItem("a", 2)
+        t._setAttr(("urn:x", "flag"), "2")
+        config = SOAPConfig(buildWithNamespacePrefix = 1)
+        msg = buildSOAP(method = "m", kw = {"s": s, "t": t}, config = config)
+        self.assertEqual(msg.count(b'="urn:x"'), 2)
+
+        r = parseSOAPRPC(msg)
+        self.assertEqual((r.s.a, r.t.a), (1, 2))
+
+    def testMethodScope(self):
+        msg = buildSOAP(method = "m", namespace = "urn:m",
+                        kw = {"s": "x"}, config = SOAPConfig(
+                            buildWithNamespacePrefix = 1))
+        self.assertEqual(msg.count(b'xmlns:ns1="urn:m"'), 1)
+        self.assertEqual(parseSOAPRPC(msg).s, "x")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for parsing numeric arrays in bulk into array.array / NumPy arrays.
+#
+################################################################################
+
+import sys
+import array
+import threading
+import unittest
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+from SOAPpy.Parser import numpy
+
+ENV = '''<?xml version="1.0" encoding="UTF-8"?>
+<SOAP-ENV:Envelope
+  xmlns:SOAP-ENC="http://schemas.xmlsoap.org/soap/encoding/"
+  xmlns:xsi="http://www.w3.org/1999/XMLSchema-instance"
+  xmlns:xsd="http://www.w3.org/1999/XMLSchema"
+  xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/">
+<SOAP-ENV:Body><m:r xmlns:m="urn:m">%s</m:r></SOAP-ENV:Body>
+</SOAP-ENV:Envelope>'''
+
+def Array(t, items, attrs = ''):
+    return ('<a SOAP-ENC:arrayType="xsd:%s" xsi:type="SOAP-ENC:Array"%s>%s'
+            '</a>' % (t, attrs, ''.join(items)))
+
+class NumericArrayTestCase(unittest.TestCase):
+
+    def parse(self, body, numeric_arrays = 1):
+        return parseSOAPRPC((ENV % body).encode(),
+                            numeric_arrays = numeric_arrays).a
+
+    def testTypes(self):
+        m = buildSOAP(method = "m", kw = {
+            "d": [1.5, -2.25, float("inf")], "i": [1, 2, -3],
+            "b": [True, False], "s": ["x"], "e": []})
+        r = parseSOAPRPC(m, numeric_arrays = 1)
+        self.assertEqual(r.d, array.array('d', [1.5, -2.25, float("inf")]))
+        self.assertEqual(r.i, array.array('i', [1, 2, -3]))
+        self.assertEqual(r.b, array.array('B', [1, 0]))
+        self.assertEqual(list(r.s), ["x"])
+
+        r = parseSOAPRPC(m)
+        self.assertTrue(isinstance(r.d, typedArrayType))
+
+    def testItems(self):
+        a = self.parse(Array("long[3]", ['<item> 7 </item>',
+                                         '<item xsi:type="xsd:long">8</item>',
+                                         '<v xsi:type="xsd:integer">9</v>']))
+        self.assertEqual(a, array.array('q', [7, 8, 9]))
+        a = self.parse(Array("float[]", ['<i>1e3</i>', '<i>NaN</i>',
+                                         '<i>-INF</i>']))
+        self.assertEqual(a.typecode, 'd')
+        self.assertEqual(str(list(a)), "[1000.0, nan, -inf]")
+
+    def testLimits(self):
+        self.assertRaises(OverflowError, self.parse,
+                          Array("int[2]", ['<i>1</i>', '<i>2147483648</i>']))
+        self.assertRaises(UnderflowError, self.parse,
+                          Array("byte[1]", ['<i>-129</i>']))
+        self.assertRaises(ValueError, self.parse,
+                          Array("int[1]", ['<i>x</i>']))
+        self.assertRaises(AttributeError, self.parse,
+                          Array("boolean[1]", ['<i>yes</i>']))
+        self.assertEqual(self.parse(Array("unsignedByte[2]",
+                                          ['<i>0</i>', '<i>255</i>'])),
+                         array.array('B', [0, 255]))
+
+    def testStrictRange(self):
+        # the parser's config is range checked against, in bulk or not
+        body = (ENV % Array("float[1]", ['<i>1e39</i>'])).encode()
+        config = SOAPConfig(strict_range = 1)
+        for numeric_arrays in (0, 1):
+            self.assertEqual(list(parseSOAPRPC(body, numeric_arrays =
+                                               numeric_arrays).a), [1e39])
+            self.assertRaises(OverflowError, parseSOAPRPC, body,
+                              numeric_arrays = numeric_arrays,
+                              config = config)
+
+    def testFallback(self):
+        # odd items and arrays are parsed item by item, as without
+        # numeric_arrays
+        for body in (
+            Array("int[3]", ['<i>1</i>', '<i xsi:null="1"/>', '<i>3</i>']),
+            Array("int[3]", ['<i>1</i>', '<i>2</i>']),
+            Array("int[3]", ['<i>1</i>'], ' SOAP-ENC:offset="[2]"'),
+            Array("int[2,1]", ['<i>1</i>', '<i>2</i>']),
+            Array("string[1]", ['<i>1</i>']),
+            Array("int[2]", ['<i>1</i>', '<i xsi:type="xsd:string">2</i>'])):
+            a = self.parse(body)
+            self.assertTrue(isinstance(a, arrayType), body)
+            self.assertEqual(list(a), list(self.parse(body, 0)), body)
+
+    def testRefs(self):
+        r = parseSOAPRPC((ENV % '<a href="#1"/><b href="#1"/>').replace(
+            '</SOAP-ENV:Body>', Array("double[1]", ['<i>2.5</i>'],
+                                      ' id="1" SOAP-ENC:root="0"') +
+            '</SOAP-ENV:Body>').encode(), numeric_arrays = 1)
+        self.assertEqual(r.a, array.array('d', [2.5]))
+        self.assertTrue(r.a is r.b)
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def testNumpy(self):
+        a = self.parse(Array("double[2]", ['<i>1</i>', '<i>2</i>']), 'numpy')
+        self.assertTrue(isinstance(a, numpy.ndarray))
+        self.assertEqual(a.dtype, numpy.float64)
+        a = self.parse(Array("boolean[2]", ['<i>1</i>', '<i>false</i>']),
+                       'numpy')
+        self.assertEqual(a.dtype, bool)
+
+    def testCall(self):
+        config = SOAPConfig(numeric_arrays = 1)
+        server = ThreadingSOAPServer(('localhost', 0), config = config)
+        server.registerFunction(lambda l: (type(l).__name__, sum(l)),
+                                funcName = "total")
+        server.registerFunction(lambda n: [i * 0.5 for i in range(n)],
+                                funcName = "halves")
+        t = threading.Thread(target = server.serve_forever)
+        t.daemon = True
+        t.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(HTTPTransport.pool.clear)
+
+        proxy = SOAPProxy('http://localhost:%d/' % server.server_address[1],
+                          config = config)
+        self.assertEqual(list(proxy.total([1.5, 2.5])), ["array", 4.0])
+        self.assertEqual(proxy.halves(4), array.array('d', [0, .5, 1, 1.5]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+# Time and peak memory of parsing a large struct-heavy response into
+# simple Python types: parsing into SOAPpy objects and simplifying them
+# afterwards, against parsing natively.
+
+import time
+import tracemalloc
+import sys
+sys.path.insert(1, "..")
+
+from SOAPpy import buildSOAP, parseSOAPRPC, structType
+from SOAPpy.Types import simplify
+
+N = 10000
+
+def record(i):
+    s = structType()
+    s._addItem("id", i)
+    s._addItem("name", "item %d" % i)
+    s._addItem("price", i * 0.25)
+    s._addItem("tags", ["t%d" % i, "u%d" % i])
+    s._addItem("dims", {"w": i, "h": i + 1})
+    return s
+
+msg = buildSOAP(method = "listResponse", kw = {"Result":
+                                                [record(i) for i in range(N)]})
+
+def Simplified():
+    return simplify(parseSOAPRPC(msg))
+
+def Native():
+    return simplify(parseSOAPRPC(msg, native = 1), deep = 0)
+
+def ParseTime(parse, repeat = 3):
+    best = None
+    for i in range(repeat):
+        t = time.time()
+        parse()
+        t = time.time() - t
+        if best is None or t < best:
+            best = t
+    return best
+
+def PeakMemory(parse):
+    tracemalloc.start()
+    parse()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+assert Simplified() == Native()
+
+print()
+print("Parse %d structs (%d bytes) to simple types" % (N, len(msg)))
+for name, parse in (("simplify", Simplified), ("native", Native)):
+    print("%-8s %8.3f sec %8.1f MB" % (name, ParseTime(parse),
+                                       PeakMemory(parse) / 1e6))
+
+D = 200000
+
+doubles = buildSOAP(method = "valuesResponse",
+                    kw = {"Result": [i * 0.001 for i in range(D)]})
+
+def PerItem():
+    return parseSOAPRPC(doubles)
+
+def Bulk():
+    return parseSOAPRPC(doubles, numeric_arrays = 1)
+
+print()
+print("Parse %d doubles (%d bytes)" % (D, len(doubles)))
+for name, parse in (("per item", PerItem), ("bulk", Bulk)):
+    print("%-8s %8.3f sec %8.1f MB" % (name, ParseTime(parse),
+                                       PeakMemory(parse) / 1e6))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for the per-thread reuse of parsers and SOAPParser.reset().
+#
+################################################################################
+
+import sys
+import threading
+import unittest
+import xml.sax
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+from SOAPpy.Parser import _readers, _makeParser
+
+def message(n):
+    return buildSOAP(method = "m", namespace = "urn:x%d" % n,
+                     kw = {"n": n, "l": [n, "x%d" % n]})
+
+class ParserPoolTestCase(unittest.TestCase):
+
+    def testReuse(self):
+        for backend in ("sax", "expat"):
+            first, attrs = parseSOAPRPC(message(1), attrs = 1,
+                                        backend = backend)
+            pair = _readers.free[(False, False, True, False, backend)]
+
+            second = parseSOAPRPC(message(2), backend = backend)
+            self.assertEqual(
+                _readers.free[(False, False, True, False, backend)], pair)
+
+            # earlier results are left alone
+            self.assertEqual((first.n, list(first.l)), (1, [1, "x1"]))
+            self.assertTrue(attrs and attrs is not pair[0].attrs)
+            self.assertEqual((second.n, list(second.l)), (2, [2, "x2"]))
+
+            # nothing is kept of the last message
+            self.assertEqual(pair[0].body, None)
+            self.assertEqual(pair[0].attrs, {})
+
+    def testFailure(self):
+        for backend in ("sax", "expat"):
+            parseSOAPRPC(message(1), backend = backend)
+            key = (False, False, True, False, backend)
+            pair = _readers.free[key]
+            self.assertRaises(xml.sax.SAXParseException, parseSOAPRPC,
+                              message(2)[:-20], backend = backend)
+            self.assertFalse(key in _readers.free)
+            self.assertRaises(Error, parseSOAPRPC,
+                              b"<a/>", backend = backend)
+            self.assertEqual(parseSOAPRPC(message(3), backend = backend).n,
+                             3)
+            self.assertFalse(_readers.free[key][0] is pair[0])
+
+    def testReset(self):
+        t = SOAPParser()
+        parser = _makeParser(t)
+        try:
+            parser.feed(message(1)[:-100])
+        except xml.sax.SAXParseException:
+            pass
+        self.assertTrue(len(t._stack) > 1)
+
+        t.reset(native = 1)
+        self.assertEqual(len(t._stack), 1)
+        self.assertEqual((t._ids, t._refs, t.attrs), ({}, {}, {}))
+        self.assertFalse("urn:x1" in t._prem_r)
+
+        parser = _makeParser(t)
+        parser.feed(message(2))
+        parser.close()
+        self.assertEqual(t.body[0].l, [2, "x2"])
+
+    def testInterleaved(self):
+        msgs = [message(1), message(2)]
+        parsers = [SOAPPushParser(backend = "expat"),
+                   SOAPPushParser(backend = "expat")]
+        for i in range(0, len(msgs[0]), 50):
+            for p, m in zip(parsers, msgs):
+                p.feed(m[i:i + 50])
+        self.assertEqual([p.close().n for p in parsers], [1, 2])
+
+    def testThreads(self):
+        errors = []
+
+        def work(n):
+            try:
+                for i in range(50):
+                    r = parseSOAPRPC(message(n),
+                                     backend = ("sax", "expat")[n & 1])
+                    if r.n != n or list(r.l) != [n, "x%d" % n]:
+                        errors.append((n, r))
+            except Exception as e:
+                errors.append((n, e))
+
+        threads = [threading.Thread(target = work, args = (n,))
+                   for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+
+# Time to find the method of requests of a few sizes with peekSOAP(),
+# against parsing them with parseSOAPRPC().
+
+import time
+import sys
+sys.path.insert(1, "..")
+
+from SOAPpy import buildSOAP, headerType, parseSOAPRPC, peekSOAP
+
+N = 200
+
+def Time(f, msg, backend):
+    best = None
+    for i in range(5):
+        start = time.time()
+        for j in range(N):
+            f(msg, backend = backend)
+        start = time.time() - start
+        if best is None or start < best:
+            best = start
+    return best / N
+
+print()
+print("Find the method of a request, per message")
+for items in (1, 100, 2000):
+    msg = buildSOAP(method = "getQuote", namespace = "urn:quotes",
+                    header = headerType({"session": "abc"}),
+                    kw = {"symbols": ["ABC%d" % i for i in range(items)]})
+    for backend in ("sax", "expat"):
+        full = Time(parseSOAPRPC, msg, backend)
+        peek = Time(peekSOAP, msg, backend)
+        print("%7d bytes %-6s parse %9.1f usec  peek %7.1f usec" %
+              (len(msg), backend, full * 1e6, peek * 1e6))
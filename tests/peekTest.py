@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for peekSOAP(), reading a message only up to its first body entry.
+#
+################################################################################
+
+import sys
+import unittest
+from xml.sax import SAXParseException
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+from SOAPpy.Parser import _peekers
+
+ENV = '''<?xml version="1.0"?>
+<SOAP-ENV:Envelope xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/"
+  xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+  xmlns:xsd="http://www.w3.org/2001/XMLSchema">%s</SOAP-ENV:Envelope>'''
+
+def message(inside):
+    return (ENV % inside).encode()
+
+BACKENDS = ("sax", "expat")
+
+class PeekTestCase(unittest.TestCase):
+
+    def testPeek(self):
+        msg = message('<SOAP-ENV:Header><auth xsi:type="xsd:string">x</auth>'
+                      '<t SOAP-ENV:mustUnderstand="1"><id>7</id></t>'
+                      '</SOAP-ENV:Header>\n<SOAP-ENV:Body>\n'
+                      '<ns1:getQuote xmlns:ns1="urn:q"><a>1</a></ns1:getQuote>'
+                      '</SOAP-ENV:Body>')
+        for backend in BACKENDS:
+            p = peekSOAP(msg, backend = backend)
+            self.assertEqual((p.namespace, p.method), ("urn:q", "getQuote"))
+            self.assertEqual((p.header.auth, p.header.t.id), ("x", "7"))
+            self.assertEqual(
+                p.attrs[id(p.header.t)][(NS.ENV, "mustUnderstand")], "1")
+
+            self.assertTrue(msg[p.header_offset:].startswith(
+                b"<SOAP-ENV:Header>"))
+            self.assertTrue(msg[p.body_offset:].startswith(
+                b"<SOAP-ENV:Body>"))
+            self.assertTrue(msg[p.method_offset:].startswith(
+                b"<ns1:getQuote "))
+
+            # the rest of the message isn't needed
+            p = peekSOAP(msg[:msg.index(b"<a>")], backend = backend)
+            self.assertEqual(p.method, "getQuote")
+
+    def testOffsetsInBytes(self):
+        msg = message('<SOAP-ENV:Body><!-- éé -->'
+                      '<mé/></SOAP-ENV:Body>')
+        for backend in BACKENDS:
+            p = peekSOAP(msg, backend = backend)
+            self.assertEqual(p.method, "mé")
+            self.assertTrue(msg[p.method_offset:].startswith(
+                "<mé/>".encode()))
+            self.assertEqual(p.header_offset, None)
+
+    def testEmpty(self):
+        for backend in BACKENDS:
+            p = peekSOAP(message('<SOAP-ENV:Body> </SOAP-ENV:Body>'),
+                         backend = backend)
+            self.assertEqual((p.method, p.namespace, p.header,
+                              p.method_offset), (None, None, None, None))
+
+    def testChecked(self):
+        for backend in BACKENDS:
+            self.assertRaises(Error, peekSOAP, b'<a><b/></a>',
+                              backend = backend)
+            self.assertRaises(faultType, peekSOAP,
+                              b'<Envelope xmlns="urn:x"><Body><m/></Body>'
+                              b'</Envelope>', backend = backend)
+            self.assertRaises(Error, peekSOAP,
+                              message('<SOAP-ENV:Header/><m/>'),
+                              backend = backend)
+            self.assertRaises(Error, peekSOAP, message(''),
+                              backend = backend)
+            self.assertRaises(SAXParseException, peekSOAP,
+                              message('<SOAP-ENV:Header><a></b>'
+                                      '</SOAP-ENV:Header>'),
+                              backend = backend)
+            # stopping short of the first body entry
+            self.assertRaises(SAXParseException, peekSOAP,
+                              message('<SOAP-ENV:Body>')[:-30],
+                              backend = backend)
+
+    def testReused(self):
+        msg = buildSOAP(method = "m", namespace = "urn:x", kw = {"a": 1})
+        for backend in BACKENDS:
+            for i in range(3):
+                self.assertEqual(peekSOAP(msg, backend = backend).method, "m")
+        self.assertEqual(len(_peekers.free), 2)
+
+        # and after a message that failed
+        self.assertRaises(Error, peekSOAP, b'<a/>')
+        self.assertEqual(peekSOAP(msg).namespace, "urn:x")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for PooledSOAPServer, the bounded worker-pool SOAP server.
+#
+################################################################################
+
+import sys
+import threading
+import time
+import unittest
+import http.client
+import socket
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+
+class PooledServerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.server = PooledSOAPServer(('localhost', 0), pool_size = 2,
+                                       queue_size = 1)
+
+        def wait():
+            self.release.wait(10)
+            return 1
+
+        def ping():
+            return 2
+
+        self.server.registerFunction(wait)
+        self.server.registerFunction(ping)
+
+        t = threading.Thread(target = self.server.serve_forever)
+        t.daemon = True
+        t.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.addCleanup(self.release.set)
+        self.addCleanup(HTTPTransport.pool.clear)
+
+        self.url = 'http://localhost:%d/' % self.server.server_address[1]
+
+    def waitFor(self, cond):
+        for i in range(200):
+            if cond():
+                return
+            time.sleep(0.01)
+        self.fail("condition not reached")
+
+    def call(self, results, method):
+        try:
+            results.append(getattr(SOAPProxy(self.url), method)())
+        except Exception as e:
+            results.append(e)
+
+    def testPing(self):
+        proxy = SOAPProxy(self.url)
+        for i in range(5):
+            self.assertEqual(proxy.ping(), 2)
+        self.waitFor(lambda: self.server.active == 0)
+        self.assertEqual(self.server.rejected, 0)
+
+    def testReject(self):
+        results = []
+        threads = []
+        for i in range(3):
+            t = threading.Thread(target = self.call, args = (results, 'wait'))
+            t.start()
+            threads.append(t)
+            if i < 2:
+                self.waitFor(lambda: self.server.active == i + 1)
+        self.waitFor(lambda: self.server.queued == 1)
+
+        # both workers are busy and the queue is full
+        try:
+            SOAPProxy(self.url).ping()
+        except HTTPError as e:
+            self.assertEqual(e.code, 503)
+        else:
+            self.fail("request was not rejected")
+        self.assertEqual(self.server.rejected, 1)
+
+        conn = http.client.HTTPConnection('localhost',
+                                          self.server.server_address[1])
+        conn.request("POST", "/", buildSOAP(method = "ping"),
+                     {"Content-type": "text/xml"})
+        r = conn.getresponse()
+        self.assertEqual(r.status, 503)
+        fault = parseSOAPRPC(r.read())
+        self.assertTrue(isinstance(fault, faultType))
+        self.assertEqual(fault.faultstring, "Server Busy")
+        conn.close()
+        self.assertEqual(self.server.rejected, 2)
+
+        self.release.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, [1, 1, 1])
+        self.waitFor(lambda: self.server.active == 0)
+        self.assertEqual(self.server.queued, 0)
+
+    def testSlowReject(self):
+        threads = []
+        for i in range(3):
+            t = threading.Thread(target = self.call, args = ([], 'wait'))
+            t.start()
+            threads.append(t)
+            if i < 2:
+                self.waitFor(lambda: self.server.active == i + 1)
+        self.waitFor(lambda: self.server.queued == 1)
+
+        # a rejected client trickling a large request doesn't hold up the
+        # rejection of the others
+        stop = threading.Event()
+        def trickle():
+            s = socket.create_connection(self.server.server_address)
+            try:
+                s.sendall(b"POST / HTTP/1.1\r\nContent-length: 1000000\r\n"
+                          b"\r\n")
+                while not stop.wait(0.1):
+                    s.sendall(b"x")
+            except OSError:
+                pass
+            finally:
+                s.close()
+        slow = threading.Thread(target = trickle)
+        slow.start()
+        self.addCleanup(slow.join)
+        self.addCleanup(stop.set)
+        self.waitFor(lambda: self.server.rejected == 1)
+
+        t = time.time()
+        self.assertRaises(HTTPError, SOAPProxy(self.url).ping)
+        self.assertTrue(time.time() - t < 1.5)
+        self.assertEqual(self.server.rejected, 2)
+
+        self.release.set()
+        for t in threads:
+            t.join()
+
+    def testIdleReject(self):
+        threads = []
+        for i in range(3):
+            t = threading.Thread(target = self.call, args = ([], 'wait'))
+            t.start()
+            threads.append(t)
+            if i < 2:
+                self.waitFor(lambda: self.server.active == i + 1)
+        self.waitFor(lambda: self.server.queued == 1)
+
+        # several clients connecting and sending nothing are all answered
+        # at once, without holding up the rejection of the next one
+        t = time.time()
+        idle = []
+        for i in range(6):
+            s = socket.create_connection(self.server.server_address)
+            self.addCleanup(s.close)
+            idle.append(s)
+        self.waitFor(lambda: self.server.rejected == 6)
+        for s in idle:
+            s.settimeout(1)
+            self.assertTrue(s.recv(100).startswith(b"HTTP/1.0 503 "))
+        self.assertTrue(time.time() - t < 1)
+
+        t = time.time()
+        self.assertRaises(HTTPError, SOAPProxy(self.url).ping)
+        self.assertTrue(time.time() - t < 0.5)
+        self.assertEqual(self.server.rejected, 7)
+
+        # and their connections are closed after reject_timeout
+        for s in idle:
+            while s.recv(65536):
+                pass
+
+        self.release.set()
+        for t in threads:
+            t.join()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for PreforkSOAPServer, the multi-process SOAP server.
+#
+################################################################################
+
+import sys
+import os
+import signal
+import subprocess
+import threading
+import time
+import unittest
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+
+SERVER = '''
+import sys, time
+sys.path.insert(1, "..")
+from SOAPpy import *
+
+def slow():
+    time.sleep(1)
+    return 1
+
+server = PreforkSOAPServer(('localhost', 0), workers = 2)
+server.registerFunction(slow)
+print(server.server_address[1])
+sys.stdout.flush()
+server.serve_forever(poll_interval = 0.05)
+'''
+
+class PreforkServerTestCase(unittest.TestCase):
+
+    def startServer(self, **kw):
+        server = PreforkSOAPServer(('localhost', 0), workers = 2, **kw)
+
+        def pid():
+            return os.getpid()
+
+        server.registerFunction(pid)
+
+        t = threading.Thread(target = server.serve_forever,
+                             kwargs = {'poll_interval': 0.05})
+        t.daemon = True
+        t.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(HTTPTransport.pool.clear)
+        self.waitFor(lambda: len(server.pids) == 2)
+        return server, 'http://localhost:%d/' % server.server_address[1]
+
+    def waitFor(self, cond):
+        for i in range(500):
+            if cond():
+                return
+            time.sleep(0.01)
+        self.fail("condition not reached")
+
+    def callAll(self, url, n = 20):
+        pids = set()
+        for i in range(n):
+            pids.add(SOAPProxy(url).pid())
+        return pids
+
+    def testWorkers(self):
+        server, url = self.startServer()
+        pids = self.callAll(url)
+        self.assertTrue(pids <= set(server.pids.keys()))
+        self.assertTrue(os.getpid() not in pids)
+
+    def testRestart(self):
+        server, url = self.startServer()
+        victim = list(server.pids.keys())[0]
+        os.kill(victim, signal.SIGKILL)
+        self.waitFor(lambda: server.restarts == 1 and len(server.pids) == 2)
+        self.assertTrue(victim not in server.pids)
+        self.assertTrue(self.callAll(url, 5) <= set(server.pids.keys()))
+
+    def testShutdown(self):
+        server, url = self.startServer()
+        pids = list(server.pids.keys())
+        server.shutdown()
+        self.assertEqual(server.pids, {})
+        for pid in pids:
+            self.assertRaises(ProcessLookupError, os.kill, pid, 0)
+
+    if hasattr(socket, "SO_REUSEPORT"):
+        def testReusePort(self):
+            server, url = self.startServer(reuse_port = 1)
+            pids = self.callAll(url)
+            self.assertTrue(pids <= set(server.pids.keys()))
+
+    def testDrainOnSIGTERM(self):
+        p = subprocess.Popen([sys.executable, "-c", SERVER],
+                             stdout = subprocess.PIPE)
+        self.addCleanup(p.stdout.close)
+        url = 'http://localhost:%d/' % int(p.stdout.readline())
+
+        results = []
+        t = threading.Thread(
+            target = lambda: results.append(SOAPProxy(url).slow()))
+        t.start()
+        time.sleep(0.3)
+
+        # the request in flight completes before the workers exit
+        p.send_signal(signal.SIGTERM)
+        t.join()
+        self.assertEqual(results, [1])
+        self.assertEqual(p.wait(10), 0)
+
+if __name__ == '__main__':
+    unittest.main()
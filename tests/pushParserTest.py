@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for SOAPPushParser, the incremental SOAP parser.
+#
+################################################################################
+
+import sys
+import contextlib
+import io
+import socket
+import threading
+import unittest
+import xml.sax
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+
+class PushParserTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.msg = buildSOAP(method = "echo", namespace = "urn:test",
+                             header = headerType({"token": "abc"}),
+                             kw = {"s": "hello é", "i": 42,
+                                   "l": list(range(100)),
+                                   "d": {"x": 1.5, "y": [1, 2]}})
+
+    def feed(self, parser, size):
+        for i in range(0, len(self.msg), size):
+            parser.feed(self.msg[i:i + size])
+        return parser.close()
+
+    def testChunkSizes(self):
+        expected = parseSOAPRPC(self.msg)
+        for size in (1, 7, 100, 4096, len(self.msg)):
+            r = self.feed(SOAPPushParser(), size)
+            self.assertEqual(r._name, expected._name)
+            self.assertEqual(r._ns, "urn:test")
+            self.assertEqual(r.s, "hello é")
+            self.assertEqual(r.i, 42)
+            self.assertEqual(list(r.l), list(range(100)))
+            self.assertEqual(r.d.x, 1.5)
+            self.assertEqual(list(r.d.y), [1, 2])
+
+    def testFlags(self):
+        r, header, body, attrs = self.feed(
+            SOAPPushParser(header = 1, body = 1, attrs = 1), 50)
+        self.assertEqual(header.token, "abc")
+        self.assertTrue(body[0] is r)
+        self.assertTrue(id(r) in attrs)
+
+        body = self.feed(SOAPPushParser(rpc = 0), 50)
+        self.assertEqual(body[0].i, 42)
+
+    def testMalformed(self):
+        p = SOAPPushParser()
+        p.feed(self.msg[:len(self.msg) // 2])
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertRaises(xml.sax.SAXParseException, p.feed,
+                              b"<<<" + self.msg[len(self.msg) // 2:])
+        # errors are raised, not printed
+        self.assertEqual(out.getvalue(), "")
+
+    def testTruncated(self):
+        p = SOAPPushParser()
+        p.feed(self.msg[:len(self.msg) // 2])
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertRaises(xml.sax.SAXParseException, p.close)
+        self.assertEqual(out.getvalue(), "")
+
+    def testServerKeepsConnection(self):
+        server = ThreadingSOAPServer(('localhost', 0))
+        server.registerFunction(lambda: 1, funcName = "ping")
+        t = threading.Thread(target = server.serve_forever)
+        t.daemon = True
+        t.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        s = socket.create_connection(server.server_address)
+        self.addCleanup(s.close)
+        f = s.makefile('rb')
+        self.addCleanup(f.close)
+
+        def request(body):
+            s.sendall(b"POST / HTTP/1.1\r\nHost: x\r\n"
+                      b"Content-type: text/xml\r\n"
+                      b"Content-length: %d\r\n\r\n" % len(body) + body)
+            status = f.readline()
+            length = 0
+            while 1:
+                line = f.readline()
+                if line == b"\r\n":
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            return status, f.read(length)
+
+        # a bad request whose body fails to parse in its first chunk ...
+        status, body = request(b"<junk" + b" " * 200000 + b">")
+        self.assertTrue(b" 500 " in status)
+
+        # ... and a good one afterwards, on another connection
+        s.close()
+        s = socket.create_connection(server.server_address)
+        self.addCleanup(s.close)
+        f = s.makefile('rb')
+        self.addCleanup(f.close)
+        status, body = request(buildSOAP(method = "ping"))
+        self.assertTrue(b" 200 " in status)
+        self.assertEqual(parseSOAPRPC(body).Result, 1)
+
+    def testServerRequestData(self):
+        # the request is read into one buffer, and handed to methods as
+        # bytes
+        seen = []
+        def echo(s, _SOAPContext = None):
+            seen.append(_SOAPContext.xmldata)
+            return s
+
+        server = ThreadingSOAPServer(('localhost', 0))
+        server.registerFunction(MethodSig(echo, context = 1))
+        t = threading.Thread(target = server.serve_forever)
+        t.daemon = True
+        t.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(HTTPTransport.pool.clear)
+
+        s = "x" * 300000
+        proxy = SOAPProxy('http://localhost:%d/' % server.server_address[1])
+        self.assertEqual(proxy.echo(s), s)
+        self.assertTrue(type(seen[0]) is bytes)
+        self.assertTrue(seen[0].endswith(b"</SOAP-ENV:Envelope>\n"))
+        self.assertEqual(parseSOAPRPC(seen[0])[0], s)
+
+if __name__ == '__main__':
+    unittest.main()
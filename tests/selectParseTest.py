@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for parsing only the elements on selected paths.
+#
+################################################################################
+
+import sys
+import unittest
+from xml.sax import SAXParseException
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+from SOAPpy.Parser import _parseSOAP, _selectTree, _Reparse
+
+ENV = '''<?xml version="1.0"?>
+<SOAP-ENV:Envelope xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/"
+  xmlns:SOAP-ENC="http://schemas.xmlsoap.org/soap/encoding/"
+  xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+  xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+<SOAP-ENV:Body>%s</SOAP-ENV:Body></SOAP-ENV:Envelope>'''
+
+def message(body):
+    return (ENV % body).encode()
+
+# the way some toolkits encode every struct, as a multiref after the method
+MULTIREFS = message(
+    '<m><Result href="#1"/><Other href="#2"/></m>'
+    '<q id="1" SOAP-ENC:root="0"><price xsi:type="xsd:double">1.5</price>'
+    '<name>quote</name><hist href="#3"/></q>'
+    '<o id="2" SOAP-ENC:root="0"><x xsi:type="xsd:int">1</x></o>'
+    '<h id="3" SOAP-ENC:root="0" SOAP-ENC:arrayType="xsd:int[2]">'
+    '<i>1</i><i>2</i></h>')
+
+class SelectParseTestCase(unittest.TestCase):
+
+    def testTree(self):
+        self.assertEqual(_selectTree(["m/a/b", "m/a/c", "/m/d/", "n"]),
+                         {"m": {"a": {"b": None, "c": None}, "d": None},
+                          "n": None})
+        self.assertEqual(_selectTree(["m/a/b", "m/a", "m/a/c"]),
+                         {"m": {"a": None}})
+
+    def testPaths(self):
+        msg = buildSOAP(method = "m", kw = {
+            "Result": {"price": 1.5, "name": "x", "hist": [1, 2, 3]},
+            "other": {"a": 1}})
+        for backend in ("sax", "expat"):
+            r = parseSOAPRPC(msg, select = ["m/Result/price"],
+                             backend = backend)
+            self.assertEqual(r._keyord, ["Result"])
+            self.assertEqual(r.Result._asdict(), {"price": 1.5})
+
+            r = parseSOAPRPC(msg, select = ["m/Result/hist", "m/other"],
+                             backend = backend)
+            self.assertEqual(list(r.Result.hist), [1, 2, 3])
+            self.assertEqual(r.other.a, 1)
+            self.assertFalse(hasattr(r.Result, "price"))
+
+            # nothing selected inside still gives a struct
+            r = parseSOAPRPC(msg, select = ["m/Result/missing"],
+                             backend = backend)
+            self.assertTrue(isinstance(r.Result, structType))
+            self.assertEqual(r.Result._keyord, [])
+
+    def testBodyEntries(self):
+        msg = message('<a><x>1</x></a><b><y>2</y></b>')
+        r, body = parseSOAPRPC(msg, select = ["b/y"], body = 1)
+        self.assertEqual(r.y, "2")
+        self.assertEqual(body._keyord, ["b"])
+
+        msg = message('<SOAP-ENV:Fault><faultcode>SOAP-ENV:Server'
+                      '</faultcode><faultstring>no</faultstring>'
+                      '</SOAP-ENV:Fault>')
+        r = parseSOAPRPC(msg, select = ["m/Result"])
+        self.assertTrue(isinstance(r, faultType))
+        self.assertEqual(r.faultstring, "no")
+
+    def testMultirefs(self):
+        for backend in ("sax", "expat"):
+            r = parseSOAPRPC(MULTIREFS, select = ["m/Result/price"],
+                             backend = backend)
+            self.assertEqual(r._keyord, ["Result"])
+            self.assertEqual(r.Result._asdict(), {"price": 1.5})
+
+            r = parseSOAPRPC(MULTIREFS, select = ["m/Result/hist",
+                                                  "m/Result/name"],
+                             backend = backend)
+            self.assertEqual(list(r.Result.hist), [1, 2])
+            self.assertEqual(r.Result.name, "quote")
+
+            r = parseSOAPRPC(MULTIREFS, select = ["m/Result"],
+                             backend = backend)
+            self.assertEqual(simplify(r.Result),
+                             {"price": 1.5, "name": "quote", "hist": [1, 2]})
+
+        # multirefs directly in the Body are built, as an href further on
+        # may refer to them; the elements not on the paths are skipped
+        t = _parseSOAP(MULTIREFS, select = ["m/Result/price"])
+        self.assertEqual(t._skipped, set())
+        self.assertEqual(t._built["1"], {"price": None})
+        self.assertEqual(t.body.m._keyord, ["Result"])
+
+    def testSharedValues(self):
+        # buildSOAP() shares equal values, from places on the paths and off
+        # them, as multirefs after the method; one parse is enough
+        item = {"name": "same", "v": 1}
+        msg = buildSOAP(method = "getQuoteResponse",
+                        kw = {"Result": "same", "other": item,
+                              "list": [item, {"name": "same"}]})
+        select = ["getQuoteResponse/list/item/name"]
+        for backend in ("sax", "expat"):
+            # raises _Reparse if a second parse is needed
+            _parseSOAP(msg, select = select, backend = backend)
+            r = parseSOAPRPC(msg, select = select, backend = backend)
+            self.assertEqual([i.name for i in r.list], ["same", "same"])
+            self.assertFalse(hasattr(r, "Result"))
+
+    def testSharedMultiref(self):
+        msg = message('<m><a href="#1"/><b href="#1"/></m>'
+                      '<v id="1" SOAP-ENC:root="0"><x>1</x><y>2</y><z>3</z>'
+                      '</v>')
+        r = parseSOAPRPC(msg, select = ["m/a/x", "m/b/y"])
+        self.assertTrue(r.a is r.b)
+        self.assertEqual(r.a._asdict(), {"x": "1", "y": "2"})
+
+    def testReparse(self):
+        # the element referred to comes before the href to it, and was
+        # skipped
+        msg = message('<m><c><v id="1"><x>1</x></v></c>'
+                      '<a href="#1"/><b>2</b></m>')
+        self.assertRaises(_Reparse, _parseSOAP, msg, select = ["m/a"])
+        r = parseSOAPRPC(msg, select = ["m/a"])
+        self.assertEqual((r.a.x, r.b), ("1", "2"))
+
+        # built already, without all that is wanted of it
+        msg = message('<m><a id="1"><x>1</x><y>2</y></a><b href="#1"/></m>')
+        r = parseSOAPRPC(msg, select = ["m/a/x", "m/b/y"])
+        self.assertEqual(r.b.y, "2")
+
+        # inside an element skipped
+        msg = message('<m><a href="#1"/><c><v id="1"><x>1</x></v></c></m>')
+        r = parseSOAPRPC(msg, select = ["m/a"])
+        self.assertEqual((r.a.x, r.c.v.x), ("1", "1"))
+
+    def testNoMatch(self):
+        # with multirefs after the method, not to be taken for it
+        msg = buildSOAP(method = "m", kw = {"a": "s", "b": ["s", "s"]})
+        self.assertTrue(b'id="i1"' in msg)
+        for select in (["nomatch/x"], ["M/a"]):
+            try:
+                parseSOAPRPC(msg, select = select)
+            except Error as e:
+                self.assertTrue(select[0] in str(e))
+            else:
+                self.fail("no error")
+
+    def testErrors(self):
+        # skipped elements are still checked to be well-formed
+        msg = message('<m><a>1</a><b><c></b></m>')
+        for backend in ("sax", "expat"):
+            self.assertRaises(SAXParseException, parseSOAPRPC, msg,
+                              select = ["m/a"], backend = backend)
+
+        # and hrefs to nowhere, from the paths, caught
+        self.assertRaises(Error, parseSOAPRPC,
+                          message('<m><a href="#1"/></m>'), select = ["m/a"])
+
+    def testNative(self):
+        r = parseSOAPRPC(MULTIREFS, select = ["m/Result/price"], native = 1)
+        self.assertEqual(r.Result, {"price": 1.5})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+
+# Time to parse a response of a few hundred KB for two of its fields, in
+# full and with parseSOAPRPC(select=...).
+
+import time
+import sys
+sys.path.insert(1, "..")
+
+from SOAPpy import parseSOAPRPC
+
+N = 2000
+
+record = ('<item><id xsi:type="xsd:int">%d</id>'
+          '<price xsi:type="xsd:double">12.75</price>'
+          '<created xsi:type="xsd:dateTime">2001-02-03T04:05:06Z</created>'
+          '<name xsi:type="xsd:string">name</name></item>')
+
+msg = ('''<?xml version="1.0" encoding="UTF-8"?>
+<SOAP-ENV:Envelope
+  xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/"
+  xmlns:SOAP-ENC="http://schemas.xmlsoap.org/soap/encoding/"
+  xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+  xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+<SOAP-ENV:Body>
+<ns1:getQuoteResponse xmlns:ns1="urn:test">
+<Result>
+<symbol xsi:type="xsd:string">ABC</symbol>
+<price xsi:type="xsd:double">101.25</price>
+<history SOAP-ENC:arrayType="xsd:ur-type[%d]" xsi:type="SOAP-ENC:Array">
+%s
+</history>
+</Result>
+</ns1:getQuoteResponse>
+</SOAP-ENV:Body>
+</SOAP-ENV:Envelope>''' % (N, "\n".join([record % i for i in range(N)]))).encode()
+
+select = ["getQuoteResponse/Result/symbol", "getQuoteResponse/Result/price"]
+
+def ParseTime(select, backend, repeat = 5):
+    best = None
+    for i in range(repeat):
+        start = time.time()
+        r = parseSOAPRPC(msg, select = select, backend = backend).Result
+        assert (r.symbol, r.price) == ("ABC", 101.25)
+        start = time.time() - start
+        if best is None or start < best:
+            best = start
+    return best
+
+print()
+print("Parse two fields of a response of %d bytes" % len(msg))
+for backend in ("sax", "expat"):
+    full = ParseTime(None, backend)
+    part = ParseTime(select, backend)
+    print("%-6s full %7.2f ms  select %7.2f ms  %3.0f%%" %
+          (backend, full * 1e3, part * 1e3, part / full * 100))
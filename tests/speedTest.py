@@ -6,7 +6,7 @@ import time
 import sys
 sys.path.insert(1, "..")
 
-x='''<SOAP-ENV:Envelope
+x=b'''<SOAP-ENV:Envelope
       xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/"
       xmlns:xsi="http://www.w3.org/1999/XMLSchema-instance"
       xmlns:xsd="http://www.w3.org/1999/XMLSchema">
@@ -18,7 +18,7 @@ x='''<SOAP-ENV:Envelope
       </SOAP-ENV:Body>
    </SOAP-ENV:Envelope>'''
 
-x2='''<SOAP-ENV:Envelope xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema" xmlns:SOAP-ENC="http://schemas.xmlsoap.org/soap/encoding/" xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/" SOAP-ENV:encodingStyle="http://schemas.microsoft.com/soap/encoding/clr/1.0 http://schemas.xmlsoap.org/soap/encoding/" xmlns:i3="http://soapinterop.org/xsd" xmlns:i2="http://soapinterop.org/">
+x2=b'''<SOAP-ENV:Envelope xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema" xmlns:SOAP-ENC="http://schemas.xmlsoap.org/soap/encoding/" xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/" SOAP-ENV:encodingStyle="http://schemas.microsoft.com/soap/encoding/clr/1.0 http://schemas.xmlsoap.org/soap/encoding/" xmlns:i3="http://soapinterop.org/xsd" xmlns:i2="http://soapinterop.org/">
 <SOAP-ENV:Body>
 <i2:echoStructArray id="ref-1">
 <return href="#ref-4"/>
@@ -49,12 +49,15 @@ x2='''<SOAP-ENV:Envelope xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" x
 
 # Import in function, because for some reason they slow each other
 # down in same namespace ???
-def SOAPParse(inxml):
+def SOAPParse(inxml, backend = 'sax'):
     from SOAPpy import parseSOAPRPC
     t=  time.time()
-    parseSOAPRPC(inxml)
+    parseSOAPRPC(inxml, backend = backend)
     return time.time()-t
 
+def SOAPParseExpat(inxml):
+    return SOAPParse(inxml, 'expat')
+
 def SAXParse(inxml):
     import xml.sax
     y = xml.sax.handler.ContentHandler()
@@ -75,9 +78,31 @@ print()
 print("Simple XML")
 print("SAX Parse, no marshalling   ", SAXParse(x))
 print("SOAP Parse, and marshalling ", SOAPParse(x))
+print("SOAP Parse, expat backend   ", SOAPParseExpat(x))
 print("DOM Parse, no marshalling   ", DOMParse(x))
 print()
 print("Complex XML (references)")
 print("SAX Parse, no marshalling   ", SAXParse(x2))
 print("SOAP Parse, and marshalling ", SOAPParse(x2))
+print("SOAP Parse, expat backend   ", SOAPParseExpat(x2))
 print("DOM Parse, no marshalling   ", DOMParse(x2))
+
+# A larger message, best of a few runs
+from SOAPpy import buildSOAP, structType
+
+def struct(i):
+    s = structType()
+    s._addItem("varString", "s%d" % i)
+    s._addItem("varInt", i)
+    s._addItem("varFloat", i * 0.5)
+    return s
+
+x3 = buildSOAP(method = "echoStructArray",
+               kw = {"inputStructArray": [struct(i) for i in range(5000)]})
+
+print()
+print("Large XML (5000 structs)")
+print("SAX Parse, no marshalling   ", min([SAXParse(x3) for i in range(3)]))
+print("SOAP Parse, and marshalling ", min([SOAPParse(x3) for i in range(3)]))
+print("SOAP Parse, expat backend   ",
+      min([SOAPParseExpat(x3) for i in range(3)]))
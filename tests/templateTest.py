@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+# Tests for request templates and SOAPProxy.prepare().
+#
+################################################################################
+
+import sys
+import asyncio
+import threading
+import unittest
+
+sys.path.insert(1, "..")
+from SOAPpy import *
+from SOAPpy.SOAPBuilder import SOAPTemplate
+
+SIGNATURE = (("i", int), ("f", float), ("s", str), ("b", bool))
+
+class TemplateTestCase(unittest.TestCase):
+
+    def generic(self, values, **kw):
+        return buildSOAP(kw = dict(zip([n for n, t in SIGNATURE], values)),
+                         method = "m", **kw)
+
+    def testSameAsBuilder(self):
+        opts = [{"namespace": "urn:x"},
+                {"namespace": "urn:x", "encoding": None},
+                {"header": headerType({"token": "abc"}),
+                 "methodattrs": {"a": "1"}},
+                {"config": SOAPConfig(buildWithNamespacePrefix = 0),
+                 "namespace": "urn:y"}]
+        values = [[1, 2.5, "x", True],
+                  [-10 ** 30, float("inf"), "<&>\"'", False],
+                  [0, 1e-300, "", True],
+                  [7, 0.0, "s0", False]]
+
+        for kw in opts:
+            t = SOAPTemplate(SIGNATURE, method = "m", **kw)
+            for v in values:
+                self.assertEqual(t.build(v), self.generic(v, **kw))
+
+    def testMismatch(self):
+        t = SOAPTemplate(SIGNATURE, method = "m")
+        self.assertEqual(t.build([1, 2, "x", True]), None)
+        self.assertEqual(t.build([True, 2.5, "x", True]), None)
+        self.assertEqual(t.build([1, 2.5, None, True]), None)
+        self.assertEqual(t.build([1, 2.5, "x"]), None)
+
+    def testUnsupported(self):
+        self.assertRaises(TypeError, SOAPTemplate, [("l", list)], method = "m")
+
+class PrepareTestCase(unittest.TestCase):
+
+    def setUp(self):
+        server = ThreadingSOAPServer(('localhost', 0))
+
+        def describe(i, f, s, b):
+            return "%r %r %r %r" % (i, f, s, b)
+
+        server.registerFunction(describe)
+        t = threading.Thread(target = server.serve_forever)
+        t.daemon = True
+        t.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(HTTPTransport.pool.clear)
+        self.url = 'http://localhost:%d/' % server.server_address[1]
+
+    def testCall(self):
+        proxy = SOAPProxy(self.url)
+        describe = proxy.prepare("describe", SIGNATURE)
+        self.assertEqual(describe(1, 2.5, "x", True), "1 2.5 'x' True")
+        self.assertEqual(describe(1, 2.5, b = False, s = "y"),
+                         "1 2.5 'y' False")
+
+        # other types take the generic path
+        self.assertEqual(describe(1, 2, "x", True), "1 2 'x' True")
+        self.assertEqual(describe(1, 2.5, "x", b = None),
+                         "1 2.5 'x' None")
+        self.assertRaises(faultType, describe, 1, 2.5)
+
+    def testAsync(self):
+        async def go():
+            proxy = AsyncSOAPProxy(self.url)
+            describe = proxy.prepare("describe", SIGNATURE)
+            try:
+                return [await describe(1, 2.5, "x", True),
+                        await describe(1, 2, "x", True)]
+            finally:
+                AsyncHTTPTransport.pool.clear()
+
+        self.assertEqual(asyncio.run(go()),
+                         ["1 2.5 'x' True", "1 2 'x' True"])
+
+if __name__ == '__main__':
+    unittest.main()